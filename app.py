@@ -1,22 +1,25 @@
 import dash
-from dash import html, dcc, Input, Output, State
-import dash_bootstrap_components as dbc
+from dash import html, dcc, ctx, no_update, Input, Output, State
 import pages.churn_analysis
 import pages.data_overview
 import pages.segmentation
+import pages.trends
+from utils.exports import register_export_routes
+from utils.assets import stylesheet_urls
+from utils.http_cache import init_http_caching
+from utils.datasets import DATASETS, dataset_from_search, dataset_search, default_dataset
 
 app = dash.Dash(
     __name__, 
-    external_stylesheets=[dbc.themes.BOOTSTRAP],
-    external_scripts=[
-        "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/js/all.min.js"
-    ],
+    # Bootstrap, the icon font and the page styles are served from assets/
+    # so the first paint never waits on an external host
+    external_stylesheets=stylesheet_urls(),
+    include_assets_files=False,
     suppress_callback_exceptions=True
 )
 
 app.title = "X-Bank Dashboard"
 
-# Add FontAwesome CSS to head
 app.index_string = '''
 <!DOCTYPE html>
 <html>
@@ -25,7 +28,6 @@ app.index_string = '''
         <title>{%title%}</title>
         {%favicon%}
         {%css%}
-        <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
     </head>
     <body>
         {%app_entry%}
@@ -45,7 +47,16 @@ app.layout = html.Div(className="dashboard-grid", children=[
     html.Nav(id="navbar-container", className="navbar", children=[
         html.Div(className="navbar-content", children=[
             html.H1(id="navbar-title", className="navbar-title"),
-            html.P(id="navbar-subtitle", className="navbar-subtitle")
+            html.P(id="navbar-subtitle", className="navbar-subtitle"),
+            # Regional book shown on every page, kept in the URL as ?dataset=
+            dcc.Dropdown(
+                id="dataset-select",
+                options=[{"label": dataset.label, "value": name} for name, dataset in DATASETS.items()],
+                value=default_dataset(),
+                clearable=False,
+                searchable=False,
+                style={"width": "180px", "marginLeft": "auto"}
+            )
         ])
     ]),
     html.Aside(className="sidebar", children=[
@@ -77,6 +88,17 @@ app.layout = html.Div(className="dashboard-grid", children=[
                         ]
                     ),
                 ]),
+                html.Li([
+                    html.A(
+                        id="trends-link",
+                        className="sidebar-link",
+                        href="/trends",
+                        children=[
+                            html.I(className="fa-solid fa-chart-line"),
+                            html.Span("Trends", className="nav-item")
+                        ]
+                    ),
+                ]),
                 html.Li([
                     html.A(
                         id="data-overview-link",
@@ -95,30 +117,13 @@ app.layout = html.Div(className="dashboard-grid", children=[
     html.Div(id="page-content", className="main")
 ])
 
-# defining font-awesome and fonts -------------------------------------------------
-app.index_string = """
-<!DOCTYPE html>
-<html>
-    <head>
-        {%metas%}
-        {%css%}
-        <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.7.2/css/all.min.css">
-    </head>
-    <body>
-        {%app_entry%}
-        {%config%}
-        {%scripts%}
-        {%renderer%}
-    </body>
-</html>
+server = app.server
 
-<style>
-@import url("https://fonts.googleapis.com/css2?family=Poppins:ital,wght@0,100;0,200;0,300;0,400;0,500;0,600;0,700;0,800;0,900;1,100;1,200;1,300;1,400;1,500;1,600;1,700;1,800;1,900&display=swap");
-@import url('https://fonts.googleapis.com/css2?family=Zen+Dots&display=swap');
-</style>
-"""
+# Streaming CSV/Parquet downloads for retention campaigns
+register_export_routes(server)
 
-server = app.server
+# gzip/brotli responses and ETags tied to the data version
+init_http_caching(server)
 
 # Callback to update Navbar dynamically
 @app.callback(
@@ -133,16 +138,47 @@ def update_navbar(pathname):
         return "Churn Analysis", "Explore customer churn trends"
     elif pathname == "/segmentation":
         return "Customer Segmentation", "Identify customer groups and behaviors"
+    elif pathname == "/trends":
+        return "Trends", "Track churn, segments and outliers month by month"
     elif pathname == "/data_overview":
         return "Data Overview", "Explore the dataset and detect anomalies"
     else:
         return "Page Not Found", ""
 
+# Callback keeping the dataset dropdown and the ?dataset= URL parameter in sync
+@app.callback(
+    [Output("url", "search"),
+     Output("dataset-select", "value")],
+    [Input("url", "search"),
+     Input("dataset-select", "value")]
+)
+def sync_dataset(search, selected):
+    if ctx.triggered_id == "dataset-select":
+        return dataset_search(selected), no_update
+    return no_update, dataset_from_search(search)
+
+# Callback carrying the selected dataset over to the sidebar links
+@app.callback(
+    [
+    Output("churn-analysis-link", "href"),
+    Output("segmentation-link", "href"),
+    Output("trends-link", "href"),
+    Output("data-overview-link", "href"),
+    ],
+    [
+    Input("url", "search")
+    ]
+)
+def update_link_targets(search):
+    query = dataset_search(dataset_from_search(search))
+    return "/" + query, "/segmentation" + query, "/trends" + query, "/data_overview" + query
+
 # Callback to update the active link
 @app.callback(
     [
     Output("churn-analysis-link", "className"),
     Output("segmentation-link", "className"),
+    Output("trends-link", "className"),
     Output("data-overview-link", "className"),
     ],
     [
@@ -158,16 +194,20 @@ def update_active_tab(pathname):
     return (
         active_class if pathname == "/" else default_class,
         active_class if pathname == "/segmentation" else default_class,
+        active_class if pathname == "/trends" else default_class,
         active_class if pathname == "/data_overview" else default_class,
     )
 
 
-@app.callback(Output("page-content", "children"), [Input("url", "pathname")])
-def display_page(pathname):
+# The page is rendered again when the dataset changes so its callbacks refetch
+@app.callback(Output("page-content", "children"), [Input("url", "pathname"), Input("url", "search")])
+def display_page(pathname, search):
     if pathname == "/":
         return pages.churn_analysis.layout
     elif pathname == "/segmentation":
         return pages.segmentation.layout
+    elif pathname == "/trends":
+        return pages.trends.layout
     elif pathname == "/data_overview":
         return pages.data_overview.layout
     else:
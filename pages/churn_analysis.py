@@ -1,35 +1,11 @@
 from dash import html
-import pandas as pd
 import numpy as np
 from dash import html, dcc, Input, Output, callback, State
 import plotly.express as px
 from components.techniques_info import create_techniques_info_card
-
-df = pd.read_csv(r"data/processed-data/bank-data-processed.csv")
-
-
-# Create Age Groups
-bins = [18, 25, 35, 45, 55, 65, 75, 90]  
-labels = ["18-24", "25-34", "35-44", "45-54", "55-64", "65-74", "75+"]  
-df["AgeGroup"] = pd.cut(df["Age"], bins=bins, labels=labels, right=False)
-
-
-churned_customers = df[df["Exited"] == 1].shape[0]
-active_customers = df[df["IsActiveMember"] == True].shape[0]
-total_customers = df.shape[0]
-churn_rate = (churned_customers / total_customers) * 100
-retain_rate = 100 - churn_rate
-
-churn_rate_str = f"{churn_rate:.2f}%"
-active_customers_str = f"{active_customers:,}"
-churned_customers_str = f"{churned_customers:,}"
-total_customers_str = f"{total_customers:,}"
-retain_rate_str = f"{retain_rate:.2f}%"
+from utils.datasets import engine_for_search
 
 layout = html.Div(className="page-content", children=[
-    html.Link(rel="stylesheet", href="/assets/churn_analysis.css"),
-    html.Link(rel="stylesheet", href="/assets/techniques_info.css"),
-    
     # Techniques Info Card
     create_techniques_info_card(),
     
@@ -57,7 +33,7 @@ layout = html.Div(className="page-content", children=[
                         html.I(className="fa-solid fa-chart-line"),
                         html.Span("Churn Rate", className="card-header")
                     ]),
-                    html.Div(churn_rate_str, className="kpi-value")
+                    html.Div(id="kpi-churn-rate", className="kpi-value")
                 ]),
 
                 html.Div(className="card", children=[
@@ -65,7 +41,7 @@ layout = html.Div(className="page-content", children=[
                         html.I(className="fa-solid fa-user-times"),
                         html.Span("No. of Churned Customers", className="card-header")
                     ]),
-                    html.Div(churned_customers_str, className="kpi-value")
+                    html.Div(id="kpi-churned-customers", className="kpi-value")
                 ]),
                         
                 html.Div(className="card", children=[
@@ -73,7 +49,7 @@ layout = html.Div(className="page-content", children=[
                         html.I(className="fa-solid fa-user-check"),
                         html.Span("Active Customers", className="card-header")
                     ]),
-                    html.Div(active_customers_str, className="kpi-value")
+                    html.Div(id="kpi-active-customers", className="kpi-value")
                 ]),
 
                 html.Div(className="card", children=[
@@ -81,7 +57,7 @@ layout = html.Div(className="page-content", children=[
                         html.I(className="fa-solid fa-user-check"),
                         html.Span("Retain Rate", className="card-header")
                     ]),
-                    html.Div(retain_rate_str, className="kpi-value")
+                    html.Div(id="kpi-retain-rate", className="kpi-value")
                 ]),
 
                 html.Div(className="card", children=[
@@ -89,7 +65,7 @@ layout = html.Div(className="page-content", children=[
                         html.I(className="fa-solid fa-user-times"),
                         html.Span("Total Customers", className="card-header")
                     ]),
-                    html.Div(total_customers_str, className="kpi-value")
+                    html.Div(id="kpi-total-customers", className="kpi-value")
                 ]),
         ]),
 
@@ -144,74 +120,60 @@ layout = html.Div(className="page-content", children=[
                     )]),
         ]),
 
-        # Insights Part 1
+        # Per-customer explanation
+        html.Div(className="card-group behaviour-container explanation-container", children=[
+            html.H3("Why Is This Customer at Risk?", className="group-title"),
+                    html.Div(className="card", children=[
+                    html.Div(className="explanation-controls", children=[
+                        html.Span("Customer row"),
+                        dcc.Input(id="explanation-row", type="number", min=0, step=1, value=0, debounce=True),
+                    ]),
+                    html.Div(
+                        dcc.Graph(id="customer-explanation", config={"displayModeBar": False}, style={"width": "100%", "height": "100%"})
+                    )]),
+        ]),
+
+        # Insights Part 1 (highest-risk cohorts, mined from the data)
         html.Div(className="card-group insight-container1", children=[
             html.H3("Insights", className="group-title"),
-            html.Div(className="card insight", children=[
-        
-        # Insight 1: Age Matters
-        html.Div([
-            html.P("1. Age Matters", style={'color': '#3498db'}),
-            html.P("- Younger customers (below 40) are more likely to leave, especially if they have a low balance or are inactive."),
-            html.P("- Older customers (above 40) are more loyal, especially if they are active members or have a higher balance."),
-        ], style={"marginBottom": "2px"}),
-        
-        # Insight 2: Active Members Stay Longer
-        html.Div([
-            html.P("2. Active Members Stay Longer", style={'color': '#3498db'}),
-            html.P("- Customers who are active members are much less likely to leave the bank."),
-        ], style={"marginBottom": "2px"}),
-        
-        # Insight 3: Balance and Credit Score
-        html.Div([
-            html.P("3. Balance and Credit Score", style={'color': '#3498db'}),
-            html.P("- Customers with low balances (below 60,000) or lower credit scores (below 550) are more likely to leave, especially if they are younger."),
-        ], style={'marginBottom': "2px"}),
-        
-        # Insight 4: Geography Plays a Role
-        html.Div([
-            html.P("4. Geography Plays a Role", style={'color': '#3498db'}),
-            html.P("- Customers from Germany are more likely to leave compared to those from Spain."),
-            html.P("- Customers from Spain are more loyal, especially if they are active members or have a higher balance."),
-        ], style={'marginBottom': '2px'}),
-    ]),
+            html.Div(id="insights-risk", className="card insight"),
         ]),
 
-        # Insights Part 2
+        # Insights Part 2 (most loyal cohorts)
         html.Div(className="card-group insight-container2", children=[
-            html.Div(className="card insight", children=[
-        # Insight 5: Multiple Products Increase Loyalty
-        html.Div([
-            html.P("5. Multiple Products Increase Loyalty", style={'color': '#3498db'}),
-            html.P("- Customers with more than one product (e.g., checking account and credit card) are less likely to leave."),
-            html.P("- Customers with three or more products are even more loyal."),
-        ], style={'marginBottom': '2px'}),
-        
-        # Insight 6: Long-Term Customers Are Loyal
-        html.Div([
-            html.P("6. Long-Term Customers Are Loyal", style={'color': '#3498db'}),
-            html.P("- Customers who have been with the bank for longer periods (e.g., more than 5 years) are less likely to leave."),
-        ], style={'marginBottom': '2px'}),
-        
-        # Insight 7: Credit Card Ownership Helps
-        html.Div([
-            html.P("7. Credit Card Ownership Helps", style={'color': '#3498db'}),
-            html.P("- Customers without a credit card are more likely to leave, especially if they are younger or have a low balance."),
-            html.P("- Customers with a credit card are more likely to stay, especially if they are active members."),
-        ], style={'marginBottom': '2px'}),
-
-    ]),
+            html.Div(id="insights-loyal", className="card insight"),
         ]),
     ]),
 ]),
 
+# Callback for the KPI cards of the selected dataset
+@callback(
+    Output("kpi-churn-rate", "children"),
+    Output("kpi-churned-customers", "children"),
+    Output("kpi-active-customers", "children"),
+    Output("kpi-retain-rate", "children"),
+    Output("kpi-total-customers", "children"),
+    Input("kpi-churn-rate", 'id'),
+    State("url", "search")
+)
+def update_kpis(_, search):
+    kpis = engine_for_search(search).run_query("customer_kpis").iloc[0]
+    churned_customers = int(kpis["churned_customers"])
+    active_customers = int(kpis["active_customers"])
+    total_customers = int(kpis["total_customers"])
+    churn_rate = (churned_customers / total_customers) * 100 if total_customers else 0.0
+    retain_rate = 100 - churn_rate
+    return (f"{churn_rate:.2f}%", f"{churned_customers:,}", f"{active_customers:,}",
+            f"{retain_rate:.2f}%", f"{total_customers:,}")
+
 # Callback for Churn Rate by Geography
 @callback(
     Output("churn-rate-by-geography", "figure"),
-    Input("churn-rate-by-geography", 'id')
+    Input("churn-rate-by-geography", 'id'),
+    State("url", "search")
 )
-def update_geography(_):
-    geo_churn = df.groupby("Geography", as_index=False, observed=True)["Exited"].mean()
+def update_geography(_, search):
+    geo_churn = engine_for_search(search).run_query("churn_by_geography")
     fig = px.bar(geo_churn, 
                  x="Geography", 
                  y="Exited", 
@@ -244,10 +206,11 @@ def update_geography(_):
 # Callback for Churn Rate by Age Group
 @callback(
     Output("churn-rate-by-age", "figure"),
-    Input("churn-rate-by-age", 'id')
+    Input("churn-rate-by-age", 'id'),
+    State("url", "search")
 )
-def update_age_group(_):
-    age_churn = df.groupby("AgeGroup", as_index=False, observed=True)["Exited"].mean()
+def update_age_group(_, search):
+    age_churn = engine_for_search(search).run_query("churn_by_age_group")
     fig = px.bar(age_churn, x="AgeGroup", y="Exited", title="Churn Rate by Age Group")
     fig.update_layout(yaxis_tickformat=".0%",
                       margin=dict(t=10, b=10, l=10, r=10),
@@ -276,10 +239,11 @@ def update_age_group(_):
 # Callback for Churn Rate by Gender
 @callback(
     Output("churn-rate-by-gender", "figure"),
-    Input("churn-rate-by-gender", 'id')
+    Input("churn-rate-by-gender", 'id'),
+    State("url", "search")
 )
-def update_gender(_):
-    gender_churn = df.groupby("Gender", as_index=False, observed=True)["Exited"].mean()
+def update_gender(_, search):
+    gender_churn = engine_for_search(search).run_query("churn_by_gender")
     fig = px.bar(gender_churn, x="Gender", y="Exited", title="Churn Rate by Gender",
                  labels={"Gender": "Customer Gender", "Exited": "Churn Rate"})
     fig.update_layout(yaxis_tickformat=".0%",
@@ -309,10 +273,11 @@ def update_gender(_):
 # Callback for Churn Rate by Activity Status
 @callback(
     Output("churn-rate-by-activity", "figure"),
-    Input("churn-rate-by-activity", 'id')
+    Input("churn-rate-by-activity", 'id'),
+    State("url", "search")
 )
-def update_activity(_):
-    activity_churn = df.groupby("IsActiveMember", as_index=False, observed=True)["Exited"].mean()
+def update_activity(_, search):
+    activity_churn = engine_for_search(search).run_query("churn_by_activity")
     # Map 0/1 to Inactive/Active for display
     activity_churn["Status"] = activity_churn["IsActiveMember"].map({0.0: "Inactive", 1.0: "Active"})
     fig = px.bar(activity_churn, x="Status", y="Exited", title="Churn Rate by Gender",
@@ -351,10 +316,11 @@ def update_activity(_):
 # Callback for Churn Rate by Product
 @callback(
     Output("churn-rate-by-product", "figure"),
-    Input("churn-rate-by-product", 'id')
+    Input("churn-rate-by-product", 'id'),
+    State("url", "search")
 )
-def update_prodcuct(_):
-    product_churn = df.groupby("NumOfProducts", as_index=False, observed=True)["Exited"].mean()
+def update_prodcuct(_, search):
+    product_churn = engine_for_search(search).run_query("churn_by_products")
     fig = px.bar(product_churn, x="NumOfProducts", y="Exited", title="Churn Rate by Gender",
                  labels={"NumOfProducts": "Number of Products Held", "Exited": "Churn Rate"})
     fig.update_layout(yaxis_tickformat=".0%",
@@ -394,10 +360,12 @@ def update_prodcuct(_):
 # Callback for Feature Importances
 @callback(
     Output("feature-importances", "figure"),
-    Input("feature-importances", 'id')
+    Input("feature-importances", 'id'),
+    State("url", "search")
 )
-def update_prodcuct(_):
-    feature_importance = pd.read_csv(r"data/processed-data/feature_importance.csv")
+def update_prodcuct(_, search):
+    # Prefer importances derived from the explanation store so they match the model in use
+    feature_importance = engine_for_search(search).feature_importance()
     fig = px.bar(feature_importance, 
              x="Importance", 
              y="Feature", 
@@ -443,3 +411,82 @@ def update_prodcuct(_):
                       )
     return fig
 
+
+# Callback for a single customer's explanation
+@callback(
+    Output("customer-explanation", "figure"),
+    Input("explanation-row", "value"),
+    State("url", "search")
+)
+def update_customer_explanation(row, search):
+    explanation = engine_for_search(search).explain(int(row)) if row is not None else None
+    if explanation is None:
+        fig = px.bar()
+        fig.update_layout(
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            template="plotly_white",
+            annotations=[dict(text="No explanation available - run scripts/build_explanations.py",
+                              showarrow=False, font=dict(size=13, color='#1e3a5f'))]
+        )
+        return fig
+
+    explanation["Effect"] = np.where(explanation["Contribution"] > 0, "Raises churn risk", "Lowers churn risk")
+    fig = px.bar(explanation,
+             x="Contribution",
+             y="Feature",
+             orientation="h",
+             color="Effect",
+             color_discrete_map={"Raises churn risk": "#e74c3c", "Lowers churn risk": "#27ae60"})
+    fig.update_layout(margin=dict(t=10, b=10, l=150, r=50),
+                      xaxis_title="Contribution to churn log-odds",
+                      yaxis_title=None,
+                      title=None,
+                      dragmode=False,
+                      height=380,
+                      legend_title_text=None,
+                      yaxis=dict(
+                          autorange="reversed",
+                          tickfont=dict(
+                              size=12,
+                              color='rgb(30, 58, 95)',
+                              family="Arial"
+                          ),
+                        ),
+                      template="plotly_white",
+                      hoverlabel=dict(
+                          bgcolor="white",  
+                          font_size=12,     
+                          font_color="black",
+                          font_family="Poppins",  
+                          bordercolor="white"  
+                        ),
+                      )
+    return fig
+
+
+def insight_cards(insights, start=1):
+    return [
+        html.Div([
+            html.P(f"{number}. {insight['title']}", style={'color': '#3498db'}),
+            html.P(insight['text']),
+        ], style={'marginBottom': '2px'})
+        for number, insight in enumerate(insights, start=start)
+    ]
+
+
+# Callback for the Insights cards (cohorts are re-mined once per data version)
+@callback(
+    Output("insights-risk", "children"),
+    Output("insights-loyal", "children"),
+    Input("insights-risk", 'id'),
+    State("url", "search")
+)
+def update_insights(_, search):
+    try:
+        insights = engine_for_search(search).insights()
+    except Exception as e:
+        print(f"Error mining churn cohorts: {str(e)}")
+        return [html.Div(html.P("Insights are not available for this data."))], []
+    risk = insight_cards(insights["risk"])
+    return risk, insight_cards(insights["loyal"], start=len(risk) + 1)
@@ -1,75 +1,154 @@
 import pandas as pd
 import numpy as np
-from dash import html, dcc, callback, Input, Output
+from dash import html, dcc, callback, Input, Output, State
 import plotly.graph_objects as go
-from sklearn.ensemble import IsolationForest
-import os
 import traceback
 from components.techniques_info import create_techniques_info_card
+from utils.correlation import correlation_frame
+from utils.datasets import engine_for_search
+from utils.outliers import anomaly_histogram
+from utils.profiling import profile_summary
+from utils.drift import load_latest_report
 
-# Perform Outlier Detection using Isolation Forest
-def detect_outliers(dataframe, contamination=0.05):
+DRIFT_STATUS_COLORS = {'alert': '#e74c3c', 'warning': '#f39c12', 'stable': '#27ae60'}
+
+
+def format_stat(value):
+    if isinstance(value, str):
+        return value
+    if value is None or pd.isna(value):
+        return "–"
+    if isinstance(value, (int, np.integer)):
+        return f"{value:,}"
+    return f"{value:,.2f}" if abs(value) < 1e6 else f"{value:,.0f}"
+
+
+def create_quality_panel(profile):
+    """
+    Data quality table and per-column distribution, rendered from the stored sketches
     """
-    Detect outliers using Isolation Forest algorithm
-    contamination: expected proportion of outliers (0.05 = 5%)
+    header_style = {'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}
+    cell_style = {'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}
+    panel_style = {'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'}
+
+    if profile is None:
+        return html.Div([
+            html.H2('🧪 Data Quality', style={'color': '#1e3a5f', 'marginBottom': '15px'}),
+            html.P('No column profile for this data version yet. Run python -m scripts.build_profile to build it.', style={'color': '#555'})
+        ], style=panel_style)
+
+    summary = profile_summary(profile)
+    columns = ['Column', 'Type', 'Missing %', 'Distinct (approx.)', 'Mean', 'Std', 'Min', 'P25', 'Median', 'P75', 'Max', 'Most Common']
+    columns = [col for col in columns if col in summary.columns]
+    return html.Div([
+        html.H2('🧪 Data Quality', style={'color': '#1e3a5f', 'marginBottom': '15px'}),
+        html.Div([
+            html.Table([
+                html.Thead(html.Tr([html.Th(col, style=header_style) for col in columns])),
+                html.Tbody([
+                    html.Tr([html.Td(format_stat(row[col]), style=cell_style) for col in columns])
+                    for _, row in summary.iterrows()
+                ])
+            ], style={'width': '100%', 'borderCollapse': 'collapse', 'marginTop': '15px', 'fontSize': '13px'})
+        ], style={'overflowX': 'auto'}),
+        html.Div([
+            html.Span('Distribution of ', style={'color': '#1e3a5f', 'fontWeight': '600'}),
+            dcc.Dropdown(id='profile-column', options=list(summary['Column']), value=summary['Column'].iloc[0],
+                         clearable=False, style={'width': '260px'}),
+        ], style={'display': 'flex', 'alignItems': 'center', 'gap': '10px', 'marginTop': '25px'}),
+        dcc.Graph(id='profile-distribution', config={'displayModeBar': False})
+    ], style=panel_style)
+
+
+def create_correlation_panel(correlation):
     """
+    Heatmap of the pairwise correlations, from the streamed covariance accumulator
+    """
+    panel_style = {'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'}
+
+    if correlation is None or correlation.count < 2:
+        return html.Div([
+            html.H2('🔗 Feature Correlations', style={'color': '#1e3a5f', 'marginBottom': '15px'}),
+            html.P('Correlations could not be computed for this dataset.', style={'color': '#555'})
+        ], style=panel_style)
+
+    matrix = correlation_frame(correlation)
+    fig = go.Figure(go.Heatmap(
+        z=matrix.values, x=list(matrix.columns), y=list(matrix.index),
+        zmin=-1, zmax=1, colorscale='RdBu', reversescale=True,
+        text=matrix.round(2).values, texttemplate='%{text}', hovertemplate='%{y} / %{x}: %{z:.3f}<extra></extra>'
+    ))
+    fig.update_layout(height=600, template='plotly_white', yaxis={'autorange': 'reversed'}, margin={'t': 20})
+    return html.Div([
+        html.H2('🔗 Feature Correlations', style={'color': '#1e3a5f', 'marginBottom': '5px'}),
+        html.P(f"Pearson correlation over {correlation.count:,} complete rows, including the model's churn probability.", style={'color': '#555'}),
+        dcc.Graph(figure=fig, config={'displayModeBar': False})
+    ], style=panel_style)
+
+
+def load_correlation(engine):
     try:
-        # Select numerical features
-        numerical_cols = dataframe.select_dtypes(include=[np.number]).columns
-        numerical_data = dataframe[numerical_cols].copy()
-        
-        # Fit Isolation Forest with n_jobs=-1 for parallel processing
-        iso_forest = IsolationForest(contamination=contamination, random_state=42, n_jobs=-1)
-        outlier_predictions = iso_forest.fit_predict(numerical_data)
-        
-        # -1 = outlier, 1 = normal
-        dataframe['IsOutlier'] = outlier_predictions
-        
-        # Compute anomaly scores (use offset_tree for faster computation)
-        dataframe['OutlierScore'] = iso_forest.offset_ - iso_forest.score_samples(numerical_data)
-        
-        return dataframe
+        return engine.correlation()
     except Exception as e:
-        print(f"Error in detect_outliers: {str(e)}")
-        traceback.print_exc()
-        # Return without scores if there's an error
-        dataframe['IsOutlier'] = 1  # Mark all as normal if error
-        dataframe['OutlierScore'] = 0.0
-        return dataframe
-
-# Load data and perform outlier detection
-try:
-    DATA_PATH = os.path.join(os.path.dirname(__file__), '../data/processed-data/bank-data-processed.csv')
-    df = pd.read_csv(DATA_PATH)
-    df_with_outliers = detect_outliers(df.copy(), contamination=0.05)
-    
-    # Calculate statistics
-    total_records = len(df_with_outliers)
-    outlier_count = (df_with_outliers['IsOutlier'] == -1).sum()
-    outlier_percentage = (outlier_count / total_records) * 100
-    
-    # Get top outliers
-    top_outliers = df_with_outliers.nsmallest(10, 'OutlierScore')[['Age', 'Balance', 'CreditScore', 'Tenure', 'OutlierScore']]
-    
-    # Prepare data for anomaly score distribution
-    outlier_scores = df_with_outliers['OutlierScore'].values
-    
-    data_loaded = True
-except Exception as e:
-    print(f"Error loading data: {str(e)}")
-    traceback.print_exc()
-    # Fallback values
-    total_records = 0
-    outlier_count = 0
-    outlier_percentage = 0
-    top_outliers = pd.DataFrame()
-    outlier_scores = np.array([])
-    data_loaded = False
+        print(f"Error computing correlations: {str(e)}")
+        return None
+
+
+def create_drift_alert(report):
+    """
+    Banner shown above the KPIs when the latest snapshot crossed the drift threshold
+    """
+    if not report or not report['alerts']:
+        return None
+    return html.Div([
+        html.Strong('⚠️ Drift alert: '),
+        html.Span(f"{', '.join(report['alerts'])} in {report['source']} shifted beyond PSI {report['threshold']} "
+                  f"compared with the training data. Review the drift monitor below before relying on these figures.")
+    ], style={'backgroundColor': '#fff5f5', 'color': '#c0392b', 'padding': '15px 20px', 'borderRadius': '8px',
+              'borderLeft': '4px solid #e74c3c', 'margin': '0 20px 20px 20px'})
+
+
+def create_drift_panel(report):
+    """
+    PSI / KS per monitored column and the reference vs snapshot distribution
+    """
+    header_style = {'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}
+    cell_style = {'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}
+    panel_style = {'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'}
+
+    if report is None or not report['features']:
+        return html.Div([
+            html.H2('📉 Drift Monitor', style={'color': '#1e3a5f', 'marginBottom': '15px'}),
+            html.P('No snapshot has been checked for drift yet. Run python -m scripts.check_drift --month YYYY-MM after ingesting an extract.', style={'color': '#555'})
+        ], style=panel_style)
+
+    features = report['features']
+    return html.Div([
+        html.H2('📉 Drift Monitor', style={'color': '#1e3a5f', 'marginBottom': '5px'}),
+        html.P(f"{report['source']} ({report['rows']:,} rows, checked {report['checked_at'][:10]}) compared with {report['reference']}. "
+               f"PSI below 0.1 is stable, {report['threshold']} or more raises an alert.", style={'color': '#555'}),
+        html.Table([
+            html.Thead(html.Tr([html.Th(col, style=header_style) for col in ['Feature', 'Type', 'PSI', 'KS', 'Status']])),
+            html.Tbody([
+                html.Tr([
+                    html.Td(result['feature'], style=cell_style),
+                    html.Td(result['kind'], style=cell_style),
+                    html.Td(f"{result['psi']:.3f}", style=cell_style),
+                    html.Td(f"{result['ks']:.3f}" if result['ks'] is not None else "–", style=cell_style),
+                    html.Td(result['status'].title(), style={**cell_style, 'color': DRIFT_STATUS_COLORS[result['status']], 'fontWeight': 'bold'})
+                ]) for result in features
+            ])
+        ], style={'width': '100%', 'borderCollapse': 'collapse', 'marginTop': '15px', 'fontSize': '13px'}),
+        html.Div([
+            html.Span('Reference vs snapshot for ', style={'color': '#1e3a5f', 'fontWeight': '600'}),
+            dcc.Dropdown(id='drift-feature', options=[result['feature'] for result in features],
+                         value=features[0]['feature'], clearable=False, style={'width': '260px'}),
+        ], style={'display': 'flex', 'alignItems': 'center', 'gap': '10px', 'marginTop': '25px'}),
+        dcc.Graph(id='drift-distribution', config={'displayModeBar': False})
+    ], style=panel_style)
+
 
 layout = html.Div([
-    html.Link(rel="stylesheet", href="/assets/data_overview.css"),
-    html.Link(rel="stylesheet", href="/assets/techniques_info.css"),
-    
     # Techniques Info Card
     create_techniques_info_card(),
     
@@ -77,132 +156,252 @@ layout = html.Div([
         html.H1("📊 Data Overview & Outlier Detection", style={'textAlign': 'center', 'color': '#1e3a5f', 'marginBottom': '30px'}),
     ], style={'padding': '20px'}),
     
-    # KPI Cards
-    html.Div([
+    # Drift alert, KPIs, data quality and outlier charts for the selected dataset
+    html.Div(id='data-overview-content'),
+])
+
+
+def load_overview(engine):
+    """
+    Outlier statistics of a dataset, zeros when its data cannot be loaded
+    """
+    try:
+        outliers = engine.outliers()
+        total_records = outliers['total_records']
+        outlier_count = outliers['outlier_count']
+        outlier_percentage = (outlier_count / total_records) * 100
+        return total_records, outlier_count, outlier_percentage, outliers['top_outliers'], outliers['histogram'], True
+    except Exception as e:
+        print(f"Error loading data: {str(e)}")
+        traceback.print_exc()
+        return 0, 0, 0, pd.DataFrame(), anomaly_histogram([]), False
+
+
+def overview_content(engine):
+    total_records, outlier_count, outlier_percentage, top_outliers, score_histogram, data_loaded = load_overview(engine)
+    # Column profile built offline (snapshot or scripts/build_profile.py), or sketched from a regional dataset
+    data_profile = engine.profile() if data_loaded else None
+    # Latest drift check written by scripts/check_drift.py, picked up without a restart
+    drift_report = load_latest_report()
+    return [
+        # Drift alert (only when the latest snapshot crossed the threshold)
+        create_drift_alert(drift_report),
+    
+        # KPI Cards
         html.Div([
-            html.H3("Total Records", style={'color': '#4f9fd8', 'fontSize': '14px'}),
-            html.H2(f"{total_records:,}", style={'color': '#1e3a5f', 'fontSize': '32px', 'margin': '10px 0'})
-        ], style={'backgroundColor': '#f0f7ff', 'padding': '20px', 'borderRadius': '8px', 'border': 'left 4px solid #4f9fd8'}),
+            html.Div([
+                html.H3("Total Records", style={'color': '#4f9fd8', 'fontSize': '14px'}),
+                html.H2(f"{total_records:,}", style={'color': '#1e3a5f', 'fontSize': '32px', 'margin': '10px 0'})
+            ], style={'backgroundColor': '#f0f7ff', 'padding': '20px', 'borderRadius': '8px', 'border': 'left 4px solid #4f9fd8'}),
         
-        html.Div([
-            html.H3("Outliers Detected", style={'color': '#e74c3c', 'fontSize': '14px'}),
-            html.H2(f"{outlier_count}", style={'color': '#c0392b', 'fontSize': '32px', 'margin': '10px 0'})
-        ], style={'backgroundColor': '#fff5f5', 'padding': '20px', 'borderRadius': '8px', 'border': 'left 4px solid #e74c3c'}),
+            html.Div([
+                html.H3("Outliers Detected", style={'color': '#e74c3c', 'fontSize': '14px'}),
+                html.H2(f"{outlier_count}", style={'color': '#c0392b', 'fontSize': '32px', 'margin': '10px 0'})
+            ], style={'backgroundColor': '#fff5f5', 'padding': '20px', 'borderRadius': '8px', 'border': 'left 4px solid #e74c3c'}),
         
-        html.Div([
-            html.H3("Outlier Percentage", style={'color': '#f39c12', 'fontSize': '14px'}),
-            html.H2(f"{outlier_percentage:.2f}%", style={'color': '#d68910', 'fontSize': '32px', 'margin': '10px 0'})
-        ], style={'backgroundColor': '#fffaf0', 'padding': '20px', 'borderRadius': '8px', 'border': 'left 4px solid #f39c12'}),
+            html.Div([
+                html.H3("Outlier Percentage", style={'color': '#f39c12', 'fontSize': '14px'}),
+                html.H2(f"{outlier_percentage:.2f}%", style={'color': '#d68910', 'fontSize': '32px', 'margin': '10px 0'})
+            ], style={'backgroundColor': '#fffaf0', 'padding': '20px', 'borderRadius': '8px', 'border': 'left 4px solid #f39c12'}),
         
+            html.Div([
+                html.H3("Normal Records", style={'color': '#27ae60', 'fontSize': '14px'}),
+                html.H2(f"{total_records - outlier_count:,}", style={'color': '#1e8449', 'fontSize': '32px', 'margin': '10px 0'})
+            ], style={'backgroundColor': '#f0fdf4', 'padding': '20px', 'borderRadius': '8px', 'border': 'left 4px solid #27ae60'})
+        ], style={'display': 'grid', 'gridTemplateColumns': 'repeat(auto-fit, minmax(200px, 1fr))', 'gap': '16px', 'margin': '20px', 'marginBottom': '40px'}),
+    
+        # Data Quality (from the column sketches, no raw rows needed)
+        create_quality_panel(data_profile),
+    
+        # Feature Correlations (streamed covariance, cached per data version)
+        create_correlation_panel(load_correlation(engine) if data_loaded else None),
+    
+        # Drift Monitor (latest snapshot vs training data)
+        create_drift_panel(drift_report),
+    
+    ] + ([] if not data_loaded else [
+        # Charts and tables only show if data loaded
         html.Div([
-            html.H3("Normal Records", style={'color': '#27ae60', 'fontSize': '14px'}),
-            html.H2(f"{total_records - outlier_count:,}", style={'color': '#1e8449', 'fontSize': '32px', 'margin': '10px 0'})
-        ], style={'backgroundColor': '#f0fdf4', 'padding': '20px', 'borderRadius': '8px', 'border': 'left 4px solid #27ae60'})
-    ], style={'display': 'grid', 'gridTemplateColumns': 'repeat(auto-fit, minmax(200px, 1fr))', 'gap': '16px', 'margin': '20px', 'marginBottom': '40px'}),
+            # Anomaly Score Distribution
+            html.Div([
+                dcc.Graph(
+                    id='anomaly-distribution',
+                    figure={
+                        'data': [
+                            # Bins are counted up front so the page never ships every score
+                            go.Bar(
+                                x=[(low + high) / 2 for low, high in zip(score_histogram['edges'][:-1], score_histogram['edges'][1:])],
+                                y=score_histogram['counts'],
+                                width=[high - low for low, high in zip(score_histogram['edges'][:-1], score_histogram['edges'][1:])],
+                                name='Anomaly Scores',
+                                marker=dict(color='#4f9fd8'),
+                                opacity=0.7
+                            )
+                        ],
+                        'layout': go.Layout(
+                            title='Distribution of Anomaly Scores',
+                            xaxis_title='Anomaly Score (Lower = More Anomalous)',
+                            yaxis_title='Frequency',
+                            hovermode='x unified',
+                            plot_bgcolor='#f8f9fb',
+                            paper_bgcolor='white',
+                            font=dict(color='#1e3a5f')
+                        )
+                    }
+                )
+            ], style={'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'})
+        ]),
     
-] + ([] if not data_loaded else [
-    # Charts and tables only show if data loaded
-    html.Div([
-        # Anomaly Score Distribution
+        # Outlier vs Normal Distribution
         html.Div([
             dcc.Graph(
-                id='anomaly-distribution',
+                id='outlier-pie',
                 figure={
                     'data': [
-                        go.Histogram(
-                            x=outlier_scores if len(outlier_scores) > 0 else [0],
-                            nbinsx=50,
-                            name='Anomaly Scores',
-                            marker=dict(color='#4f9fd8'),
-                            opacity=0.7
+                        go.Pie(
+                            labels=['Normal', 'Outliers'],
+                            values=[max(0, total_records - outlier_count), outlier_count],
+                            marker=dict(colors=['#27ae60', '#e74c3c']),
+                            textposition='inside',
+                            textinfo='label+percent'
                         )
                     ],
                     'layout': go.Layout(
-                        title='Distribution of Anomaly Scores',
-                        xaxis_title='Anomaly Score (Lower = More Anomalous)',
-                        yaxis_title='Frequency',
-                        hovermode='x unified',
+                        title='Data Distribution: Normal vs Outliers',
                         plot_bgcolor='#f8f9fb',
                         paper_bgcolor='white',
-                        font=dict(color='#1e3a5f')
+                        font=dict(color='#1e3a5f'),
+                        height=400
                     )
                 }
             )
-        ], style={'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'})
-    ]),
-    
-    # Outlier vs Normal Distribution
-    html.Div([
-        dcc.Graph(
-            id='outlier-pie',
-            figure={
-                'data': [
-                    go.Pie(
-                        labels=['Normal', 'Outliers'],
-                        values=[max(0, total_records - outlier_count), outlier_count],
-                        marker=dict(colors=['#27ae60', '#e74c3c']),
-                        textposition='inside',
-                        textinfo='label+percent'
-                    )
-                ],
-                'layout': go.Layout(
-                    title='Data Distribution: Normal vs Outliers',
-                    plot_bgcolor='#f8f9fb',
-                    paper_bgcolor='white',
-                    font=dict(color='#1e3a5f'),
-                    height=400
-                )
-            }
-        )
-    ], style={'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'}),
+        ], style={'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'}),
     
-    # Top Outliers Table
-    html.Div([
-        html.H2('🔍 Top 10 Detected Outliers', style={'color': '#1e3a5f', 'marginBottom': '15px'}),
-        html.Table([
-            html.Thead(
-                html.Tr([
-                    html.Th('Age', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}),
-                    html.Th('Balance', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}),
-                    html.Th('Credit Score', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}),
-                    html.Th('Tenure', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}),
-                    html.Th('Anomaly Score', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'})
+        # Top Outliers Table
+        html.Div([
+            html.H2('🔍 Top 10 Detected Outliers', style={'color': '#1e3a5f', 'marginBottom': '15px'}),
+            html.Table([
+                html.Thead(
+                    html.Tr([
+                        html.Th('Age', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}),
+                        html.Th('Balance', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}),
+                        html.Th('Credit Score', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}),
+                        html.Th('Tenure', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'}),
+                        html.Th('Anomaly Score', style={'padding': '10px', 'backgroundColor': '#1e3a5f', 'color': 'white', 'textAlign': 'left'})
+                    ])
+                ),
+                html.Tbody([
+                    html.Tr([
+                        html.Td(f"{row['Age']:.0f}", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}),
+                        html.Td(f"${row['Balance']:,.0f}", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}),
+                        html.Td(f"{row['CreditScore']:.0f}", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}),
+                        html.Td(f"{row['Tenure']:.0f} yrs", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}),
+                        html.Td(f"{row['OutlierScore']:.4f}", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb', 'color': '#e74c3c', 'fontWeight': 'bold'})
+                    ]) for _, row in top_outliers.iterrows()
                 ])
-            ),
-            html.Tbody([
-                html.Tr([
-                    html.Td(f"{row['Age']:.0f}", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}),
-                    html.Td(f"${row['Balance']:,.0f}", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}),
-                    html.Td(f"{row['CreditScore']:.0f}", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}),
-                    html.Td(f"{row['Tenure']:.0f} yrs", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb'}),
-                    html.Td(f"{row['OutlierScore']:.4f}", style={'padding': '10px', 'borderBottom': '1px solid #e5e7eb', 'color': '#e74c3c', 'fontWeight': 'bold'})
-                ]) for _, row in top_outliers.iterrows()
-            ])
-        ], style={'width': '100%', 'borderCollapse': 'collapse', 'marginTop': '15px'})
-    ], style={'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'}),
+            ], style={'width': '100%', 'borderCollapse': 'collapse', 'marginTop': '15px'})
+        ], style={'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'}),
     
-    # Algorithm Explanation
-    html.Div([
-        html.H2('📋 About Outlier Detection', style={'color': '#1e3a5f', 'marginBottom': '15px'}),
+        # Algorithm Explanation
         html.Div([
-            html.H3('Algorithm Used: Isolation Forest', style={'color': '#4f9fd8'}),
-            html.P('Isolation Forest is an unsupervised learning algorithm that identifies outliers by isolating anomalies. It randomly selects a feature and then randomly selects a split value between the maximum and minimum values of the selected feature.', style={'lineHeight': '1.6', 'color': '#555'}),
+            html.H2('📋 About Outlier Detection', style={'color': '#1e3a5f', 'marginBottom': '15px'}),
+            html.Div([
+                html.H3('Algorithm Used: Isolation Forest', style={'color': '#4f9fd8'}),
+                html.P('Isolation Forest is an unsupervised learning algorithm that identifies outliers by isolating anomalies. It randomly selects a feature and then randomly selects a split value between the maximum and minimum values of the selected feature.', style={'lineHeight': '1.6', 'color': '#555'}),
             
-            html.H3('How It Works:', style={'color': '#4f9fd8', 'marginTop': '20px'}),
-            html.Ul([
-                html.Li('Recursively partitions the data using random thresholds', style={'marginBottom': '10px'}),
-                html.Li('Anomalies require fewer partitions to isolate than normal points', style={'marginBottom': '10px'}),
-                html.Li('Assigns anomaly scores based on isolation path length', style={'marginBottom': '10px'}),
-                html.Li('Lower scores indicate more anomalous records', style={'marginBottom': '10px'})
-            ], style={'color': '#555'}),
+                html.H3('How It Works:', style={'color': '#4f9fd8', 'marginTop': '20px'}),
+                html.Ul([
+                    html.Li('Recursively partitions the data using random thresholds', style={'marginBottom': '10px'}),
+                    html.Li('Anomalies require fewer partitions to isolate than normal points', style={'marginBottom': '10px'}),
+                    html.Li('Assigns anomaly scores based on isolation path length', style={'marginBottom': '10px'}),
+                    html.Li('Lower scores indicate more anomalous records', style={'marginBottom': '10px'})
+                ], style={'color': '#555'}),
             
-            html.H3('Advantages:', style={'color': '#4f9fd8', 'marginTop': '20px'}),
-            html.Ul([
-                html.Li('Does not require distance metrics', style={'marginBottom': '10px'}),
-                html.Li('Handles high-dimensional data well', style={'marginBottom': '10px'}),
-                html.Li('Fast and scalable', style={'marginBottom': '10px'}),
-                html.Li('No need for labeled data', style={'marginBottom': '10px'})
-            ], style={'color': '#555'})
-        ], style={'backgroundColor': '#f0f7ff', 'padding': '20px', 'borderRadius': '8px', 'borderLeft': '4px solid #4f9fd8'})
-    ], style={'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'})
-]))
\ No newline at end of file
+                html.H3('Advantages:', style={'color': '#4f9fd8', 'marginTop': '20px'}),
+                html.Ul([
+                    html.Li('Does not require distance metrics', style={'marginBottom': '10px'}),
+                    html.Li('Handles high-dimensional data well', style={'marginBottom': '10px'}),
+                    html.Li('Fast and scalable', style={'marginBottom': '10px'}),
+                    html.Li('No need for labeled data', style={'marginBottom': '10px'})
+                ], style={'color': '#555'})
+            ], style={'backgroundColor': '#f0f7ff', 'padding': '20px', 'borderRadius': '8px', 'borderLeft': '4px solid #4f9fd8'})
+        ], style={'backgroundColor': 'white', 'padding': '20px', 'borderRadius': '8px', 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)', 'margin': '20px'})
+    ])
+
+
+# Callback for the page body of the selected dataset
+@callback(
+    Output('data-overview-content', 'children'),
+    Input('data-overview-content', 'id'),
+    State('url', 'search')
+)
+def update_overview(_, search):
+    return overview_content(engine_for_search(search))
+
+
+# Callback for the per-column distribution in the data quality panel
+@callback(
+    Output('profile-distribution', 'figure'),
+    Input('profile-column', 'value'),
+    State('url', 'search')
+)
+def update_profile_distribution(column_name, search):
+    data_profile = engine_for_search(search).profile()
+    column = data_profile.get(column_name) if data_profile else None
+    if column is None:
+        return go.Figure()
+
+    if column.numeric:
+        counts, edges = column.quantiles.histogram(bins=40)
+        trace = go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=edges[1:] - edges[:-1],
+                       marker=dict(color='#4f9fd8'), opacity=0.8, name=column_name)
+        x_title = column_name
+    else:
+        top = column.frequent.top(20)
+        trace = go.Bar(x=[value for value, _ in top], y=[count for _, count in top],
+                       marker=dict(color='#4f9fd8'), opacity=0.8, name=column_name)
+        x_title = f"{column_name} (most common values)"
+
+    return {
+        'data': [trace],
+        'layout': go.Layout(
+            xaxis_title=x_title,
+            yaxis_title='Approx. Frequency',
+            plot_bgcolor='#f8f9fb',
+            paper_bgcolor='white',
+            font=dict(color='#1e3a5f'),
+            margin=dict(t=20, b=40, l=60, r=20),
+            height=350
+        )
+    }
+
+
+# Callback for the reference vs snapshot distribution in the drift monitor
+@callback(
+    Output('drift-distribution', 'figure'),
+    Input('drift-feature', 'value')
+)
+def update_drift_distribution(feature):
+    drift_report = load_latest_report()
+    result = next((item for item in drift_report['features'] if item['feature'] == feature), None) if drift_report else None
+    if result is None:
+        return go.Figure()
+
+    return {
+        'data': [
+            go.Bar(x=result['bins'], y=result['reference_share'], name='Training reference', marker=dict(color='#1e3a5f'), opacity=0.8),
+            go.Bar(x=result['bins'], y=result['snapshot_share'], name=drift_report['source'], marker=dict(color='#4f9fd8'), opacity=0.8)
+        ],
+        'layout': go.Layout(
+            barmode='group',
+            xaxis_title=feature,
+            yaxis_title='Share of Customers',
+            yaxis_tickformat='.0%',
+            plot_bgcolor='#f8f9fb',
+            paper_bgcolor='white',
+            font=dict(color='#1e3a5f'),
+            margin=dict(t=20, b=60, l=60, r=20),
+            legend=dict(orientation='h', y=1.1),
+            height=350
+        )
+    }
@@ -1,19 +1,13 @@
-from dash import html, dcc, Input, Output, callback
-import pandas as pd
+from dash import html, dcc, Input, Output, State, callback
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from components.techniques_info import create_techniques_info_card
+from utils.datasets import engine_for_search
 
-df = pd.read_csv("data/processed-data/past-data.csv")
-
-# Calculate segment statistics
-segment_counts = df['GMM_Cluster'].value_counts().reset_index()
-segment_counts.columns = ['Cluster', 'Count']
+SEGMENT_COLORS = ['#1e3a5f', '#4f9fd8', '#27ae60', '#f39c12', '#e74c3c', '#9b59b6']
 
 layout = html.Div(className="page-content", children=[
-    html.Link(rel="stylesheet", href="/assets/segmentation.css"),
-    html.Link(rel="stylesheet", href="/assets/techniques_info.css"),
-    
     # Techniques Info Card
     create_techniques_info_card(),
     
@@ -37,6 +31,19 @@ layout = html.Div(className="page-content", children=[
             dcc.Graph(id="segment-summary-graph", config={"displayModeBar": False})
         ]),
 
+        # Customer Map (2-D projection, aggregated on the server when zoomed out)
+        html.Div(className="card-group customer-map", children=[
+            html.Div(className="map-header", children=[
+                html.H3("Customer Map", className="group-title"),
+                dcc.RadioItems(id="customer-map-color", className="map-color", inline=True, value="segment",
+                               options=[{"label": "Segment", "value": "segment"},
+                                        {"label": "Churn probability", "value": "churn"}]),
+            ]),
+            dcc.Graph(id="customer-map-graph", className="map-graph",
+                      config={"displayModeBar": False, "scrollZoom": True}),
+            html.P(id="customer-map-detail", className="map-detail")
+        ]),
+
     ])
 ])
 
@@ -44,10 +51,11 @@ layout = html.Div(className="page-content", children=[
 # Callback for Churn Rate by Segment
 @callback(
     Output("churn-rate-segment", "figure"),
-    Input("churn-rate-segment", 'id')
+    Input("churn-rate-segment", 'id'),
+    State("url", "search")
 )
-def update_churn_rate(_):
-    gmm_churn_rate = df.groupby('GMM_Cluster')['Churn_Probability'].mean().reset_index()
+def update_churn_rate(_, search):
+    gmm_churn_rate = engine_for_search(search).run_query("segment_churn")
     gmm_churn_rate.columns = ['Cluster', 'Churn_Rate']
     gmm_churn_rate = gmm_churn_rate.sort_values('Churn_Rate', ascending=False)
     
@@ -70,12 +78,15 @@ def update_churn_rate(_):
 # Callback for Segment Distribution Pie Chart
 @callback(
     Output("segment-distribution-graph", "figure"),
-    Input("segment-distribution-graph", 'id')
+    Input("segment-distribution-graph", 'id'),
+    State("url", "search")
 )
-def update_segment_distribution(_):
+def update_segment_distribution(_, search):
+    segment_counts = engine_for_search(search).run_query("segment_counts")
+    segment_counts.columns = ['Cluster', 'Count']
     fig = px.pie(segment_counts, values='Count', names='Cluster',
                  title="Customer Distribution by K-Means Segment",
-                 color_discrete_sequence=['#1e3a5f', '#4f9fd8', '#27ae60', '#f39c12', '#e74c3c', '#9b59b6'])
+                 color_discrete_sequence=SEGMENT_COLORS)
     fig.update_layout(
         margin=dict(t=30, b=10, l=10, r=10),
         template="plotly_white",
@@ -88,14 +99,11 @@ def update_segment_distribution(_):
 # Callback for Segment Summary
 @callback(
     Output("segment-summary-graph", "figure"),
-    Input("segment-summary-graph", 'id')
+    Input("segment-summary-graph", 'id'),
+    State("url", "search")
 )
-def update_segment_summary(_):
-    summary_data = df.groupby('GMM_Cluster').agg({
-        'Age': 'mean',
-        'Churn_Probability': 'mean',
-        'Tenure': 'mean'
-    }).reset_index()
+def update_segment_summary(_, search):
+    summary_data = engine_for_search(search).run_query("segment_summary")
     summary_data.columns = ['Cluster', 'Avg_Age', 'Churn_Prob', 'Avg_Tenure']
     
     fig = go.Figure()
@@ -117,4 +125,100 @@ def update_segment_summary(_):
         paper_bgcolor='white',
         barmode='group'
     )
-    return fig
\ No newline at end of file
+    return fig
+
+def axis_range(relayout, axis):
+    """
+    (low, high) an event zoomed one axis to, None when the event left it alone or reset it
+    """
+    if relayout.get(f'{axis}.autorange'):
+        return None
+    if f'{axis}.range' in relayout:
+        low, high = relayout[f'{axis}.range']
+    elif f'{axis}.range[0]' in relayout and f'{axis}.range[1]' in relayout:
+        low, high = relayout[f'{axis}.range[0]'], relayout[f'{axis}.range[1]']
+    else:
+        return None
+    return min(float(low), float(high)), max(float(low), float(high))
+
+
+def map_viewport(relayout, bounds):
+    """
+    Visible x/y ranges from the graph's relayoutData, None when zoomed out
+    An axis the event did not zoom (e.g. a horizontal-only drag) spans the full map bounds
+    """
+    if not relayout or relayout.get('autosize'):
+        return None
+    try:
+        x_range, y_range = axis_range(relayout, 'xaxis'), axis_range(relayout, 'yaxis')
+    except (TypeError, ValueError):
+        return None
+    if x_range is None and y_range is None:
+        return None
+    x0, x1 = x_range or bounds[:2]
+    y0, y1 = y_range or bounds[2:]
+    return x0, x1, y0, y1
+
+
+# Callback for the Customer Map: re-aggregated for every zoom and pan
+@callback(
+    Output("customer-map-graph", "figure"),
+    Output("customer-map-detail", "children"),
+    Input("customer-map-graph", "relayoutData"),
+    Input("customer-map-color", "value"),
+    State("url", "search")
+)
+def update_customer_map(relayout, color_by, search):
+    customer_map = engine_for_search(search).customer_map()
+    if customer_map is None:
+        fig = go.Figure()
+        fig.update_layout(xaxis=dict(visible=False), yaxis=dict(visible=False), template="plotly_white",
+                          annotations=[dict(text="No customer map yet - run python -m scripts.build_embedding",
+                                            showarrow=False, font=dict(size=13, color='#1e3a5f'))])
+        return fig, ""
+
+    viewport = map_viewport(relayout, customer_map.bounds)
+    view = customer_map.view(*viewport) if viewport else customer_map.view()
+    # Grid cells are sized by how many customers they hold
+    sizes = 4 + 10 * np.log1p(view.count) / np.log1p(max(view.count.max(), 1)) if view.aggregated and len(view.count) else 5
+    hover = ("Customers: %{customdata[0]:,}<br>Avg churn probability: %{customdata[1]:.1%}<extra></extra>" if view.aggregated
+             else "Churn probability: %{customdata[1]:.1%}<extra></extra>")
+    customdata = np.column_stack([view.count, np.round(view.churn, 3)])
+    # Float32 coordinates would be sent with 17 digits; 4 decimals are plenty on screen
+    x, y = np.round(view.x.astype(float), 4), np.round(view.y.astype(float), 4)
+
+    fig = go.Figure()
+    if color_by == "churn":
+        fig.add_trace(go.Scattergl(x=x, y=y, mode='markers', customdata=customdata, hovertemplate=hover,
+                                   marker=dict(size=sizes, color=customdata[:, 1], colorscale='RdYlGn_r', cmin=0, cmax=1,
+                                               opacity=0.7, colorbar=dict(title="Churn", tickformat=".0%"))))
+    else:
+        for i, segment in enumerate(customer_map.segment_ids):
+            mask = view.segment == segment
+            segment_sizes = sizes[mask] if np.ndim(sizes) else sizes
+            fig.add_trace(go.Scattergl(x=x[mask], y=y[mask], mode='markers',
+                                       name=f"Segment {segment}" if segment >= 0 else "Unknown",
+                                       customdata=customdata[mask], hovertemplate=hover,
+                                       marker=dict(size=segment_sizes, color=SEGMENT_COLORS[i % len(SEGMENT_COLORS)], opacity=0.7)))
+
+    fig.update_layout(
+        uirevision="customer-map",
+        margin=dict(t=10, b=10, l=40, r=10),
+        xaxis_title="Component 1",
+        yaxis_title="Component 2",
+        template="plotly_white",
+        plot_bgcolor='#f8f9fb',
+        paper_bgcolor='white',
+        legend=dict(orientation='h', y=1.05)
+    )
+    if viewport:
+        fig.update_xaxes(range=viewport[:2])
+        fig.update_yaxes(range=viewport[2:])
+
+    method = customer_map.meta['method'].upper()
+    if view.aggregated:
+        detail = (f"{view.total:,} customers in view ({method}), drawn as {len(view.x):,} grid cells - "
+                  f"zoom in to see individual customers")
+    else:
+        detail = f"{view.total:,} customers in view ({method})"
+    return fig, detail
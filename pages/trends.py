@@ -0,0 +1,128 @@
+from dash import html, dcc, Input, Output, callback
+import plotly.express as px
+import plotly.graph_objects as go
+from components.techniques_info import create_techniques_info_card
+from utils.snapshots import load_monthly_aggregates
+
+# Number of months shown on the trend charts
+TREND_MONTHS = 36
+
+layout = html.Div(className="page-content", children=[
+    # Techniques Info Card
+    create_techniques_info_card(),
+
+    html.Div(className="grid-container trends", children=[
+
+        # Churn Rate over time
+        html.Div(className="card trend-churn-rate", children=[
+            html.P("Churn Rate by Month"),
+            dcc.Graph(id="trend-churn-rate", config={"displayModeBar": False})
+        ]),
+
+        # Outliers over time
+        html.Div(className="card trend-outliers", children=[
+            html.P("Outliers Detected by Month (Isolation Forest)"),
+            dcc.Graph(id="trend-outliers", config={"displayModeBar": False})
+        ]),
+
+        # Segment sizes over time
+        html.Div(className="card-group trend-segments", children=[
+            html.H3("Segment Sizes by Month", className="group-title"),
+            dcc.Graph(id="trend-segment-sizes", config={"displayModeBar": False})
+        ]),
+
+    ])
+])
+
+
+def empty_figure(message):
+    fig = go.Figure()
+    fig.update_layout(
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False),
+        template="plotly_white",
+        annotations=[dict(text=message, showarrow=False, font=dict(size=13, color='#1e3a5f'))]
+    )
+    return fig
+
+
+NO_DATA_MESSAGE = "No monthly snapshots yet - run scripts/ingest_snapshot.py"
+
+
+# Callback for Churn Rate by Month
+@callback(
+    Output("trend-churn-rate", "figure"),
+    Input("trend-churn-rate", 'id')
+)
+def update_churn_trend(_):
+    trends = load_monthly_aggregates(last_n=TREND_MONTHS)
+    if trends.empty:
+        return empty_figure(NO_DATA_MESSAGE)
+
+    fig = px.line(trends, x="month", y="churn_rate", markers=True,
+                  labels={"month": "Month", "churn_rate": "Churn Rate"})
+    fig.update_traces(line_color='#e74c3c')
+    fig.update_layout(
+        yaxis_tickformat=".0%",
+        margin=dict(t=30, b=10, l=40, r=10),
+        xaxis_title=None,
+        yaxis_title="Churn Rate",
+        template="plotly_white",
+        hovermode='x unified',
+        plot_bgcolor='#f8f9fb',
+        paper_bgcolor='white'
+    )
+    return fig
+
+
+# Callback for Outliers by Month
+@callback(
+    Output("trend-outliers", "figure"),
+    Input("trend-outliers", 'id')
+)
+def update_outlier_trend(_):
+    trends = load_monthly_aggregates(last_n=TREND_MONTHS)
+    if trends.empty:
+        return empty_figure(NO_DATA_MESSAGE)
+
+    fig = px.bar(trends, x="month", y="outlier_count",
+                 labels={"month": "Month", "outlier_count": "Outliers"})
+    fig.update_traces(marker_color='#f39c12')
+    fig.update_layout(
+        margin=dict(t=30, b=10, l=40, r=10),
+        xaxis_title=None,
+        yaxis_title="Outliers",
+        template="plotly_white",
+        hovermode='x unified',
+        plot_bgcolor='#f8f9fb',
+        paper_bgcolor='white'
+    )
+    return fig
+
+
+# Callback for Segment Sizes by Month
+@callback(
+    Output("trend-segment-sizes", "figure"),
+    Input("trend-segment-sizes", 'id')
+)
+def update_segment_trend(_):
+    trends = load_monthly_aggregates(last_n=TREND_MONTHS)
+    segment_cols = [col for col in trends.columns if col.startswith("Segment ")]
+    if trends.empty or not segment_cols:
+        return empty_figure(NO_DATA_MESSAGE if trends.empty else "Snapshots have no GMM_Cluster column")
+
+    fig = go.Figure()
+    colors = ['#1e3a5f', '#4f9fd8', '#27ae60', '#f39c12', '#e74c3c', '#9b59b6']
+    for i, col in enumerate(segment_cols):
+        fig.add_trace(go.Scatter(x=trends["month"], y=trends[col], name=col, stackgroup='segments',
+                                 mode='lines', line=dict(color=colors[i % len(colors)])))
+    fig.update_layout(
+        margin=dict(t=30, b=10, l=40, r=10),
+        xaxis_title=None,
+        yaxis_title="Customers",
+        template="plotly_white",
+        hovermode='x unified',
+        plot_bgcolor='#f8f9fb',
+        paper_bgcolor='white'
+    )
+    return fig
@@ -0,0 +1,90 @@
+"""
+Compares the pandas, SQLite and DuckDB query backends across dataset sizes
+
+Synthetic datasets are made by resampling rows of the real files, then every
+query in utils.query_backend.QUERIES is timed on each backend. Setup time
+(loading the CSV, building the SQLite file or Parquet copy) is reported
+separately from query time.
+
+Usage:
+    python -m scripts.benchmark_backends --sizes 100000 1000000 5000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.data_layer import DEFAULT_CHUNKSIZE
+from utils.query_backend import BACKENDS, QUERIES, TABLE_PATHS
+
+
+def make_dataset(source_path, rows, target_path, chunksize=DEFAULT_CHUNKSIZE, seed=42):
+    """
+    Writes `rows` rows sampled with replacement from source_path, chunk by chunk
+    """
+    source = pd.read_csv(source_path)
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < rows:
+        size = min(chunksize, rows - written)
+        sample = source.iloc[rng.integers(0, len(source), size)]
+        sample.to_csv(target_path, mode='a' if written else 'w', header=not written, index=False)
+        written += size
+
+
+def time_backend(backend_class, paths, cache_dir, repeats):
+    start = time.perf_counter()
+    kwargs = {'paths': paths} if backend_class.name == 'pandas' else {'paths': paths, 'cache_dir': cache_dir}
+    backend = backend_class(**kwargs)
+    # pandas loads lazily, so touch every table as part of setup
+    if backend_class.name == 'pandas':
+        for table in paths:
+            backend.table(table)
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for query_name in QUERIES:
+            backend.run(query_name)
+    per_pass = (time.perf_counter() - start) / repeats
+    return setup, per_pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard query backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000], help="rows per dataset")
+    parser.add_argument("--engines", nargs="+", default=[name for name in BACKENDS if name != 'snapshot'],
+                        help="backends to compare (the snapshot backend only serves prebuilt results)")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over all queries per backend")
+    args = parser.parse_args(argv)
+
+    available = []
+    for engine in args.engines:
+        if engine == 'duckdb':
+            try:
+                import duckdb  # noqa: F401
+            except ImportError:
+                print("duckdb is not installed, skipping it")
+                continue
+        available.append(engine)
+
+    print(f"{'Rows':>10}  {'Engine':<8}{'Setup (s)':>11}{'All queries (s)':>17}")
+    for rows in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {}
+            for table, source_path in TABLE_PATHS.items():
+                paths[table] = os.path.join(tmp, f"{table}.csv")
+                make_dataset(source_path, rows, paths[table])
+            for engine in available:
+                setup, per_pass = time_backend(BACKENDS[engine], paths, os.path.join(tmp, 'cache'), args.repeats)
+                print(f"{rows:>10,}  {engine:<8}{setup:>11.2f}{per_pass:>17.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
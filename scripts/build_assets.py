@@ -0,0 +1,199 @@
+"""
+Builds the self-contained stylesheet bundle served from assets/dist/
+
+1. Subsets the Font Awesome solid font to the icons used in app.py, pages/
+   and components/ and writes assets/vendor/fontawesome-subset.css
+2. Concatenates and minifies the vendor and dashboard stylesheets
+3. Writes fingerprinted files and assets/dist/manifest.json
+
+The Font Awesome source comes from --fontawesome-dir or the `fontawesomefree`
+package; without it the committed subset in assets/vendor/ is reused.
+Writing woff2 files needs the `brotli` package.
+
+Usage:
+    python -m scripts.build_assets
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+from utils.assets import ASSETS_DIR, DIST_DIR, MANIFEST_PATH, VENDOR_DIR, source_stylesheets
+from utils.data_layer import BASE_DIR
+
+ICON_FONT = 'fa-solid-900.subset.woff2'
+ICON_CSS = 'fontawesome-subset.css'
+ICON_PATTERN = re.compile(r"fa-solid fa-([a-z0-9-]+)")
+CODEPOINT_PATTERN = re.compile(r'\.fa-([a-z0-9-]+)::before\s*\{\s*content:\s*"\\([0-9a-f]+)"')
+URL_PATTERN = re.compile(r'url\(\s*["\']?([^"\')]+)["\']?\s*\)')
+
+ICON_CSS_TEMPLATE = """/*! Font Awesome Free subset - https://fontawesome.com License - https://fontawesome.com/license/free */
+/* Generated by scripts/build_assets.py - do not edit */
+@font-face {{
+  font-family: 'Font Awesome 6 Free';
+  font-style: normal;
+  font-weight: 900;
+  font-display: block;
+  src: url("{font}") format("woff2");
+}}
+
+.fa-solid {{
+  -moz-osx-font-smoothing: grayscale;
+  -webkit-font-smoothing: antialiased;
+  display: inline-block;
+  font-family: 'Font Awesome 6 Free';
+  font-style: normal;
+  font-variant: normal;
+  font-weight: 900;
+  line-height: 1;
+  text-rendering: auto;
+}}
+
+{rules}
+"""
+
+
+def used_icons():
+    """
+    Icon names referenced as "fa-solid fa-..." in the Python sources
+    """
+    files = [os.path.join(BASE_DIR, 'app.py')]
+    for folder in ('pages', 'components'):
+        files += glob.glob(os.path.join(BASE_DIR, folder, '*.py'))
+    icons = set()
+    for path in files:
+        with open(path, encoding='utf-8') as f:
+            icons.update(ICON_PATTERN.findall(f.read()))
+    return sorted(icons)
+
+
+def find_fontawesome_dir(explicit_dir):
+    if explicit_dir:
+        return explicit_dir
+    try:
+        import fontawesomefree
+    except ImportError:
+        return None
+    return os.path.join(os.path.dirname(fontawesomefree.__file__), 'static', 'fontawesomefree')
+
+
+def build_icon_subset(fontawesome_dir):
+    """
+    Writes the subset font and its CSS into assets/vendor/
+    """
+    from fontTools import subset
+
+    with open(os.path.join(fontawesome_dir, 'css', 'all.css'), encoding='utf-8') as f:
+        codepoints = dict(CODEPOINT_PATTERN.findall(f.read()))
+
+    icons = used_icons()
+    missing = [icon for icon in icons if icon not in codepoints]
+    if missing:
+        raise ValueError(f"Unknown Font Awesome icons: {', '.join(missing)}")
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    font = subset.load_font(os.path.join(fontawesome_dir, 'webfonts', 'fa-solid-900.ttf'), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=[int(codepoints[icon], 16) for icon in icons])
+    subsetter.subset(font)
+    subset.save_font(font, os.path.join(VENDOR_DIR, ICON_FONT), options)
+
+    rules = "\n".join(f'.fa-{icon}::before {{\n  content: "\\{codepoints[icon]}";\n}}\n' for icon in icons)
+    with open(os.path.join(VENDOR_DIR, ICON_CSS), 'w', encoding='utf-8') as f:
+        f.write(ICON_CSS_TEMPLATE.format(font=ICON_FONT, rules=rules))
+    return icons
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def minify_css(css):
+    # Keep /*! license */ comments, drop the rest
+    css = re.sub(r"/\*(?!!).*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def copy_referenced_files(css, source_dir, written):
+    """
+    Copies local url() targets into dist/ under fingerprinted names and rewrites the CSS
+    Remote URLs are rejected so the bundle never depends on another host
+    """
+    def replace(match):
+        target = match.group(1).strip()
+        if target.startswith('data:'):
+            return match.group(0)
+        if re.match(r"^(https?:)?//", target):
+            raise ValueError(f"Remote URL in stylesheet: {target}")
+        path = os.path.normpath(os.path.join(source_dir, target.split('?')[0].split('#')[0]))
+        with open(path, 'rb') as f:
+            data = f.read()
+        name, extension = os.path.splitext(os.path.basename(path))
+        fingerprinted = f"{name}.{fingerprint(data)}{extension}"
+        with open(os.path.join(DIST_DIR, fingerprinted), 'wb') as f:
+            f.write(data)
+        written.append(fingerprinted)
+        return f'url("{fingerprinted}")'
+
+    return URL_PATTERN.sub(replace, css)
+
+
+def build_bundle():
+    """
+    Bundles every stylesheet into assets/dist/ and writes the manifest
+    """
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+
+    written = []
+    parts = []
+    sources = source_stylesheets()
+    for name in sources:
+        path = os.path.join(ASSETS_DIR, name)
+        with open(path, encoding='utf-8') as f:
+            css = f.read()
+        if re.search(r"@import\s", css):
+            raise ValueError(f"@import is not supported in bundled stylesheets ({name})")
+        parts.append(copy_referenced_files(css, os.path.dirname(path), written))
+
+    bundle = minify_css("\n".join(parts)).encode('utf-8')
+    bundle_name = f"bundle.{fingerprint(bundle)}.min.css"
+    with open(os.path.join(DIST_DIR, bundle_name), 'wb') as f:
+        f.write(bundle)
+
+    manifest = {"css": bundle_name, "files": written, "sources": sources}
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest, len(bundle)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the local, fingerprinted stylesheet bundle")
+    parser.add_argument("--fontawesome-dir", help="Font Awesome Free directory containing css/ and webfonts/")
+    args = parser.parse_args(argv)
+
+    fontawesome_dir = find_fontawesome_dir(args.fontawesome_dir)
+    if fontawesome_dir:
+        icons = build_icon_subset(fontawesome_dir)
+        print(f"Icon font subset to {len(icons)} icons: {', '.join(icons)}")
+    else:
+        print("Font Awesome source not found, reusing the committed icon subset")
+
+    manifest, size = build_bundle()
+    print(f"Wrote assets/dist/{manifest['css']} ({size / 1024:.1f} KB) from {len(manifest['sources'])} stylesheets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
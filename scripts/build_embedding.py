@@ -0,0 +1,38 @@
+"""
+Computes the 2-D customer map shown on the segmentation page
+
+Usage:
+    python -m scripts.build_embedding
+    python -m scripts.build_embedding --method umap   # needs umap-learn
+"""
+
+import argparse
+import sys
+import time
+
+from utils.data_layer import DEFAULT_CHUNKSIZE, PAST_DATA_PATH
+from utils.embedding import EMBEDDING_DIR, METHODS, build_embedding
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Project customers to 2-D for the segmentation map")
+    parser.add_argument("--data", default=PAST_DATA_PATH, help="customer file with GMM_Cluster (and Churn_Probability)")
+    parser.add_argument("--out", default=EMBEDDING_DIR, help="output directory")
+    parser.add_argument("--method", choices=METHODS, default="pca", help="projection to use")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per batch")
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    try:
+        meta = build_embedding(args.data, args.out, method=args.method, chunksize=args.chunksize)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Projected {meta['rows']:,} customers with {meta['method']} in {time.time() - start:.1f}s -> {args.out}")
+    if "explained_variance_ratio" in meta:
+        print(f"Explained variance: {sum(meta['explained_variance_ratio']):.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+"""
+Precomputes per-customer churn explanations for the dashboard
+
+Usage:
+    python -m scripts.build_explanations --jobs 8
+"""
+
+import argparse
+import sys
+import time
+
+from utils.data_layer import BANK_DATA_PATH, MODEL_PATH
+from utils.explanations import DEFAULT_BATCH_SIZE, EXPLANATION_DIR, build_explanation_store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute XGBoost feature contributions for every customer")
+    parser.add_argument("--data", default=BANK_DATA_PATH, help="customer file to explain")
+    parser.add_argument("--model", default=MODEL_PATH, help="pickled XGBoost model")
+    parser.add_argument("--out", default=EXPLANATION_DIR, help="output directory")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per parallel batch")
+    parser.add_argument("--jobs", type=int, default=-1, help="worker processes (-1 = all cores)")
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    meta = build_explanation_store(args.data, args.model, args.out, batch_size=args.batch_size, n_jobs=args.jobs)
+    print(f"Explained {meta['rows']:,} customers in {time.time() - start:.1f}s -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Precomputes every dashboard artifact into a versioned snapshot
+
+Runs the query aggregates, outlier scoring, the column profile, cohort
+insights, feature correlations, the explanation store and the customer map
+once, the independent stages in parallel, and publishes the
+result under data/builds/<data version>/ (or $DASHBOARD_BUILDS_DIR) with a
+manifest. The app serves the current snapshot as long as the data files it
+was built from are unchanged. Stages left out with --stages or --skip keep
+the outputs of the current build of the same data.
+
+Usage:
+    python -m scripts.build_snapshot
+    python -m scripts.build_snapshot --jobs 4 --skip customer_map
+"""
+
+import argparse
+import sys
+import time
+
+from utils.app_snapshot import BUILDS_DIR, STAGES, build_snapshot
+
+
+def print_stage(name, result):
+    if result["status"] == "ok":
+        print(f"  {name:<14} {result['seconds']:>7.1f}s  {len(result['files'])} file(s)")
+    else:
+        print(f"  {name:<14} {result['seconds']:>7.1f}s  FAILED: {result['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the precomputed snapshot the dashboard serves")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), help="stages to run (default: all)")
+    parser.add_argument("--skip", nargs="+", choices=list(STAGES), default=[], help="stages to leave out")
+    parser.add_argument("--jobs", type=int, default=-1, help="stages run at once (-1 = all cores)")
+    args = parser.parse_args(argv)
+
+    stages = [name for name in (args.stages or STAGES) if name not in args.skip]
+    if not stages:
+        parser.error("no stages left to run")
+
+    start = time.time()
+    print(f"Building snapshot ({', '.join(stages)})")
+    try:
+        manifest = build_snapshot(stages, builds_dir=BUILDS_DIR, n_jobs=args.jobs, progress=print_stage)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    failed = [name for name, result in manifest["stages"].items() if result["status"] != "ok"]
+    rows = f"{manifest['rows']:,} customers, " if manifest["rows"] is not None else ""
+    print(f"Snapshot {manifest['version']} ({rows}{time.time() - start:.1f}s) -> {BUILDS_DIR}")
+    missing = [name for name in STAGES if name not in manifest["stages"]]
+    if missing:
+        print(f"Not in this snapshot (no earlier build of this data to keep them from): {', '.join(missing)}")
+    if failed:
+        print(f"The app computes {', '.join(failed)} live until a rebuild succeeds")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Checks a new extract for feature and score drift against the training data
+
+The training reference is binned once (data/cache/drift/reference.json) and
+rebuilt only when the training file or model changes. The report is shown on
+the Data Overview page. The exit code is 2 when any column crosses the PSI
+threshold, so a scheduler can raise the alert.
+
+Usage:
+    python -m scripts.check_drift --month 2024-03
+    python -m scripts.check_drift data/processed-data/past-data.csv --threshold 0.25
+"""
+
+import argparse
+import os
+import sys
+
+from utils.data_layer import DEFAULT_CHUNKSIZE
+from utils.drift import PSI_ALERT, check_drift
+from utils.snapshots import partition_path
+
+
+def print_report(report):
+    print(f"Drift of {report['source']} ({report['rows']:,} rows) against {report['reference']}")
+    print(f"{'Feature':<20}{'PSI':>8}{'KS':>8}  Status")
+    for result in report["features"]:
+        ks = f"{result['ks']:.3f}" if result["ks"] is not None else "-"
+        print(f"{result['feature']:<20}{result['psi']:>8.3f}{ks:>8}  {result['status']}")
+    for feature in report["alerts"]:
+        print(f"ALERT: {feature} drifted (PSI above {report['threshold']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare a snapshot's distributions with the training data")
+    parser.add_argument("source", nargs="?", help="CSV or Parquet extract to check")
+    parser.add_argument("--month", help="check an ingested snapshot month (YYYY-MM) instead of a file")
+    parser.add_argument("--threshold", type=float, default=PSI_ALERT, help="PSI that raises an alert")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows read per chunk")
+    parser.add_argument("--rebuild-reference", action="store_true", help="re-bin the training data first")
+    args = parser.parse_args(argv)
+
+    if bool(args.source) == bool(args.month):
+        parser.error("give either a source file or --month")
+
+    try:
+        path = partition_path(args.month) if args.month else args.source
+        label = args.month or os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+        if not os.path.exists(path):
+            raise ValueError(f"{path} does not exist")
+        report = check_drift(path, label, threshold=args.threshold, chunksize=args.chunksize,
+                             rebuild_reference=args.rebuild_reference)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    print_report(report)
+    return 2 if report["alerts"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Ingests a monthly customer extract for the trends page
+
+Usage:
+    python -m scripts.ingest_snapshot data/processed-data/past-data.csv --month 2024-01 --check-drift
+"""
+
+import argparse
+import sys
+
+from utils.data_layer import DEFAULT_CHUNKSIZE
+from utils.snapshots import ingest_snapshot, partition_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store a monthly extract as a Parquet partition and compute its aggregates")
+    parser.add_argument("source", help="CSV or Parquet extract to ingest")
+    parser.add_argument("--month", required=True, help="snapshot month in YYYY-MM format")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows read per chunk")
+    parser.add_argument("--contamination", type=float, default=0.05, help="expected share of outliers")
+    parser.add_argument("--check-drift", action="store_true", help="compare the month with the training data afterwards")
+    args = parser.parse_args(argv)
+
+    try:
+        record = ingest_snapshot(args.source, args.month, chunksize=args.chunksize, contamination=args.contamination)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(f"Ingested {record['total_customers']:,} customers for {record['month']}")
+    if record['churn_rate'] is not None:
+        print(f"Churn rate: {record['churn_rate']:.2%}, outliers: {record['outlier_count']:,}")
+
+    if args.check_drift:
+        from scripts.check_drift import print_report
+        from utils.drift import check_drift
+        report = check_drift(partition_path(record['month']), record['month'], chunksize=args.chunksize)
+        print_report(report)
+        if report["alerts"]:
+            return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+Load-tests the dashboard with simulated concurrent users
+
+Each simulated user opens a page the way the browser does (page HTML,
+/_dash-layout, /_dash-dependencies, then the callbacks the page fires, sent
+concurrently, then the callbacks their responses trigger), and then keeps navigating between pages with a short think
+time in between. The report gives throughput, latency percentiles per
+request type and error rates per callback.
+
+A target is either the URL of a running server or a checkout directory,
+which is started with gunicorn on a free local port. Two targets are run one
+after the other with the same scenario and compared side by side.
+
+Needs aiohttp (pip install aiohttp).
+
+Usage:
+    python -m scripts.load_test http://127.0.0.1:8050 --users 20 --duration 60
+    python -m scripts.load_test . ../bank-analysis-webapp-main --users 50 --workers 1 --threads 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from utils.dash_session import (UPDATE_URL, callback_name, chained_callbacks, location_callbacks, merge_response,
+                                page_callbacks, page_values, url_search)
+
+DEFAULT_PAGES = ["/", "/segmentation", "/data_overview"]
+PERCENTILES = [50, 90, 95, 99]
+
+
+class Recorder:
+    """
+    Latency and outcome of every request, grouped by request name
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.page_views = 0
+        self.started = None
+        self.finished = None
+
+    def add(self, name, seconds, ok):
+        self.latencies[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self):
+        elapsed = max(self.finished - self.started, 1e-9)
+        all_latencies = np.concatenate([np.asarray(values) for values in self.latencies.values()]) \
+            if self.latencies else np.array([])
+        requests = len(all_latencies)
+        errors = sum(self.errors.values())
+        summary = {
+            "duration": elapsed,
+            "requests": requests,
+            "errors": errors,
+            "error_rate": errors / requests if requests else 0.0,
+            "requests_per_second": requests / elapsed,
+            "page_views_per_second": self.page_views / elapsed,
+            "latency_ms": percentiles_ms(all_latencies),
+            "endpoints": {},
+        }
+        for name, values in sorted(self.latencies.items()):
+            summary["endpoints"][name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "error_rate": self.errors[name] / len(values),
+                "latency_ms": percentiles_ms(np.asarray(values)),
+            }
+        return summary
+
+
+def percentiles_ms(values):
+    if len(values) == 0:
+        return {f"p{p}": None for p in PERCENTILES}
+    result = {f"p{p}": float(np.percentile(values, p) * 1000) for p in PERCENTILES}
+    result["max"] = float(values.max() * 1000)
+    return result
+
+
+async def timed(session, recorder, name, method, url, body=None, timeout=30):
+    """
+    Sends one request and records it; returns the decoded JSON body (or None)
+    """
+    import aiohttp
+    start = time.perf_counter()
+    for attempt in range(2):
+        try:
+            async with session.request(method, url, json=body, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                data = await response.read()
+                ok = response.status < 400
+            break
+        except (aiohttp.ServerDisconnectedError, aiohttp.ClientOSError):
+            # The server closed an idle keep-alive connection; browsers retry these once too
+            if attempt == 0:
+                continue
+            recorder.add(name, time.perf_counter() - start, False)
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            recorder.add(name, time.perf_counter() - start, False)
+            return None
+    recorder.add(name, time.perf_counter() - start, ok)
+    if not ok or response.content_type != "application/json":
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+async def open_page(session, recorder, base_url, dependencies, pathname):
+    """
+    Fires the URL callbacks, then every callback of the rendered page at once, then
+    the callbacks those responses trigger (e.g. dropdowns rendered by a callback), round by round
+    """
+    page_content = None
+    for payload in location_callbacks(dependencies, pathname):
+        body = await timed(session, recorder, callback_name(payload), "POST", base_url + UPDATE_URL, payload)
+        response = (body or {}).get("response", {})
+        if "page-content" in response:
+            page_content = response["page-content"]["children"]
+    if page_content is not None:
+        values = page_values(page_content, url_search(pathname))
+        payloads = page_callbacks(dependencies, page_content, url_search(pathname))
+        fired = {payload["output"] for payload in payloads}
+        while payloads:
+            bodies = await asyncio.gather(*[
+                timed(session, recorder, callback_name(payload), "POST", base_url + UPDATE_URL, payload)
+                for payload in payloads
+            ])
+            changed = set()
+            for body in bodies:
+                changed |= merge_response(values, body)
+            payloads = chained_callbacks(dependencies, values, changed, fired)
+    recorder.page_views += 1
+
+
+async def simulate_user(base_url, recorder, pages, deadline, think_time, rng):
+    """
+    One user: a full page load, then in-app navigation until the deadline
+    """
+    import aiohttp
+    # Browsers open at most 6 connections per host
+    connector = aiohttp.TCPConnector(limit_per_host=6)
+    async with aiohttp.ClientSession(connector=connector, headers={"Accept-Encoding": "gzip, br"}) as session:
+        pathname = rng.choice(pages)
+        await timed(session, recorder, "GET page", "GET", base_url + pathname)
+        await timed(session, recorder, "GET /_dash-layout", "GET", base_url + "/_dash-layout")
+        dependencies = await timed(session, recorder, "GET /_dash-dependencies", "GET",
+                                   base_url + "/_dash-dependencies")
+        if dependencies is None:
+            return
+        await open_page(session, recorder, base_url, dependencies, pathname)
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(rng.expovariate(1 / think_time) if think_time > 0 else 0)
+            if time.perf_counter() >= deadline:
+                break
+            pathname = rng.choice([page for page in pages if page != pathname] or pages)
+            await open_page(session, recorder, base_url, dependencies, pathname)
+
+
+async def run_load(base_url, users, duration, ramp_up, think_time, pages, seed):
+    recorder = Recorder()
+    recorder.started = time.perf_counter()
+    deadline = recorder.started + duration
+
+    async def delayed_user(index):
+        # Users arrive evenly over the ramp-up period
+        await asyncio.sleep(ramp_up * index / max(users, 1))
+        await simulate_user(base_url, recorder, pages, deadline, think_time, random.Random(seed + index))
+
+    await asyncio.gather(*[delayed_user(index) for index in range(users)])
+    recorder.finished = time.perf_counter()
+    return recorder.summary()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(directory, workers, threads, startup_timeout=120):
+    """
+    Starts app.py from directory with gunicorn and waits until it answers
+    """
+    import urllib.request
+    port = free_port()
+    command = [sys.executable, "-m", "gunicorn", "app:server", "--bind", f"127.0.0.1:{port}",
+               "--workers", str(workers), "--threads", str(threads), "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=os.path.abspath(directory))
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server in {directory} exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(url + "/_dash-layout", timeout=5)
+            return process, url
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Server in {directory} did not start within {startup_timeout}s")
+
+
+def run_target(target, args):
+    process = None
+    if os.path.isdir(target):
+        process, url = start_server(target, args.workers, args.threads)
+        print(f"Started {target} at {url} ({args.workers} worker(s) x {args.threads} threads)")
+    else:
+        url = target.rstrip("/")
+    try:
+        # Warm-up visit so one-off start-up work (imports, caches) is not measured
+        asyncio.run(run_load(url, 1, 0, 0, 0, args.pages, args.seed))
+        return asyncio.run(run_load(url, args.users, args.duration, args.ramp_up, args.think_time,
+                                    args.pages, args.seed))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+def format_ms(value):
+    return f"{value:,.0f}" if value is not None else "-"
+
+
+def print_summary(name, summary):
+    latency = summary["latency_ms"]
+    print(f"\n{name}")
+    print(f"  {summary['requests']:,} requests in {summary['duration']:.1f}s: "
+          f"{summary['requests_per_second']:.1f} req/s, {summary['page_views_per_second']:.2f} page views/s, "
+          f"{summary['error_rate']:.2%} errors")
+    print(f"  latency ms: p50 {format_ms(latency['p50'])}  p90 {format_ms(latency['p90'])}  "
+          f"p95 {format_ms(latency['p95'])}  p99 {format_ms(latency['p99'])}  max {format_ms(latency.get('max'))}")
+    print(f"  {'Request':<48}{'Count':>7}{'Errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, stats in summary["endpoints"].items():
+        print(f"  {endpoint[:47]:<48}{stats['requests']:>7}{stats['error_rate']:>8.1%}"
+              f"{format_ms(stats['latency_ms']['p50']):>9}{format_ms(stats['latency_ms']['p95']):>9}"
+              f"{format_ms(stats['latency_ms']['p99']):>9}")
+
+
+def change(before, after):
+    if before in (None, 0) or after is None:
+        return "-"
+    return f"{(after - before) / before:+.1%}"
+
+
+def print_comparison(names, summaries):
+    a, b = summaries
+    print(f"\nComparison: A = {names[0]}, B = {names[1]}")
+    print(f"  {'Metric':<48}{'A':>10}{'B':>10}{'Change':>10}")
+    rows = [
+        ("requests/s", a["requests_per_second"], b["requests_per_second"], ".1f"),
+        ("page views/s", a["page_views_per_second"], b["page_views_per_second"], ".2f"),
+        ("error rate", a["error_rate"], b["error_rate"], ".2%"),
+    ]
+    rows += [(f"latency {p} ms", a["latency_ms"][p], b["latency_ms"][p], ",.0f") for p in ("p50", "p95", "p99")]
+    for endpoint in sorted(set(a["endpoints"]) & set(b["endpoints"])):
+        rows.append((f"{endpoint[:38]} p95 ms", a["endpoints"][endpoint]["latency_ms"]["p95"],
+                     b["endpoints"][endpoint]["latency_ms"]["p95"], ",.0f"))
+    for label, before, after, fmt in rows:
+        print(f"  {label:<48}{format(before, fmt):>10}{format(after, fmt):>10}{change(before, after):>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard users")
+    parser.add_argument("targets", nargs="+", help="server URL or checkout directory (two targets are compared)")
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds each run lasts")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds over which users arrive")
+    parser.add_argument("--think-time", type=float, default=2, help="mean pause between page views in seconds")
+    parser.add_argument("--pages", nargs="+", default=DEFAULT_PAGES, help="pages users navigate between, e.g. /segmentation?dataset=germany")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers when starting a checkout")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker when starting a checkout")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the navigation sequence")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    if len(args.targets) > 2:
+        parser.error("give one target, or two to compare")
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        print("The load test needs aiohttp (pip install aiohttp)")
+        return 1
+
+    summaries = []
+    for target in args.targets:
+        try:
+            summary = run_target(target, args)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            return 1
+        print_summary(target, summary)
+        summaries.append(summary)
+    if len(summaries) == 2:
+        print_comparison(args.targets, summaries)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(zip(args.targets, summaries)), f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
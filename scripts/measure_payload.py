@@ -0,0 +1,137 @@
+"""
+Reports the bytes on the wire for each dashboard page
+
+Replays a first visit and a repeat visit (with the ETags from the first one)
+for every page and prints transferred vs uncompressed sizes.
+
+Usage:
+    python -m scripts.measure_payload                          # in-process test client
+    python -m scripts.measure_payload --url http://127.0.0.1:8050
+"""
+
+import argparse
+import gzip
+import json
+import sys
+
+from utils.dash_session import (PAGES, UPDATE_URL, chained_callbacks, location_callbacks, merge_response,
+                                page_callbacks, page_values, url_search)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class InProcessClient:
+    """
+    Sends requests to app.py's Flask server without opening a socket
+    """
+
+    def __init__(self):
+        from app import server
+        self.client = server.test_client()
+
+    def request(self, method, path, headers, body=None):
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.headers, response.get_data()
+
+
+class HttpClient:
+    """
+    Sends requests to a running server and reads the undecoded body
+    """
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def request(self, method, path, headers, body=None):
+        response = self.session.request(method, self.base_url + path, headers=headers, json=body, stream=True)
+        data = response.raw.read(decode_content=False)
+        return response.status_code, response.headers, data
+
+
+def decode_body(headers, data):
+    encoding = headers.get("Content-Encoding")
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return data
+
+
+def visit_page(client, pathname, accept_encoding, etags):
+    """
+    Replays one page visit, returning (requests, wire_bytes, raw_bytes, not_modified)
+    """
+    stats = {"requests": 0, "wire": 0, "raw": 0, "not_modified": 0}
+
+    def send(method, path, body=None):
+        headers = {"Accept-Encoding": accept_encoding}
+        if method == "GET" and path in etags:
+            headers["If-None-Match"] = etags[path]
+        status, response_headers, data = client.request(method, path, headers, body)
+        decoded = decode_body(response_headers, data)
+        stats["requests"] += 1
+        stats["wire"] += len(data)
+        stats["raw"] += len(decoded)
+        if status == 304:
+            stats["not_modified"] += 1
+        elif method == "GET" and response_headers.get("ETag"):
+            etags[path] = response_headers["ETag"]
+        return status, decoded
+
+    send("GET", pathname)
+    send("GET", "/_dash-layout")
+    status, dependencies = send("GET", "/_dash-dependencies")
+    if status == 304:
+        dependencies = etags["_dependencies_body"]
+    else:
+        etags["_dependencies_body"] = dependencies
+    dependencies = json.loads(dependencies)
+
+    page_content = None
+    for payload in location_callbacks(dependencies, pathname):
+        _, body = send("POST", UPDATE_URL, payload)
+        response = json.loads(body).get("response", {})
+        if "page-content" in response:
+            page_content = response["page-content"]["children"]
+
+    if page_content is not None:
+        values = page_values(page_content, url_search(pathname))
+        payloads = page_callbacks(dependencies, page_content, url_search(pathname))
+        fired = {payload["output"] for payload in payloads}
+        while payloads:
+            changed = set()
+            for payload in payloads:
+                _, body = send("POST", UPDATE_URL, payload)
+                changed |= merge_response(values, json.loads(body) if body else None)
+            payloads = chained_callbacks(dependencies, values, changed, fired)
+    return stats
+
+
+def format_kb(size):
+    return f"{size / 1024:,.1f} KB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure bytes-on-wire per dashboard page")
+    parser.add_argument("--url", help="base URL of a running server (default: in-process test client)")
+    parser.add_argument("--encoding", default="br, gzip", help="Accept-Encoding header to send")
+    args = parser.parse_args(argv)
+
+    client = HttpClient(args.url) if args.url else InProcessClient()
+    print(f"{'Page':<16}{'Requests':>9}{'Uncompressed':>15}{'First visit':>14}{'Repeat visit':>15}{'304s':>6}")
+    for pathname in PAGES:
+        etags = {}
+        first = visit_page(client, pathname, args.encoding, etags)
+        repeat = visit_page(client, pathname, args.encoding, etags)
+        print(f"{pathname:<16}{first['requests']:>9}{format_kb(first['raw']):>15}"
+              f"{format_kb(first['wire']):>14}{format_kb(repeat['wire']):>15}{repeat['not_modified']:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Retrains the XGBoost churn model with a parallel Optuna hyperparameter search
+
+The study is stored in models/optuna/<study>.db, so rerunning the command
+after an interruption continues the same search. The refitted model is
+written as the next version (e.g. models/xgb_model_v3.pkl) together with its
+metadata, feature importances and decision rules; --promote makes it the model
+the dashboard serves (models/CURRENT) and replaces the feature_importance.csv
+and decision_rules.txt copies the dashboard and notebooks use.
+
+Usage:
+    python -m scripts.retrain_model --trials 200 --timeout 2700 --jobs -1
+"""
+
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from utils.data_layer import BANK_DATA_PATH, BASE_DIR, MODEL_DIR, MODEL_PATH, MODEL_POINTER, PROCESSED_DIR
+from utils.features import load_model
+from utils.training import (STUDY_DIR, decision_rules, default_study_name, feature_importance_frame,
+                            finished_trials, fit_final_model, load_training_data, next_model_path, search,
+                            split_data, test_auc, write_metadata)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune and retrain the churn model")
+    parser.add_argument("--data", default=BANK_DATA_PATH, help="training file with an Exited column")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="where the versioned model is written")
+    parser.add_argument("--study-dir", default=STUDY_DIR, help="where the Optuna study database lives")
+    parser.add_argument("--study-name", help="study to create or resume (default: one per data file version)")
+    parser.add_argument("--trials", type=int, default=200, help="finished trials to reach across all runs")
+    parser.add_argument("--timeout", type=int, default=45 * 60, help="search time budget in seconds")
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel trial workers (-1 = all cores)")
+    parser.add_argument("--smote", action="store_true", help="let the search try SMOTE oversampling")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--promote", action="store_true",
+                        help="serve the new model and overwrite feature_importance.csv and decision_rules.txt")
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    try:
+        features, labels = load_training_data(args.data)
+    except (OSError, KeyError) as e:
+        print(f"Could not load training data: {e}")
+        return 1
+    X_train, X_valid, X_test, y_train, y_valid, y_test = split_data(features, labels, seed=args.seed)
+    print(f"Loaded {len(labels):,} customers ({labels.mean():.1%} churned) in {time.time() - started:.1f}s")
+
+    study_name = args.study_name or default_study_name(args.data)
+    search_budget = args.timeout - (time.time() - started)
+    study = search(X_train, y_train, X_valid, y_valid, study_name, study_dir=args.study_dir,
+                   n_trials=args.trials, timeout=search_budget, n_jobs=args.jobs,
+                   allow_smote=args.smote, seed=args.seed)
+    finished = finished_trials(study)
+    completed = [trial for trial in finished if trial.value is not None and 'n_estimators' in trial.user_attrs]
+    print(f"Study '{study_name}': {len(finished)} finished trials "
+          f"({len(finished) - len(completed)} pruned)")
+    if not completed:
+        print("No completed trial yet - rerun with a larger --timeout to continue the study")
+        return 1
+    print(f"Best validation AUC {study.best_value:.4f} with {study.best_params}")
+
+    model = fit_final_model(study.best_trial, np.concatenate([X_train, X_valid]),
+                            np.concatenate([y_train, y_valid]), seed=args.seed)
+    model_auc = test_auc(model, X_test, y_test)
+    try:
+        baseline_auc = test_auc(load_model(MODEL_PATH), X_test, y_test)
+    except Exception as e:
+        print(f"Could not score the current model: {e}")
+        baseline_auc = None
+
+    model_path = next_model_path(args.model_dir)
+    stem = os.path.splitext(model_path)[0]
+    version = stem.rsplit('_', 1)[-1]
+    with open(model_path + '.tmp', 'wb') as f:
+        pickle.dump(model, f)
+    os.replace(model_path + '.tmp', model_path)
+    write_metadata(stem + '.json', study, model_auc, baseline_auc, args.data, started)
+
+    importance_path = os.path.join(args.model_dir, f"feature_importance_{version}.csv")
+    rules_path = os.path.join(args.model_dir, f"decision_rules_{version}.txt")
+    feature_importance_frame(model).to_csv(importance_path, index=False)
+    with open(rules_path, 'w') as f:
+        f.write(decision_rules(model, np.concatenate([X_train, X_valid]), seed=args.seed))
+
+    baseline = f" (current model: {baseline_auc:.4f})" if baseline_auc is not None else ""
+    print(f"Test AUC {model_auc:.4f}{baseline}")
+    print(f"Wrote {model_path}, {importance_path} and {rules_path} in {time.time() - started:.1f}s")
+
+    if args.promote:
+        for importance_copy in (os.path.join(PROCESSED_DIR, 'feature_importance.csv'),
+                                os.path.join(BASE_DIR, 'feature_importance.csv')):
+            shutil.copyfile(importance_path, importance_copy)
+        for rules_copy in (os.path.join(BASE_DIR, 'decision_rules.txt'),
+                           os.path.join(BASE_DIR, 'notebooks', 'decision_rules.txt')):
+            shutil.copyfile(rules_path, rules_copy)
+        # The pointer is switched last, so the importances and rules never lag behind the served model
+        with open(MODEL_POINTER + '.tmp', 'w') as f:
+            f.write(os.path.relpath(model_path, MODEL_DIR) + '\n')
+        os.replace(MODEL_POINTER + '.tmp', MODEL_POINTER)
+        print(f"Promoted {os.path.basename(model_path)}: restart the dashboard to serve it")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.correlation as correlation
+from utils.correlation import STATE_FORMAT, build_state, is_append_of, latest_state
+from utils.sketches import CovarianceAccumulator
+
+
+def customers(n, seed):
+    """
+    Small customer file; Churn_Probability is included so no model is loaded
+    """
+    rng = np.random.default_rng(seed)
+    age = rng.integers(18, 90, n)
+    balance = rng.normal(80_000, 40_000, n).round(2)
+    return pd.DataFrame({
+        'id': np.arange(n),
+        'CreditScore': rng.integers(350, 850, n),
+        'Age': age,
+        'Balance': balance,
+        'Exited': (rng.random(n) < (age - 18) / 90).astype(int),
+        'Churn_Probability': (age / 100 + rng.normal(0, 0.05, n)).round(6),
+    })
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    model_path = tmp_path / 'model.pkl'
+    model_path.write_bytes(b'model')
+    monkeypatch.setattr(correlation, 'CORRELATION_DIR', str(tmp_path / 'correlation'))
+    return str(tmp_path / 'bank-data-processed.csv'), str(model_path)
+
+
+def correlation_of(state):
+    return CovarianceAccumulator.from_dict(state["accumulator"]).correlation()
+
+
+def test_merged_halves_match_corrcoef():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(1000, 4)) @ rng.normal(size=(4, 4))
+    frame = pd.DataFrame(values, columns=list('abcd'))
+
+    first, second = CovarianceAccumulator(list('abcd')), CovarianceAccumulator(list('abcd'))
+    first.update(frame.iloc[:300])
+    second.update(frame.iloc[300:])
+    first.merge(second)
+
+    assert first.count == 1000
+    np.testing.assert_allclose(first.covariance(), np.cov(values, rowvar=False), atol=1e-10)
+    np.testing.assert_allclose(first.correlation(), np.corrcoef(values, rowvar=False), atol=1e-12)
+
+
+def test_merge_rejects_other_columns():
+    with pytest.raises(ValueError):
+        CovarianceAccumulator(['a', 'b']).merge(CovarianceAccumulator(['a', 'c']))
+
+
+def test_append_matches_full_rebuild(paths):
+    path, model_path = paths
+    customers(2000, seed=1).to_csv(path, index=False)
+    previous = build_state(path, model_path, chunksize=700)
+
+    customers(500, seed=2).to_csv(path, mode='a', header=False, index=False)
+    assert is_append_of(previous, path, model_path)
+    appended = build_state(path, model_path, previous=previous, chunksize=700)
+    rebuilt = build_state(path, model_path, chunksize=700)
+
+    assert appended["incremental"] and not rebuilt["incremental"]
+    assert appended["accumulator"]["count"] == rebuilt["accumulator"]["count"] == 2500
+    assert appended["prefix_sha1"] == rebuilt["prefix_sha1"]
+    np.testing.assert_allclose(correlation_of(appended), correlation_of(rebuilt), atol=1e-12)
+
+
+def test_in_place_edit_forces_rebuild(paths):
+    path, model_path = paths
+    frame = customers(2000, seed=3)
+    frame.to_csv(path, index=False)
+    stored = build_state(path, model_path)
+    os.makedirs(correlation.CORRELATION_DIR)
+    with open(os.path.join(correlation.CORRELATION_DIR, f'correlation-v{STATE_FORMAT}-old.json'), 'w') as f:
+        json.dump(stored, f)
+
+    # Same-length edit far from the end of the file, then a few appended rows
+    size = os.path.getsize(path)
+    frame.loc[:500, 'Exited'] = 1 - frame.loc[:500, 'Exited']
+    frame.to_csv(path, index=False)
+    assert os.path.getsize(path) == size
+    customers(100, seed=4).to_csv(path, mode='a', header=False, index=False)
+
+    assert not is_append_of(stored, path, model_path)
+    assert latest_state(path, model_path) is None
+    rebuilt = build_state(path, model_path, previous=latest_state(path, model_path))
+    expected = pd.concat([frame, customers(100, seed=4)]).drop(columns='id').corr().to_numpy()
+    assert not rebuilt["incremental"]
+    np.testing.assert_allclose(correlation_of(rebuilt), expected, atol=1e-12)
+
+
+def test_partial_last_line_is_not_an_append(paths):
+    path, model_path = paths
+    customers(100, seed=5).to_csv(path, index=False)
+    with open(path, 'rb+') as f:
+        f.truncate(os.path.getsize(path) - 3)
+    stored = build_state(path, model_path)
+    with open(path, 'a') as f:
+        f.write('0.5\n')
+    assert not is_append_of(stored, path, model_path)
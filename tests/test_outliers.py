@@ -0,0 +1,44 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils.app_snapshot import stage_outliers
+from utils.outliers import detect_outliers, fit_positions, fit_sample
+
+
+def customers(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'CustomerId': np.arange(15_000_000, 15_000_000 + n),
+        'CreditScore': rng.integers(350, 850, n),
+        'Age': rng.integers(18, 90, n),
+        'Tenure': rng.integers(0, 11, n),
+        'Balance': rng.normal(80_000, 40_000, n).round(2),
+        'Exited': rng.integers(0, 2, n),
+    })
+
+
+def test_snapshot_scores_match_live_scores_across_chunks(tmp_path):
+    path = tmp_path / 'customers.csv'
+    customers(1000).to_csv(path, index=False)
+
+    stage_outliers(str(tmp_path / 'build'), {"customers": str(path)}, 1, chunksize=300)
+    with open(tmp_path / 'build' / 'aggregates' / 'outliers.json') as f:
+        summary = json.load(f)
+    live = detect_outliers(pd.read_csv(path))
+
+    assert summary['total_records'] == 1000
+    assert summary['outlier_count'] == int((live['IsOutlier'] == -1).sum())
+    stored = np.load(tmp_path / 'build' / 'scores' / 'outlier_score.npy')
+    np.testing.assert_allclose(stored, live['OutlierScore'].to_numpy(), rtol=1e-6, atol=1e-6)
+
+
+def test_sample_is_the_same_for_a_frame_and_its_chunks():
+    frame = customers(1000)
+    chunks = [frame.iloc[start:start + 300] for start in range(0, 1000, 300)]
+
+    sample = fit_sample(iter(chunks), len(frame), size=50)
+
+    assert len(sample) == 50
+    pd.testing.assert_frame_equal(sample, frame.iloc[fit_positions(1000, size=50)].reset_index(drop=True))
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import utils.snapshots as snapshots
+from utils.data_layer import ParquetChunkWriter
+
+
+@pytest.fixture
+def snapshot_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'PARTITION_DIR', str(tmp_path / 'partitions'))
+    monkeypatch.setattr(snapshots, 'AGGREGATE_DIR', str(tmp_path / 'aggregates'))
+    monkeypatch.setattr(snapshots, 'STAGING_DIR', str(tmp_path / 'staging'))
+    return tmp_path
+
+
+def test_ingest_widens_columns_that_change_type_between_chunks(snapshot_dirs):
+    rng = np.random.default_rng(0)
+    extract = pd.DataFrame({
+        'CustomerId': np.arange(200),
+        'Age': rng.integers(18, 90, 200),
+        'Balance': rng.integers(0, 200_000, 200).astype(float),
+        'Exited': rng.integers(0, 2, 200),
+        'Surname': [None] * 100 + ['Smith'] * 100,
+    })
+    # Whole numbers in the first chunk, decimals and a gap in the second
+    tenure = [int(value) for value in rng.integers(0, 10, 100)] + [value + 0.5 for value in rng.integers(0, 10, 100)]
+    tenure[150] = None
+    extract['Tenure'] = pd.Series(tenure, dtype=object)
+    path = snapshot_dirs / 'extract.csv'
+    extract.to_csv(path, index=False)
+    first, second = pd.read_csv(path, chunksize=100)
+    assert first['Tenure'].dtype == np.int64 and second['Tenure'].dtype == np.float64
+
+    record = snapshots.ingest_snapshot(str(path), '2024-01', chunksize=100)
+
+    assert record['total_customers'] == 200
+    partition = pq.read_table(snapshots.partition_path('2024-01')).to_pandas()
+    assert len(partition) == 200
+    np.testing.assert_array_equal(partition['Tenure'].to_numpy(), pd.read_csv(path)['Tenure'].to_numpy())
+    assert partition['Surname'].iloc[100:].eq('Smith').all()
+    assert not (snapshot_dirs / 'staging' / 'month=2024-01').exists()
+
+
+def test_writer_keeps_one_schema_when_chunks_fit(tmp_path):
+    writer = ParquetChunkWriter(str(tmp_path / 'table.parquet'))
+    writer.write(pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']}))
+    writer.write(pd.DataFrame({'a': [3.0, None], 'b': ['z', None]}))
+    writer.close()
+
+    table = pq.read_table(tmp_path / 'table.parquet')
+    assert str(table.schema.field('a').type) == 'int64'
+    assert table.column('a').to_pylist() == [1, 2, 3, None]
@@ -0,0 +1,335 @@
+"""
+Prebuilt dashboard snapshot
+An offline build runs every dashboard computation once (query aggregates,
+outlier scores, the column profile, cohort insights, feature correlations,
+the explanation store and the customer map) and writes the results to a
+versioned directory under data/builds/ (or DASHBOARD_BUILDS_DIR). The app
+then only reads JSON and memory-maps arrays from the current snapshot, so it
+starts without touching the raw customer files or fitting any model.
+
+Layout of data/builds/<data version>/:
+    manifest.json       version, sources, row counts and per-stage timings
+    aggregates/         query results, outlier summary, profile, insights, correlations
+    scores/             outlier score / flag arrays, one value per customer row (/export/outliers)
+    figures/            chart-ready series (histogram bins, importances)
+    explanations/       per-customer contribution matrix (utils.explanations)
+    embedding/          customer map coordinates (utils.embedding)
+"""
+
+import os
+import json
+import time
+import pickle
+import shutil
+import importlib.util
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.data_layer import (BANK_DATA_PATH, DATA_DIR, DEFAULT_CHUNKSIZE, MODEL_PATH, PAST_DATA_PATH,
+                              PROCESSED_DIR, data_version, file_signature)
+
+# Read by both the build script and the app, so a moved snapshot folder is still served
+BUILDS_ENV = 'DASHBOARD_BUILDS_DIR'
+BUILDS_DIR = os.environ.get(BUILDS_ENV) or os.path.join(DATA_DIR, 'builds')
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+FORMAT_VERSION = 1
+
+TOP_OUTLIERS = 10
+HISTOGRAM_BINS = 50
+
+
+def write_json(data, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return path
+
+
+def frame_to_json(frame):
+    return {"columns": frame.columns.tolist(), "data": frame.astype(object).where(frame.notna(), None).values.tolist()}
+
+
+def frame_from_json(data):
+    return pd.DataFrame(data["data"], columns=data["columns"])
+
+
+def stage_aggregates(build_dir, paths, n_jobs):
+    """
+    Every query in utils.query_backend.QUERIES, computed on pandas or DuckDB
+    """
+    from utils.query_backend import BACKENDS, QUERIES
+    engine = 'duckdb' if _has_module('duckdb') else 'pandas'
+    backend = BACKENDS[engine](paths={"customers": paths["customers"], "segments": paths["segments"]})
+    results = {name: frame_to_json(backend.run(name)) for name in QUERIES}
+    return [write_json(results, os.path.join(build_dir, 'aggregates', 'queries.json'))], {"engine": engine}
+
+
+def stage_outliers(build_dir, paths, n_jobs, chunksize=DEFAULT_CHUNKSIZE, contamination=0.05):
+    """
+    Isolation Forest fitted on the same sample as the live page and streamed over the whole file
+    """
+    from numpy.lib.format import open_memmap
+    from utils.data_layer import iter_chunks
+    from utils.outliers import anomaly_histogram, fit_outlier_file, score_outliers
+
+    path = paths["customers"]
+    iso_forest, numerical_cols, rows = fit_outlier_file(path, chunksize=chunksize, contamination=contamination)
+    score_path = os.path.join(build_dir, 'scores', 'outlier_score.npy')
+    flag_path = os.path.join(build_dir, 'scores', 'is_outlier.npy')
+    os.makedirs(os.path.dirname(score_path), exist_ok=True)
+    scores = open_memmap(score_path, mode='w+', dtype=np.float32, shape=(rows,))
+    flags = open_memmap(flag_path, mode='w+', dtype=np.int8, shape=(rows,))
+
+    candidates = []
+    start = 0
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        chunk = score_outliers(iso_forest, numerical_cols, chunk)
+        end = start + len(chunk)
+        scores[start:end] = chunk['OutlierScore'].to_numpy()
+        flags[start:end] = chunk['IsOutlier'].to_numpy()
+        candidates.append(chunk.nsmallest(TOP_OUTLIERS, 'OutlierScore')[['Age', 'Balance', 'CreditScore', 'Tenure', 'OutlierScore']])
+        start = end
+    scores.flush()
+    flags.flush()
+
+    top = pd.concat(candidates).nsmallest(TOP_OUTLIERS, 'OutlierScore') if candidates else pd.DataFrame()
+    summary = {
+        "total_records": rows,
+        "outlier_count": int(np.count_nonzero(np.asarray(flags) == -1)),
+        "top_outliers": frame_to_json(top),
+    }
+    files = [score_path, flag_path,
+             write_json(summary, os.path.join(build_dir, 'aggregates', 'outliers.json')),
+             write_json(anomaly_histogram(scores, bins=HISTOGRAM_BINS),
+                        os.path.join(build_dir, 'figures', 'anomaly_histogram.json'))]
+    return files, {"rows": rows}
+
+
+def stage_profile(build_dir, paths, n_jobs):
+    from utils.profiling import build_profile
+    path = os.path.join(build_dir, 'aggregates', 'profile.pkl')
+    profile = build_profile(paths["customers"], n_jobs=n_jobs)
+    with open(path, 'wb') as f:
+        pickle.dump(profile, f)
+    return [path], {}
+
+
+def stage_insights(build_dir, paths, n_jobs):
+    from utils.cohorts import mine_insights
+    return [write_json(mine_insights(paths["customers"]), os.path.join(build_dir, 'aggregates', 'insights.json'))], {}
+
+
+def stage_correlation(build_dir, paths, n_jobs):
+    from utils.correlation import build_state
+    state = build_state(paths["customers"], paths["model"])
+    return [write_json(state, os.path.join(build_dir, 'aggregates', 'correlation.json'))], {}
+
+
+def stage_explanations(build_dir, paths, n_jobs):
+    from utils.explanations import META_FILE, build_explanation_store
+    out_dir = os.path.join(build_dir, 'explanations')
+    build_explanation_store(paths["customers"], paths["model"], out_dir=out_dir, n_jobs=n_jobs)
+    return [os.path.join(out_dir, 'contributions.npy'), os.path.join(out_dir, META_FILE)], {}
+
+
+def stage_customer_map(build_dir, paths, n_jobs):
+    from utils.embedding import build_embedding
+    out_dir = os.path.join(build_dir, 'embedding')
+    build_embedding(paths["segments"], out_dir=out_dir, model_path=paths["model"])
+    return [os.path.join(out_dir, name) for name in ('coords.npy', 'segment.npy', 'churn.npy', 'meta.json')], {}
+
+
+# Stages only read the source files and write their own files, so they can run side by side
+STAGES = {
+    "aggregates": stage_aggregates,
+    "outliers": stage_outliers,
+    "profile": stage_profile,
+    "insights": stage_insights,
+    "correlation": stage_correlation,
+    "explanations": stage_explanations,
+    "customer_map": stage_customer_map,
+}
+
+
+def _has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+
+def _run_stage(name, build_dir, paths, n_jobs):
+    start = time.time()
+    try:
+        files, info = STAGES[name](build_dir, paths, n_jobs)
+    except Exception as e:
+        return name, {"status": "failed", "error": f"{type(e).__name__}: {e}", "seconds": time.time() - start}
+    files = [os.path.relpath(path, build_dir) for path in files]
+    return name, dict(info, status="ok", seconds=time.time() - start, files=files)
+
+
+def reuse_stages(previous_dir, build_dir, names, sources):
+    """
+    Copies the outputs of stages that are not rebuilt from the published build
+    of the same data version, and returns their manifest entries
+    Stages that build did not finish are left out
+    """
+    try:
+        with open(os.path.join(previous_dir, MANIFEST_FILE)) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if previous.get("format") != FORMAT_VERSION or previous.get("sources") != sources:
+        return {}
+    reused = {}
+    for name in names:
+        result = previous.get("stages", {}).get(name, {})
+        if result.get("status") != "ok":
+            continue
+        try:
+            for relative in result["files"]:
+                target = os.path.join(build_dir, relative)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(previous_dir, relative), target)
+        except (OSError, KeyError) as e:
+            print(f"Stage {name} not reused from the previous build: {e}")
+            continue
+        reused[name] = dict(result, reused=True)
+    return reused
+
+
+def feature_importance_series(build_dir, stages):
+    """
+    Importances from the snapshot's explanation store, else the promoted CSV
+    """
+    from utils.explanations import global_importance
+    importance = None
+    if stages.get("explanations", {}).get("status") == "ok":
+        importance = global_importance(os.path.join(build_dir, 'explanations'))
+    if importance is None:
+        importance = pd.read_csv(os.path.join(PROCESSED_DIR, 'feature_importance.csv'))
+    return write_json(frame_to_json(importance), os.path.join(build_dir, 'figures', 'feature_importance.json'))
+
+
+def build_snapshot(stages=None, builds_dir=BUILDS_DIR, n_jobs=-1, progress=None):
+    """
+    Runs the selected stages (all by default), independent stages in parallel,
+    and publishes the result as the current snapshot once every stage is done
+    Stages left out keep the outputs of the published build of the same data version
+    Returns the manifest; a failed stage is recorded there and the snapshot
+    is still published so the pages fall back to live computation for it
+    """
+    from joblib import Parallel, delayed, cpu_count
+
+    stages = list(stages or STAGES)
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)}; expected: {', '.join(STAGES)}")
+
+    version = data_version()
+    paths = {"customers": BANK_DATA_PATH, "segments": PAST_DATA_PATH, "model": MODEL_PATH}
+    sources = {name: {"file": os.path.basename(path), "signature": file_signature(path)}
+               for name, path in paths.items() if os.path.exists(path)}
+    build_dir = os.path.join(builds_dir, version + '.tmp')
+    final_dir = os.path.join(builds_dir, version)
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    reused = reuse_stages(final_dir, build_dir, [name for name in STAGES if name not in stages], sources)
+
+    started = time.time()
+    workers = min(len(stages), cpu_count() if n_jobs == -1 else max(n_jobs, 1))
+    # With stages running side by side each one stays single process
+    stage_jobs = 1 if workers > 1 else n_jobs
+    results = Parallel(n_jobs=workers, return_as='generator_unordered')(
+        delayed(_run_stage)(name, build_dir, paths, stage_jobs) for name in stages
+    )
+    stage_results = dict(reused)
+    for name, result in results:
+        stage_results[name] = result
+        if progress is not None:
+            progress(name, result)
+
+    files = [feature_importance_series(build_dir, stage_results)]
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "seconds": time.time() - started,
+        "sources": sources,
+        "rows": stage_results.get("outliers", {}).get("rows"),
+        "stages": {name: stage_results[name] for name in STAGES if name in stage_results},
+        "files": [os.path.relpath(path, build_dir) for path in files],
+    }
+    write_json(manifest, os.path.join(build_dir, MANIFEST_FILE))
+
+    # Swap the finished build in and only then point CURRENT at it
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.replace(build_dir, final_dir)
+    with open(os.path.join(builds_dir, CURRENT_FILE + '.tmp'), 'w') as f:
+        f.write(version)
+    os.replace(os.path.join(builds_dir, CURRENT_FILE + '.tmp'), os.path.join(builds_dir, CURRENT_FILE))
+    return manifest
+
+
+class AppSnapshot:
+    """
+    Read-only view of one build; files are read on first use and kept
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest["version"]
+        self._json = {}
+
+    def path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def has(self, stage):
+        return self.manifest["stages"].get(stage, {}).get("status") == "ok"
+
+    def read_json(self, *parts):
+        key = os.path.join(*parts)
+        if key not in self._json:
+            with open(self.path(*parts)) as f:
+                self._json[key] = json.load(f)
+        return self._json[key]
+
+    def frame(self, *parts):
+        return frame_from_json(self.read_json(*parts))
+
+    def aggregate(self, query_name):
+        return frame_from_json(self.read_json('aggregates', 'queries.json')[query_name])
+
+    def scores(self, name):
+        return np.load(self.path('scores', f"{name}.npy"), mmap_mode='r')
+
+    def figure_data(self, name):
+        return self.read_json('figures', f"{name}.json")
+
+    def profile(self):
+        with open(self.path('aggregates', 'profile.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+
+@lru_cache(maxsize=2)
+def _open_snapshot(directory, signature):
+    return AppSnapshot(directory)
+
+
+def load_snapshot(builds_dir=BUILDS_DIR):
+    """
+    Returns the current snapshot, or None when none was built or the data
+    files have changed since (the pages then compute everything live)
+    """
+    try:
+        with open(os.path.join(builds_dir, CURRENT_FILE)) as f:
+            version = f.read().strip()
+        if version != data_version():
+            return None
+        directory = os.path.join(builds_dir, version)
+        return _open_snapshot(directory, file_signature(os.path.join(directory, MANIFEST_FILE)))
+    except (OSError, ValueError, KeyError):
+        return None
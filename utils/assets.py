@@ -0,0 +1,49 @@
+"""
+Local stylesheet bundle used by app.py
+scripts/build_assets.py concatenates and minifies the CSS in assets/ into a
+fingerprinted file under assets/dist/ and records its name in a manifest
+"""
+
+import os
+import json
+
+from utils.data_layer import BASE_DIR
+
+ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
+VENDOR_DIR = os.path.join(ASSETS_DIR, 'vendor')
+DIST_DIR = os.path.join(ASSETS_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Vendored third-party styles come first so the dashboard styles can override them
+VENDOR_STYLESHEETS = ['vendor/bootstrap.min.css', 'vendor/fontawesome-subset.css']
+
+# Fingerprinted files never change, so browsers may keep them for a year
+DIST_URL_PREFIX = '/assets/dist/'
+DIST_MAX_AGE = 31536000
+
+
+def source_stylesheets():
+    """
+    Stylesheets in bundle order: vendor files, then assets/*.css alphabetically
+    (the order Dash used when it included assets automatically)
+    """
+    own = sorted(name for name in os.listdir(ASSETS_DIR) if name.endswith('.css'))
+    return VENDOR_STYLESHEETS + own
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def stylesheet_urls():
+    """
+    URLs for the page head: the bundle when it has been built, else the source files
+    """
+    manifest = load_manifest()
+    if manifest and os.path.exists(os.path.join(DIST_DIR, manifest['css'])):
+        return [DIST_URL_PREFIX + manifest['css']]
+    return ['/assets/' + name for name in source_stylesheets()]
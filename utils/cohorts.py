@@ -0,0 +1,219 @@
+"""
+Churn cohort mining for the Insights panel
+One streaming pass builds a cube of customer and churn counts for every
+combination of the cohort columns; cohorts (combinations of column values)
+are then enumerated Apriori-style from the cube alone, skipping any
+combination whose sub-cohorts are already too small, and ranked by churn lift.
+"""
+
+import os
+import json
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from utils.data_layer import BANK_DATA_PATH, CACHE_DIR, DEFAULT_CHUNKSIZE, add_age_group, data_version, iter_chunks
+
+COHORT_DIR = os.path.join(CACHE_DIR, 'cohorts')
+
+BALANCE_BINS = [-np.inf, 0, 50_000, 100_000, 150_000, np.inf]
+BALANCE_LABELS = ["0", "1-50k", "50k-100k", "100k-150k", "150k+"]
+COHORT_COLUMNS = ['Geography', 'AgeGroup', 'IsActiveMember', 'NumOfProducts', 'HasCrCard', 'BalanceBand']
+
+# A cohort must hold at least this share of customers
+MIN_SUPPORT = 0.01
+MAX_LENGTH = 3
+# A cohort is only shown when it moves the churn rate further than all of its sub-cohorts by this factor
+MIN_IMPROVEMENT = 1.1
+
+
+def add_cohort_columns(chunk):
+    chunk = add_age_group(chunk)
+    chunk['BalanceBand'] = pd.cut(chunk['Balance'], bins=BALANCE_BINS, labels=BALANCE_LABELS)
+    for column in ['IsActiveMember', 'NumOfProducts', 'HasCrCard']:
+        chunk[column] = pd.to_numeric(chunk[column], errors='coerce').astype('Int64')
+    return chunk
+
+
+SOURCE_COLUMNS = ['Geography', 'Age', 'IsActiveMember', 'NumOfProducts', 'HasCrCard', 'Balance', 'Exited']
+
+
+def build_cube(path=BANK_DATA_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Customer and churned counts per combination of COHORT_COLUMNS
+    """
+    cube = cube_from_chunks(iter_chunks(path, chunksize=chunksize, usecols=SOURCE_COLUMNS))
+    if cube is None:
+        raise ValueError(f"No rows found in {path}")
+    return cube
+
+
+def cube_from_chunks(chunks):
+    """
+    Cube over DataFrame chunks holding SOURCE_COLUMNS, None when there are no rows
+    """
+    parts = []
+    for chunk in chunks:
+        chunk = add_cohort_columns(chunk[SOURCE_COLUMNS].copy())
+        parts.append(chunk.groupby(COHORT_COLUMNS, observed=True)['Exited'].agg(customers='size', churned='sum'))
+    if not parts:
+        return None
+    cube = pd.concat(parts).groupby(level=list(range(len(COHORT_COLUMNS)))).sum().reset_index()
+    for column in COHORT_COLUMNS:
+        cube[column] = cube[column].astype(str)
+    return cube
+
+
+def mine_cohorts(cube, min_support=MIN_SUPPORT, max_length=MAX_LENGTH):
+    """
+    Every cohort of up to max_length column values with enough support
+    A candidate is only counted when all of its sub-cohorts passed the support
+    threshold, since support can only shrink as values are added
+    """
+    total = cube['customers'].sum()
+    min_count = min_support * total
+    values = {column: cube[column].to_numpy() for column in COHORT_COLUMNS}
+    customers = cube['customers'].to_numpy()
+    churned = cube['churned'].to_numpy()
+
+    def count(items):
+        mask = np.ones(len(cube), dtype=bool)
+        for column, value in items:
+            mask &= values[column] == value
+        return customers[mask].sum(), churned[mask].sum()
+
+    frequent = {}
+    level = [((column, value),) for column in COHORT_COLUMNS for value in np.unique(values[column])]
+    for length in range(1, max_length + 1):
+        found = {}
+        for items in level:
+            n, churners = count(items)
+            if n >= min_count:
+                found[items] = (n, churners)
+        frequent.update(found)
+        if length == max_length:
+            break
+        # Join cohorts that share all but their last item, on different columns
+        keys = sorted(found)
+        level = []
+        for a, b in combinations(keys, 2):
+            if a[:-1] != b[:-1] or a[-1][0] == b[-1][0]:
+                continue
+            candidate = tuple(sorted(a + b[-1:]))
+            if all(subset in found for subset in combinations(candidate, length)):
+                level.append(candidate)
+        if not level:
+            break
+
+    base_rate = cube['churned'].sum() / total
+    rows = [{"items": items, "customers": int(n), "churned": int(churners), "support": n / total,
+             "churn_rate": churners / n, "lift": (churners / n) / base_rate if base_rate else np.nan}
+            for items, (n, churners) in frequent.items()]
+    return pd.DataFrame(rows), base_rate
+
+
+def productive(cohorts, direction):
+    """
+    Keeps cohorts whose lift beats every one of their sub-cohorts by MIN_IMPROVEMENT
+    (higher for risk cohorts, lower for loyal ones)
+    """
+    lifts = dict(zip(cohorts['items'], cohorts['lift']))
+    keep = []
+    for items, lift in lifts.items():
+        parents = [lifts[subset] for subset in combinations(items, len(items) - 1) if subset in lifts]
+        if direction == 'risk':
+            keep.append(lift > 1 and all(lift >= parent * MIN_IMPROVEMENT for parent in parents))
+        else:
+            keep.append(lift < 1 and all(lift * MIN_IMPROVEMENT <= parent for parent in parents))
+    return cohorts[keep]
+
+
+def top_cohorts(cohorts, n=4, direction='risk'):
+    """
+    The n strongest cohorts, skipping any that nests inside (or contains) one already picked
+    """
+    candidates = productive(cohorts, direction)
+    ascending = direction != 'risk'
+    # Ties in lift go to the larger cohort
+    candidates = candidates.assign(order=candidates['lift'] if ascending else -candidates['lift'])
+    candidates = candidates.sort_values(['order', 'customers'], ascending=[True, False]).drop(columns='order')
+    picked = []
+    for index, items in candidates['items'].items():
+        if any(set(items) <= set(other) or set(other) <= set(items) for other in candidates.loc[picked, 'items']):
+            continue
+        picked.append(index)
+        if len(picked) == n:
+            break
+    return candidates.loc[picked]
+
+
+def describe_item(column, value):
+    if column == 'Geography':
+        return f"from {value}"
+    if column == 'AgeGroup':
+        return f"aged {value}"
+    if column == 'IsActiveMember':
+        return "active members" if value == '1' else "inactive members"
+    if column == 'NumOfProducts':
+        return f"with {value} product{'s' if value != '1' else ''}"
+    if column == 'HasCrCard':
+        return "with a credit card" if value == '1' else "without a credit card"
+    if column == 'BalanceBand':
+        return "with a zero balance" if value == '0' else f"with a balance of {value}"
+    return f"{column} = {value}"
+
+
+def describe_cohort(row, base_rate):
+    """
+    Title and sentence for one insight card
+    """
+    # Membership reads best first ("Inactive members aged 45-54 from Germany")
+    items = sorted(row['items'], key=lambda item: item[0] != 'IsActiveMember')
+    phrases = [describe_item(column, value) for column, value in items]
+    subject = phrases[0] if phrases[0].endswith('members') else "Customers " + phrases[0]
+    title = " ".join([subject[0].upper() + subject[1:]] + phrases[1:])
+    if row['lift'] >= 1:
+        comparison = f"{row['lift']:.1f}x the {base_rate:.1%} average"
+    else:
+        comparison = f"{1 - row['lift']:.0%} below the {base_rate:.1%} average"
+    return {
+        "title": title,
+        "text": f"- Churn rate {row['churn_rate']:.1%} ({comparison}) across {row['customers']:,} customers "
+                f"({row['support']:.1%} of all customers).",
+    }
+
+
+def mine_insights(path=BANK_DATA_PATH, n_risk=4, n_loyal=3, min_support=MIN_SUPPORT):
+    """
+    Risk and loyalty insight cards for path, without any caching
+    """
+    return insights_from_cube(build_cube(path), n_risk, n_loyal, min_support)
+
+
+def insights_from_cube(cube, n_risk=4, n_loyal=3, min_support=MIN_SUPPORT):
+    cohorts, base_rate = mine_cohorts(cube, min_support=min_support)
+    return {
+        "base_rate": base_rate,
+        "customers": int(cube['customers'].sum()),
+        "risk": [describe_cohort(row, base_rate) for _, row in top_cohorts(cohorts, n_risk, 'risk').iterrows()],
+        "loyal": [describe_cohort(row, base_rate) for _, row in top_cohorts(cohorts, n_loyal, 'loyal').iterrows()],
+    }
+
+
+def cohort_insights(path=BANK_DATA_PATH, n_risk=4, n_loyal=3, min_support=MIN_SUPPORT):
+    """
+    Risk and loyalty insights for the current data version, cached on disk
+    so a data refresh re-mines once and later page loads read the cache
+    """
+    cache_path = os.path.join(COHORT_DIR, f"insights-{data_version()}.json")
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            return json.load(f)
+
+    insights = mine_insights(path, n_risk, n_loyal, min_support)
+    os.makedirs(COHORT_DIR, exist_ok=True)
+    with open(cache_path + '.tmp', 'w') as f:
+        json.dump(insights, f, indent=2)
+    os.replace(cache_path + '.tmp', cache_path)
+    return insights
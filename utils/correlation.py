@@ -0,0 +1,166 @@
+"""
+Correlations between the numeric customer features for the data overview page
+A CovarianceAccumulator is streamed over the customer file chunk by chunk
+(with the model's Churn_Probability added to every chunk) and stored per data
+version together with how far into the file it read and a hash of those
+bytes. When a new data version only appended rows to the file (the bytes
+already read hash the same), the stored state is reused and just the
+appended rows are read.
+"""
+
+import os
+import glob
+import json
+import hashlib
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from utils.data_layer import BANK_DATA_PATH, CACHE_DIR, DEFAULT_CHUNKSIZE, MODEL_PATH, data_version, file_signature, iter_chunks
+from utils.drift import SCORE_COLUMN, ChurnScorer
+from utils.outliers import ID_COLUMNS, SCORE_COLUMNS
+from utils.sketches import CovarianceAccumulator
+
+CORRELATION_DIR = os.path.join(CACHE_DIR, 'correlation')
+# Bumped when stored states can no longer be trusted (v1 only fingerprinted the end of the file)
+STATE_FORMAT = 2
+
+# Block size used when hashing the part of the file already accumulated
+HASH_BLOCK_BYTES = 1 << 20
+
+
+def correlation_columns(chunk):
+    """
+    Numeric columns except row identifiers and outlier scores, plus Churn_Probability
+    """
+    columns = [column for column in chunk.select_dtypes(include=['number', 'bool']).columns
+               if column not in ID_COLUMNS + SCORE_COLUMNS + [SCORE_COLUMN]]
+    return columns + [SCORE_COLUMN]
+
+
+def accumulate(chunks, accumulator=None, model_path=MODEL_PATH):
+    """
+    Adds every chunk to the accumulator (created from the first chunk's columns)
+    """
+    scorer = ChurnScorer(model_path)
+    for chunk in chunks:
+        chunk = scorer(chunk)
+        if accumulator is None:
+            accumulator = CovarianceAccumulator(correlation_columns(chunk))
+        accumulator.update(chunk)
+    return accumulator
+
+
+def prefix_digest(path, offset):
+    """
+    sha1 of the first offset bytes of path, read block by block
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        remaining = offset
+        while remaining > 0:
+            block = f.read(min(HASH_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def appended_chunks(path, offset, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Rows written to a CSV file after byte offset
+    """
+    if os.path.getsize(path) <= offset:
+        return
+    columns = pd.read_csv(path, nrows=0).columns
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        yield from pd.read_csv(f, names=columns, header=None, chunksize=chunksize)
+
+
+def is_append_of(state, path, model_path):
+    """
+    True when path still starts with the bytes state was built from, and the model is unchanged
+    """
+    if not path.endswith('.csv') or state.get("source") != os.path.basename(path):
+        return False
+    if state.get("model_signature") != file_signature(model_path):
+        return False
+    offset = state.get("offset")
+    if not offset or offset > os.path.getsize(path):
+        return False
+    # Rows are only appended after a complete line
+    with open(path, 'rb') as f:
+        f.seek(offset - 1)
+        if f.read(1) != b'\n':
+            return False
+    # Any edit to the bytes already read, not only near the end, forces a rebuild
+    return prefix_digest(path, offset) == state.get("prefix_sha1")
+
+
+def latest_state(path, model_path):
+    """
+    Most recent stored state that the current file extends, or None
+    """
+    states = []
+    for state_path in glob.glob(os.path.join(CORRELATION_DIR, f'correlation-v{STATE_FORMAT}-*.json')):
+        try:
+            with open(state_path) as f:
+                states.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    # Hashing reads the whole prefix, so only check until the longest valid state is found
+    for state in sorted(states, key=lambda state: state.get("offset") or 0, reverse=True):
+        if is_append_of(state, path, model_path):
+            return state
+    return None
+
+
+def build_state(path=BANK_DATA_PATH, model_path=MODEL_PATH, previous=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Accumulates the whole file, or only the rows appended since previous
+    """
+    # Rows appended while this runs are picked up by the next data version
+    size = os.path.getsize(path)
+    if previous is not None:
+        accumulator = accumulate(appended_chunks(path, previous["offset"], chunksize),
+                                 CovarianceAccumulator.from_dict(previous["accumulator"]), model_path)
+    else:
+        accumulator = accumulate(iter_chunks(path, chunksize=chunksize), model_path=model_path)
+    if accumulator is None:
+        raise ValueError(f"No rows found in {path}")
+    csv = path.endswith('.csv')
+    return {
+        "source": os.path.basename(path),
+        "model_signature": file_signature(model_path),
+        "offset": size if csv else None,
+        "prefix_sha1": prefix_digest(path, size) if csv else None,
+        "incremental": previous is not None,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "accumulator": accumulator.to_dict(),
+    }
+
+
+def correlation_state(path=BANK_DATA_PATH, model_path=MODEL_PATH):
+    """
+    Stored state for the current data version, built (or extended) when missing
+    """
+    cache_path = os.path.join(CORRELATION_DIR, f"correlation-v{STATE_FORMAT}-{data_version()}.json")
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            return json.load(f)
+
+    state = build_state(path, model_path, previous=latest_state(path, model_path))
+    os.makedirs(CORRELATION_DIR, exist_ok=True)
+    with open(cache_path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(cache_path + '.tmp', cache_path)
+    return state
+
+
+def correlation_frame(accumulator):
+    """
+    Correlation matrix as a DataFrame labelled by column
+    """
+    return pd.DataFrame(accumulator.correlation(), index=accumulator.columns, columns=accumulator.columns)
@@ -0,0 +1,162 @@
+"""
+Helpers that replay what the Dash renderer does when a page is opened
+Used by the payload measurement and load-testing scripts
+"""
+
+# Pages served by app.py
+PAGES = ["/", "/segmentation", "/trends", "/data_overview"]
+
+UPDATE_URL = "/_dash-update-component"
+
+
+def parse_output(output):
+    """
+    Turns a dependency output string into the outputs field of a callback request
+    Multi-output callbacks look like "..a.children...b.children.."
+    """
+    if output.startswith("..") and output.endswith(".."):
+        parts = output[2:-2].split("...")
+        return [dict(zip(("id", "property"), part.rsplit(".", 1))) for part in parts]
+    component_id, prop = output.rsplit(".", 1)
+    return {"id": component_id, "property": prop}
+
+
+def collect_props(component, props=None):
+    """
+    Walks a serialised Dash component tree and returns {id: props}
+    """
+    if props is None:
+        props = {}
+    if isinstance(component, list):
+        for child in component:
+            collect_props(child, props)
+    elif isinstance(component, dict) and "props" in component:
+        component_props = component["props"]
+        if "id" in component_props and isinstance(component_props["id"], str):
+            props[component_props["id"]] = component_props
+        for value in component_props.values():
+            if isinstance(value, (list, dict)):
+                collect_props(value, props)
+    return props
+
+
+def callback_payload(dependency, values):
+    """
+    Builds the request body for one callback, or None if an input is not on the page
+    values maps "id.property" to the value the renderer would send
+    """
+    inputs = []
+    for item in dependency["inputs"]:
+        key = f"{item['id']}.{item['property']}"
+        # A component on the page whose prop is still unset is sent without a value
+        if key not in values and f"{item['id']}.id" not in values:
+            return None
+        inputs.append({"id": item["id"], "property": item["property"], "value": values.get(key)})
+    state = [{"id": item["id"], "property": item["property"], "value": values.get(f"{item['id']}.{item['property']}")}
+             for item in dependency.get("state", [])]
+    return {
+        "output": dependency["output"],
+        "outputs": parse_output(dependency["output"]),
+        "inputs": inputs,
+        "changedPropIds": [],
+        "state": state,
+    }
+
+
+def prop_values(props):
+    """
+    Flattens {id: props} into {"id.property": value}, including the implicit id prop
+    """
+    values = {}
+    for component_id, component_props in props.items():
+        for prop, value in component_props.items():
+            values[f"{component_id}.{prop}"] = value
+        values[f"{component_id}.id"] = component_id
+    return values
+
+
+def url_search(pathname):
+    """
+    The query string part of a page path ("?dataset=germany"), as dcc.Location reports it
+    """
+    query = pathname.partition('?')[2]
+    return f"?{query}" if query else ""
+
+
+def location_callbacks(dependencies, pathname):
+    """
+    Callbacks fired by the dcc.Location when the URL changes (navbar, sidebar, page content)
+    pathname may carry a query string, e.g. /segmentation?dataset=germany
+    """
+    values = {"url.pathname": pathname.partition('?')[0], "url.search": url_search(pathname)}
+    payloads = []
+    for dependency in dependencies:
+        if all(item["id"] == "url" for item in dependency["inputs"]):
+            payload = callback_payload(dependency, values)
+            if payload is not None:
+                payloads.append(payload)
+    return payloads
+
+
+def page_values(page_content, search=""):
+    """
+    {"id.property": value} for a rendered page, plus the URL's query string
+    """
+    values = prop_values(collect_props(page_content))
+    values["url.search"] = search
+    return values
+
+
+def page_callbacks(dependencies, page_content, search=""):
+    """
+    Callbacks fired once the page content is rendered (figures and other initial outputs)
+    """
+    values = page_values(page_content, search)
+    payloads = []
+    for dependency in dependencies:
+        if any(item["id"] == "url" for item in dependency["inputs"]):
+            continue
+        payload = callback_payload(dependency, values)
+        if payload is not None:
+            payloads.append(payload)
+    return payloads
+
+
+def merge_response(values, body):
+    """
+    Applies a callback response to values, including the props of components it rendered
+    Returns the keys it set
+    """
+    changed = set()
+    for component_id, props in ((body or {}).get("response") or {}).items():
+        for prop, value in props.items():
+            values[f"{component_id}.{prop}"] = value
+            changed.add(f"{component_id}.{prop}")
+            if isinstance(value, (list, dict)):
+                rendered = prop_values(collect_props(value))
+                values.update(rendered)
+                changed.update(rendered)
+    return changed
+
+
+def chained_callbacks(dependencies, values, changed, fired):
+    """
+    Callbacks the renderer fires next: an input was set by a response or its component was just rendered
+    fired holds the outputs already requested for this page view; each callback is sent once
+    """
+    payloads = []
+    for dependency in dependencies:
+        if dependency["output"] in fired or any(item["id"] == "url" for item in dependency["inputs"]):
+            continue
+        if not any(f"{item['id']}.{item['property']}" in changed or f"{item['id']}.id" in changed
+                   for item in dependency["inputs"]):
+            continue
+        payload = callback_payload(dependency, values)
+        if payload is not None:
+            fired.add(dependency["output"])
+            payloads.append(payload)
+    return payloads
+
+
+def callback_name(payload):
+    return payload["output"].strip(".")
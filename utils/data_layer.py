@@ -0,0 +1,171 @@
+"""
+Shared data access helpers for the dashboard
+Keeps file locations and chunked readers in one place so the pages,
+scripts and server routes all read the same files the same way
+"""
+
+import os
+import hashlib
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+PROCESSED_DIR = os.path.join(DATA_DIR, 'processed-data')
+
+BANK_DATA_PATH = os.path.join(PROCESSED_DIR, 'bank-data-processed.csv')
+PAST_DATA_PATH = os.path.join(PROCESSED_DIR, 'past-data.csv')
+SNAPSHOT_DIR = os.path.join(DATA_DIR, 'snapshots')
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
+
+MODEL_DIR = os.path.join(BASE_DIR, 'models')
+# models/CURRENT names the served model once scripts/retrain_model.py --promote has run
+MODEL_POINTER = os.path.join(MODEL_DIR, 'CURRENT')
+DEFAULT_MODEL = 'xgb_model_v2.pkl'
+
+
+def current_model_path():
+    """
+    Model the dashboard serves: the one named in models/CURRENT, else xgb_model_v2.pkl
+    """
+    try:
+        with open(MODEL_POINTER) as f:
+            name = f.read().strip()
+    except OSError:
+        name = ''
+    path = os.path.join(MODEL_DIR, name)
+    if name and os.path.exists(path):
+        return path
+    if name:
+        print(f"Model {path} named in {MODEL_POINTER} not found, serving {DEFAULT_MODEL}")
+    return os.path.join(MODEL_DIR, DEFAULT_MODEL)
+
+
+MODEL_PATH = current_model_path()
+
+# Age groups used across the dashboard
+AGE_BINS = [18, 25, 35, 45, 55, 65, 75, 90]
+AGE_LABELS = ["18-24", "25-34", "35-44", "45-54", "55-64", "65-74", "75+"]
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def add_age_group(dataframe):
+    """
+    Adds the AgeGroup column used by the churn charts
+    """
+    dataframe["AgeGroup"] = pd.cut(dataframe["Age"], bins=AGE_BINS, labels=AGE_LABELS, right=False)
+    return dataframe
+
+
+def file_signature(path):
+    """
+    Cheap fingerprint of a file (size and modification time) used to spot stale caches
+    """
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def data_files():
+    """
+    Files whose contents feed the dashboard pages
+    """
+    return [BANK_DATA_PATH, PAST_DATA_PATH, os.path.join(PROCESSED_DIR, 'feature_importance.csv'), MODEL_PATH]
+
+
+def data_version():
+    """
+    Short hash that changes whenever one of the dashboard's data files changes
+    """
+    signatures = [f"{os.path.basename(path)}:{file_signature(path)}" for path in data_files() if os.path.exists(path)]
+    return hashlib.sha1("|".join(signatures).encode()).hexdigest()[:12]
+
+
+def data_last_modified():
+    """
+    Modification time (unix seconds) of the newest dashboard data file
+    """
+    times = [os.stat(path).st_mtime for path in data_files() if os.path.exists(path)]
+    return max(times) if times else None
+
+
+def count_rows(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Counts data rows by streaming a single column (Parquet uses file metadata)
+    """
+    if path.endswith('.parquet') or os.path.isdir(path):
+        import pyarrow.dataset as ds
+        return ds.dataset(path, format='parquet', partitioning='hive').count_rows()
+    first_col = pd.read_csv(path, nrows=0).columns[:1].tolist()
+    return sum(len(chunk) for chunk in pd.read_csv(path, chunksize=chunksize, usecols=first_col))
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE, usecols=None):
+    """
+    Yields the file at path as DataFrame chunks
+    Supports CSV files and Parquet files/directories
+    """
+    if path.endswith('.parquet') or os.path.isdir(path):
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        for batch in dataset.to_batches(columns=usecols, batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=usecols)
+
+
+class ParquetChunkWriter:
+    """
+    Writes DataFrame chunks to one Parquet file
+    Each CSV chunk infers its own dtypes, so a later chunk may not fit the
+    schema of the first (an int column that gained decimals or NaNs, a text
+    column that was empty so far). The schema is then widened to a common
+    type and the row groups already written are rewritten with it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.schema = None
+        self.writer = None
+        self.rows = 0
+        # Columns with no values so far; pandas reads them as float, so any type may replace them
+        self.empty_columns = None
+
+    def _open(self, schema):
+        import pyarrow.parquet as pq
+        self.schema = schema
+        self.writer = pq.ParquetWriter(self.path, schema)
+
+    def _widen(self, other):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        written = pa.schema([pa.field(field.name, pa.null()) if field.name in self.empty_columns else field
+                             for field in self.schema])
+        schema = pa.unify_schemas([written, other], promote_options='permissive')
+        self.writer.close()
+        previous = self.path + '.widen'
+        os.replace(self.path, previous)
+        self._open(schema.remove_metadata())
+        for batch in pq.ParquetFile(previous).iter_batches():
+            self.writer.write_table(pa.Table.from_batches([batch]).cast(self.schema))
+        os.remove(previous)
+
+    def write(self, chunk):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            self.empty_columns = set(table.column_names)
+            self._open(table.schema)
+        elif not table.schema.equals(self.schema):
+            try:
+                table = table.cast(self.schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                self._widen(table.schema)
+                table = table.cast(self.schema)
+        self.empty_columns -= {name for name in table.column_names if table.column(name).null_count < len(table)}
+        self.writer.write_table(table)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
@@ -0,0 +1,366 @@
+"""
+Several customer datasets served by one dashboard process
+A dataset is a pair of customer files (churn data and segmented data),
+optionally narrowed to one Geography, so the regional books (France,
+Germany, Spain) can be browsed next to the full book. Pages pick the
+dataset from the ?dataset= URL parameter.
+
+Each dataset gets a DatasetEngine that loads its rows, aggregates and
+models on first use. Engines live in an LRU pool with a memory budget
+(DASHBOARD_MEMORY_BUDGET_MB): once the loaded engines exceed it, the least
+recently used ones are dropped and rebuilt on their next visit.
+
+Datasets can be declared in data/datasets.json, e.g.
+    {"germany": {"label": "Germany", "customers": "data/germany/bank-data-processed.csv",
+                 "segments": "data/germany/past-data.csv"}}
+paths are relative to the repository root and "geography" filters the rows.
+"""
+
+import os
+import json
+import pickle
+import threading
+from collections import OrderedDict, namedtuple
+from urllib.parse import parse_qs, urlencode
+
+import numpy as np
+import pandas as pd
+
+from utils.app_snapshot import load_snapshot
+from utils.data_layer import (BANK_DATA_PATH, BASE_DIR, DATA_DIR, PAST_DATA_PATH, PROCESSED_DIR,
+                              add_age_group, file_signature, iter_chunks)
+
+DATASETS_CONFIG = os.path.join(DATA_DIR, 'datasets.json')
+DEFAULT_DATASET = 'all'
+REGIONS = ['France', 'Germany', 'Spain']
+
+BUDGET_ENV = 'DASHBOARD_MEMORY_BUDGET_MB'
+DEFAULT_BUDGET_MB = 1024
+
+Dataset = namedtuple('Dataset', ['name', 'label', 'customers', 'segments', 'geography'])
+
+
+def default_datasets():
+    datasets = {DEFAULT_DATASET: Dataset(DEFAULT_DATASET, "All regions", BANK_DATA_PATH, PAST_DATA_PATH, None)}
+    for region in REGIONS:
+        datasets[region.lower()] = Dataset(region.lower(), region, BANK_DATA_PATH, PAST_DATA_PATH, region)
+    return datasets
+
+
+def load_datasets(path=DATASETS_CONFIG):
+    """
+    Datasets from data/datasets.json, or the full book plus one per region
+    """
+    if not os.path.exists(path):
+        return default_datasets()
+    try:
+        with open(path) as f:
+            config = json.load(f)
+        datasets = {}
+        for name, entry in config.items():
+            datasets[name] = Dataset(name, entry.get("label", name.title()),
+                                     os.path.join(BASE_DIR, entry.get("customers", BANK_DATA_PATH)),
+                                     os.path.join(BASE_DIR, entry.get("segments", PAST_DATA_PATH)),
+                                     entry.get("geography"))
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Error reading {path}: {str(e)}")
+        return default_datasets()
+    return datasets or default_datasets()
+
+
+DATASETS = load_datasets()
+
+
+def default_dataset():
+    return DEFAULT_DATASET if DEFAULT_DATASET in DATASETS else next(iter(DATASETS))
+
+
+def dataset_from_search(search):
+    """
+    Dataset named in a URL query string (?dataset=germany), else the default one
+    """
+    name = parse_qs((search or '').lstrip('?')).get('dataset', [None])[0]
+    return name if name in DATASETS else default_dataset()
+
+
+def dataset_search(name):
+    return '' if name == default_dataset() else '?' + urlencode({'dataset': name})
+
+
+def frame_bytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def pickled_bytes(result):
+    """
+    Pickled size, a stand-in for the memory held by sketches, dicts and small frames
+    """
+    return len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class DatasetEngine:
+    """
+    Everything the pages compute for one dataset, loaded lazily and kept
+    The full book read from the default files reuses the app snapshot and the
+    configured query backend; other datasets are computed from their rows
+    """
+
+    def __init__(self, dataset, pool=None):
+        self.dataset = dataset
+        self.pool = pool
+        self.shared = (dataset.geography is None and dataset.customers == BANK_DATA_PATH
+                       and dataset.segments == PAST_DATA_PATH)
+        self.lock = threading.RLock()
+        # Positions of the dataset's rows in the source file (None = every row)
+        self.rows = {}
+        self.results = {}
+        # Running total of the cached results' sizes, read by the pool without taking the lock
+        self.total_bytes = 0
+
+    def memory_bytes(self):
+        return self.total_bytes
+
+    def _cached(self, key, compute, size=None):
+        """
+        Computes a result once under the engine lock, then reports growth to the pool
+        """
+        with self.lock:
+            if key not in self.results:
+                self.results[key] = compute()
+                self.total_bytes += size(self.results[key]) if size else 0
+            result = self.results[key]
+        if self.pool is not None:
+            self.pool.trim(keep=self.dataset.name)
+        return result
+
+    def table(self, name):
+        """
+        The 'customers' or 'segments' rows of this dataset as one DataFrame
+        """
+        def load():
+            path = self.dataset.customers if name == 'customers' else self.dataset.segments
+            parts, rows, offset = [], [], 0
+            for chunk in iter_chunks(path):
+                if self.dataset.geography is not None:
+                    mask = (chunk['Geography'] == self.dataset.geography).to_numpy()
+                    rows.append(offset + np.flatnonzero(mask))
+                    offset += len(chunk)
+                    chunk = chunk[mask]
+                parts.append(chunk)
+            frame = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+            if 'Age' in frame:
+                add_age_group(frame)
+            self.rows[name] = np.concatenate(rows) if self.dataset.geography is not None and rows else None
+            return frame
+        return self._cached(('table', name), load, frame_bytes)
+
+    def backend(self, table):
+        from utils.query_backend import PandasBackend, configured_engine, get_backend
+        # The configured engine (snapshot, SQLite or DuckDB) keeps the full book out of RAM
+        if self.shared and configured_engine() != PandasBackend.name:
+            return get_backend()
+        return PandasBackend(tables={table: self.table(table)})
+
+    def run_query(self, query_name):
+        from utils.query_backend import QUERIES
+        result = self._cached(('query', query_name),
+                              lambda: self.backend(QUERIES[query_name].table).run(query_name), frame_bytes)
+        # Callers rename and sort the result, so each gets its own copy
+        return result.copy()
+
+    def _snapshot(self, stage):
+        snapshot = load_snapshot() if self.shared else None
+        return snapshot if snapshot is not None and snapshot.has(stage) else None
+
+    def outliers(self):
+        """
+        Record and outlier counts, the top 10 outliers and the binned anomaly scores
+        """
+        from utils.app_snapshot import frame_from_json
+        from utils.outliers import anomaly_histogram, detect_outliers
+
+        def compute():
+            snapshot = self._snapshot('outliers')
+            if snapshot is not None:
+                summary = snapshot.read_json('aggregates', 'outliers.json')
+                return {
+                    "total_records": summary['total_records'],
+                    "outlier_count": summary['outlier_count'],
+                    "top_outliers": frame_from_json(summary['top_outliers']),
+                    "histogram": snapshot.figure_data('anomaly_histogram'),
+                }
+            # drop() copies, so the scores never end up in the cached table
+            scored = detect_outliers(self.table('customers').drop(columns='AgeGroup', errors='ignore'),
+                                     contamination=0.05)
+            summary = {
+                "total_records": len(scored),
+                "outlier_count": int((scored['IsOutlier'] == -1).sum()),
+                "top_outliers": scored.nsmallest(10, 'OutlierScore')[['Age', 'Balance', 'CreditScore', 'Tenure', 'OutlierScore']],
+                "histogram": anomaly_histogram(scored['OutlierScore'].values),
+            }
+            return summary
+        return self._cached('outliers', compute, pickled_bytes)
+
+    def profile(self):
+        from utils.profiling import load_profile, profile_frame
+
+        def compute():
+            snapshot = self._snapshot('profile')
+            if snapshot is not None:
+                return snapshot.profile()
+            if self.shared:
+                return load_profile()
+            return profile_frame(self.table('customers').drop(columns='AgeGroup', errors='ignore'))
+        return self._cached('profile', compute, pickled_bytes)
+
+    def insights(self):
+        from utils.cohorts import cohort_insights, cube_from_chunks, insights_from_cube
+
+        def compute():
+            snapshot = self._snapshot('insights')
+            if snapshot is not None:
+                return snapshot.read_json('aggregates', 'insights.json')
+            if self.shared:
+                return cohort_insights()
+            cube = cube_from_chunks([self.table('customers')])
+            if cube is None:
+                raise ValueError(f"No customers in dataset '{self.dataset.name}'")
+            return insights_from_cube(cube)
+        return self._cached('insights', compute, pickled_bytes)
+
+    def correlation(self):
+        """
+        CovarianceAccumulator over the numeric columns and Churn_Probability
+        """
+        from utils.correlation import accumulate, correlation_state
+        from utils.sketches import CovarianceAccumulator
+
+        def compute():
+            snapshot = self._snapshot('correlation')
+            if snapshot is not None:
+                return CovarianceAccumulator.from_dict(snapshot.read_json('aggregates', 'correlation.json')["accumulator"])
+            if self.shared:
+                return CovarianceAccumulator.from_dict(correlation_state()["accumulator"])
+            accumulator = accumulate([self.table('customers').drop(columns='AgeGroup', errors='ignore')])
+            if accumulator is None:
+                raise ValueError(f"No customers in dataset '{self.dataset.name}'")
+            return accumulator
+        return self._cached('correlation', compute, pickled_bytes)
+
+    def feature_importance(self):
+        from utils.app_snapshot import frame_from_json
+        from utils.explanations import global_importance
+
+        def compute():
+            # One model serves every dataset, so its importances are the same everywhere
+            snapshot = self._snapshot('explanations')
+            if snapshot is not None:
+                return frame_from_json(snapshot.figure_data('feature_importance'))
+            importance = global_importance()
+            if importance is None:
+                importance = pd.read_csv(os.path.join(PROCESSED_DIR, 'feature_importance.csv'))
+            return importance
+        return self._cached('feature_importance', compute, frame_bytes)
+
+    def explain(self, row):
+        """
+        Contributions for the dataset's row-th customer, from the explanation store
+        of the default customer file
+        """
+        from utils.explanations import EXPLANATION_DIR, explain_customer
+        if self.dataset.customers != BANK_DATA_PATH:
+            return None
+        if self.dataset.geography is not None:
+            self.table('customers')
+            rows = self.rows['customers']
+            if rows is None or not 0 <= row < len(rows):
+                return None
+            row = int(rows[row])
+        snapshot = load_snapshot()
+        out_dir = snapshot.path('explanations') if snapshot is not None and snapshot.has('explanations') else EXPLANATION_DIR
+        return explain_customer(row, out_dir=out_dir, data_path=self.dataset.customers)
+
+    def customer_map(self):
+        """
+        The customer map, narrowed to this dataset's customers
+        """
+        from utils.embedding import EMBEDDING_DIR, CustomerMap, load_customer_map
+        snapshot = load_snapshot()
+        directory = snapshot.path('embedding') if snapshot is not None and snapshot.has('customer_map') else EMBEDDING_DIR
+        if self.dataset.segments != PAST_DATA_PATH:
+            return None
+        if self.dataset.geography is None:
+            return load_customer_map(directory)
+
+        def compute():
+            meta_path = os.path.join(directory, 'meta.json')
+            if not os.path.exists(meta_path):
+                return None
+            with open(meta_path) as f:
+                meta = json.load(f)
+            # Row positions only line up with a map built from the current file
+            if meta.get("signature") != file_signature(self.dataset.segments):
+                return None
+            self.table('segments')
+            rows = self.rows['segments']
+            return CustomerMap(directory, rows=rows) if rows is not None and len(rows) else None
+
+        def size(customer_map):
+            if customer_map is None:
+                return 0
+            return customer_map.coords.nbytes + customer_map.segments.nbytes + customer_map.churn.nbytes
+        return self._cached('customer_map', compute, size)
+
+
+class EnginePool:
+    """
+    One engine per dataset, least recently used engines are dropped past the budget
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.engines = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        with self.lock:
+            engine = self.engines.get(name)
+            if engine is None:
+                engine = DatasetEngine(DATASETS[name], pool=self)
+                self.engines[name] = engine
+            self.engines.move_to_end(name)
+            return engine
+
+    def memory_bytes(self):
+        return sum(engine.memory_bytes() for engine in list(self.engines.values()))
+
+    def trim(self, keep=None):
+        """
+        Evicts engines, oldest first, until the pool fits the budget
+        The engine being used (keep) stays even when it alone exceeds the budget
+        """
+        with self.lock:
+            while self.memory_bytes() > self.budget_bytes:
+                oldest = next((name for name in self.engines if name != keep), None)
+                if oldest is None:
+                    break
+                evicted = self.engines.pop(oldest)
+                print(f"Dataset pool over budget, evicted '{oldest}' ({evicted.memory_bytes() / 2**20:.0f} MB)")
+
+
+_pool = None
+
+
+def get_engine(name=None):
+    """
+    Engine for a dataset name (default dataset when None or unknown)
+    """
+    global _pool
+    if _pool is None:
+        budget_mb = float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_MB))
+        _pool = EnginePool(int(budget_mb * 2**20))
+    return _pool.get(name if name in DATASETS else default_dataset())
+
+
+def engine_for_search(search):
+    return get_engine(dataset_from_search(search))
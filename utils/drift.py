@@ -0,0 +1,298 @@
+"""
+Feature and score drift between the training data and new snapshots
+The reference (training) histograms are binned and stored once; a new
+extract is counted into the same bins in a single streaming pass, and the
+two are compared with the Population Stability Index (PSI) and a binned
+Kolmogorov-Smirnov statistic.
+"""
+
+import os
+import json
+import glob
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.data_layer import BANK_DATA_PATH, CACHE_DIR, DEFAULT_CHUNKSIZE, MODEL_PATH, file_signature, iter_chunks
+from utils.features import build_feature_matrix, category_text, load_model
+from utils.sketches import KLLSketch
+
+DRIFT_DIR = os.path.join(CACHE_DIR, 'drift')
+REFERENCE_PATH = os.path.join(DRIFT_DIR, 'reference.json')
+
+NUMERIC_FEATURES = ['Age', 'Balance', 'CreditScore', 'EstimatedSalary', 'Tenure']
+CATEGORICAL_FEATURES = ['Geography', 'Gender', 'NumOfProducts', 'IsActiveMember']
+SCORE_COLUMN = 'Churn_Probability'
+
+# Numeric features are cut at reference deciles
+N_BINS = 10
+# Usual PSI reading: < 0.1 stable, 0.1 - 0.2 moderate shift, >= 0.2 significant shift
+PSI_WARNING = 0.1
+PSI_ALERT = 0.2
+# Empty bins get this share so PSI stays finite
+MIN_SHARE = 1e-4
+OTHER = '(other)'
+
+
+class ChurnScorer:
+    """
+    Adds Churn_Probability to chunks that do not carry it, loading the model once
+    """
+
+    def __init__(self, model_path=MODEL_PATH):
+        self.model_path = model_path
+        self.model = None
+
+    def __call__(self, chunk):
+        if SCORE_COLUMN in chunk:
+            return chunk
+        if self.model is None:
+            self.model = load_model(self.model_path)
+        chunk = chunk.copy()
+        chunk[SCORE_COLUMN] = self.model.predict_proba(build_feature_matrix(chunk))[:, 1]
+        return chunk
+
+
+def numeric_values(series):
+    return np.asarray(series, dtype=np.float64)
+
+
+class BinnedHistograms:
+    """
+    Counts per bin for every monitored column
+    Numeric bins are (edges[i-1], edges[i]] with open ends; categories
+    not present in the reference are counted under OTHER
+    """
+
+    def __init__(self, edges, categories):
+        self.edges = {name: list(values) for name, values in edges.items()}
+        self.categories = {name: list(values) for name, values in categories.items()}
+        self.counts = {name: np.zeros(len(values) + 1, dtype=np.int64) for name, values in self.edges.items()}
+        self.counts.update({name: np.zeros(len(values) + 1, dtype=np.int64) for name, values in self.categories.items()})
+        self.rows = 0
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for name, edges in self.edges.items():
+            if name not in chunk:
+                continue
+            values = numeric_values(chunk[name])
+            values = values[~np.isnan(values)]
+            bins = np.searchsorted(np.asarray(edges), values, side='left')
+            self.counts[name] += np.bincount(bins, minlength=len(edges) + 1)
+        for name, categories in self.categories.items():
+            if name not in chunk:
+                continue
+            counts = category_text(chunk[name].dropna()).value_counts()
+            index = {category: i for i, category in enumerate(categories)}
+            for category, count in counts.items():
+                self.counts[name][index.get(category, len(categories))] += int(count)
+        return self
+
+    def merge(self, other):
+        for name, counts in other.counts.items():
+            self.counts[name] += counts
+        self.rows += other.rows
+        return self
+
+    def labels(self, name):
+        if name in self.categories:
+            return self.categories[name] + [OTHER]
+        edges = self.edges[name]
+        bounds = ['-inf'] + [f"{edge:,.0f}" if abs(edge) >= 100 else f"{edge:.3g}" for edge in edges] + ['inf']
+        return [f"({low}, {high}]" for low, high in zip(bounds[:-1], bounds[1:])]
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "edges": self.edges,
+            "categories": self.categories,
+            "counts": {name: counts.tolist() for name, counts in self.counts.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histograms = cls(data["edges"], data["categories"])
+        histograms.rows = data["rows"]
+        for name, counts in data["counts"].items():
+            histograms.counts[name] = np.asarray(counts, dtype=np.int64)
+        return histograms
+
+
+def psi(expected, actual):
+    """
+    Population Stability Index between two count vectors over the same bins
+    """
+    expected = np.maximum(expected / max(expected.sum(), 1), MIN_SHARE)
+    actual = np.maximum(actual / max(actual.sum(), 1), MIN_SHARE)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(expected, actual):
+    """
+    Largest gap between the two cumulative distributions, measured at bin edges
+    """
+    expected_cdf = np.cumsum(expected) / max(expected.sum(), 1)
+    actual_cdf = np.cumsum(actual) / max(actual.sum(), 1)
+    return float(np.max(np.abs(expected_cdf - actual_cdf)))
+
+
+def drift_status(value, threshold=PSI_ALERT):
+    if value >= threshold:
+        return 'alert'
+    return 'warning' if value >= PSI_WARNING else 'stable'
+
+
+def build_reference(path=BANK_DATA_PATH, model_path=MODEL_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Bins the training data: one pass sketches quantiles (for the bin edges) and
+    collects categories, a second pass counts rows into the bins
+    """
+    scorer = ChurnScorer(model_path)
+    numeric = NUMERIC_FEATURES + [SCORE_COLUMN]
+    sketches = {name: KLLSketch() for name in numeric}
+    categories = {name: set() for name in CATEGORICAL_FEATURES}
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        chunk = scorer(chunk)
+        for name in numeric:
+            if name in chunk:
+                sketches[name].update(numeric_values(chunk[name]))
+        for name in categories:
+            if name in chunk:
+                categories[name].update(category_text(chunk[name].dropna()).unique())
+
+    qs = np.arange(1, N_BINS) / N_BINS
+    edges = {name: sorted(set(sketch.quantiles(qs))) for name, sketch in sketches.items() if sketch.n}
+    histograms = BinnedHistograms(edges, {name: sorted(values) for name, values in categories.items() if values})
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        histograms.update(scorer(chunk))
+
+    return {
+        "source": os.path.basename(path),
+        "signature": reference_signature(path, model_path),
+        "built_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "histograms": histograms.to_dict(),
+    }
+
+
+def reference_signature(path=BANK_DATA_PATH, model_path=MODEL_PATH):
+    # The score histogram depends on the model as well as the data
+    model = file_signature(model_path) if os.path.exists(model_path) else 'missing'
+    return f"{file_signature(path)}|{model}"
+
+
+def save_json(data, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def load_reference(path=BANK_DATA_PATH, model_path=MODEL_PATH, rebuild=False):
+    """
+    Returns the stored reference, building it only when missing or stale
+    """
+    if not rebuild and os.path.exists(REFERENCE_PATH):
+        with open(REFERENCE_PATH) as f:
+            reference = json.load(f)
+        if reference.get("signature") == reference_signature(path, model_path):
+            return reference
+    reference = build_reference(path, model_path)
+    save_json(reference, REFERENCE_PATH)
+    return reference
+
+
+def snapshot_histograms(reference, path, model_path=MODEL_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Counts a new extract into the reference bins in one streaming pass
+    """
+    template = reference["histograms"]
+    histograms = BinnedHistograms(template["edges"], template["categories"])
+    scorer = ChurnScorer(model_path)
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        histograms.update(scorer(chunk))
+    return histograms
+
+
+def compare(reference, histograms, threshold=PSI_ALERT):
+    """
+    One result per monitored column, most drifted first
+    """
+    expected = BinnedHistograms.from_dict(reference["histograms"])
+    results = []
+    for name, counts in histograms.counts.items():
+        if counts.sum() == 0:
+            continue
+        value = psi(expected.counts[name], counts)
+        numeric = name in expected.edges
+        results.append({
+            "feature": name,
+            "kind": "score" if name == SCORE_COLUMN else ("numeric" if numeric else "categorical"),
+            "psi": value,
+            # KS needs ordered bins, so it is not defined for categories
+            "ks": binned_ks(expected.counts[name], counts) if numeric else None,
+            "status": drift_status(value, threshold),
+            "bins": histograms.labels(name),
+            "reference_share": (expected.counts[name] / max(expected.counts[name].sum(), 1)).tolist(),
+            "snapshot_share": (counts / counts.sum()).tolist(),
+        })
+    return sorted(results, key=lambda result: result["psi"], reverse=True)
+
+
+def report_path(label):
+    return os.path.join(DRIFT_DIR, f"report-{label}.json")
+
+
+def check_drift(path, label, threshold=PSI_ALERT, reference_path=BANK_DATA_PATH, model_path=MODEL_PATH,
+                chunksize=DEFAULT_CHUNKSIZE, rebuild_reference=False):
+    """
+    Compares an extract with the training reference and stores the report
+    """
+    reference = load_reference(reference_path, model_path, rebuild=rebuild_reference)
+    histograms = snapshot_histograms(reference, path, model_path, chunksize)
+    if histograms.rows == 0:
+        raise ValueError(f"No rows found in {path}")
+    results = compare(reference, histograms, threshold)
+    report = {
+        "label": label,
+        "source": os.path.basename(os.path.normpath(path)),
+        "reference": reference["source"],
+        "rows": histograms.rows,
+        "threshold": threshold,
+        "checked_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "alerts": [result["feature"] for result in results if result["status"] == 'alert'],
+        "features": results,
+    }
+    save_json(report, report_path(label))
+    return report
+
+
+# (report file signatures, latest report) from the previous load_latest_report call
+_latest_report = (None, None)
+
+
+def load_latest_report():
+    """
+    Most recently checked drift report, or None
+    The files are only re-read when a report was written, changed or removed since the last call
+    """
+    global _latest_report
+    paths = sorted(glob.glob(os.path.join(DRIFT_DIR, 'report-*.json')))
+    try:
+        signatures = tuple((path, file_signature(path)) for path in paths)
+    except OSError:
+        signatures = None
+    if signatures is not None and signatures == _latest_report[0]:
+        return _latest_report[1]
+
+    reports = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                reports.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    report = max(reports, key=lambda report: report["checked_at"]) if reports else None
+    _latest_report = (signatures, report)
+    return report
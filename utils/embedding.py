@@ -0,0 +1,205 @@
+"""
+2-D customer map for the segmentation page
+An offline job projects the model feature matrix to two dimensions in
+batches (incremental PCA, or UMAP fitted on a sample) and stores compact
+float32 coordinates with each customer's segment and churn probability.
+The page never ships all points: views with many customers are aggregated
+into a grid on the server, and the grid is recomputed for every zoom.
+"""
+
+import os
+import json
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from utils.data_layer import CACHE_DIR, DEFAULT_CHUNKSIZE, MODEL_PATH, PAST_DATA_PATH, file_signature, iter_chunks
+from utils.drift import SCORE_COLUMN, ChurnScorer
+from utils.features import build_feature_matrix
+
+EMBEDDING_DIR = os.path.join(CACHE_DIR, 'embedding')
+SEGMENT_COLUMN = 'GMM_Cluster'
+METHODS = ['pca', 'umap']
+
+# Views with at most this many customers are drawn point by point
+MAX_RAW_POINTS = 20_000
+# Otherwise the view is cut into GRID_SIZE x GRID_SIZE cells
+GRID_SIZE = 150
+# UMAP cannot be fitted incrementally, so it learns the map from a sample
+UMAP_SAMPLE = 50_000
+
+# A rendered view: raw points or grid cells (count > 1) with their colors
+MapView = namedtuple('MapView', ['x', 'y', 'count', 'churn', 'segment', 'total', 'aggregated'])
+
+
+def scaled_batches(path, scaler, chunksize):
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        yield chunk, scaler.transform(build_feature_matrix(chunk).fillna(0).to_numpy(dtype=np.float64))
+
+
+def fit_projection(path, method, chunksize, seed=42):
+    """
+    Fits the scaler and the 2-D projection, streaming the file batch by batch
+    """
+    from sklearn.decomposition import IncrementalPCA
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    rows = 0
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        scaler.partial_fit(build_feature_matrix(chunk).fillna(0).to_numpy(dtype=np.float64))
+        rows += len(chunk)
+    if rows == 0:
+        raise ValueError(f"No rows found in {path}")
+
+    if method == 'pca':
+        projection = IncrementalPCA(n_components=2)
+        for _, features in scaled_batches(path, scaler, chunksize):
+            # IncrementalPCA needs at least as many rows as components per batch
+            if len(features) >= 2:
+                projection.partial_fit(features)
+        return scaler, projection, rows
+
+    try:
+        import umap
+    except ImportError:
+        raise ValueError("UMAP needs the umap-learn package (pip install umap-learn)")
+    rng = np.random.default_rng(seed)
+    keep = UMAP_SAMPLE / rows
+    sample = np.concatenate([features[rng.random(len(features)) < keep]
+                             for _, features in scaled_batches(path, scaler, chunksize)])
+    projection = umap.UMAP(n_components=2, random_state=seed).fit(sample)
+    return scaler, projection, rows
+
+
+def build_embedding(path=PAST_DATA_PATH, out_dir=EMBEDDING_DIR, method='pca', model_path=MODEL_PATH,
+                    chunksize=DEFAULT_CHUNKSIZE, seed=42):
+    """
+    Writes coords.npy (float32, n x 2), segment.npy (int16, -1 when unknown),
+    churn.npy (float32) and meta.json to out_dir
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of: {', '.join(METHODS)}")
+    scaler, projection, rows = fit_projection(path, method, chunksize, seed)
+
+    tmp_dir = out_dir + '.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    coords = open_memmap(os.path.join(tmp_dir, 'coords.npy'), mode='w+', dtype=np.float32, shape=(rows, 2))
+    segments = open_memmap(os.path.join(tmp_dir, 'segment.npy'), mode='w+', dtype=np.int16, shape=(rows,))
+    churn = open_memmap(os.path.join(tmp_dir, 'churn.npy'), mode='w+', dtype=np.float32, shape=(rows,))
+    scorer = ChurnScorer(model_path)
+    start = 0
+    for chunk, features in scaled_batches(path, scaler, chunksize):
+        end = start + len(chunk)
+        coords[start:end] = projection.transform(features)
+        if SEGMENT_COLUMN in chunk:
+            segments[start:end] = chunk[SEGMENT_COLUMN].fillna(-1).to_numpy()
+        else:
+            segments[start:end] = -1
+        churn[start:end] = scorer(chunk)[SCORE_COLUMN].to_numpy()
+        start = end
+    for array in (coords, segments, churn):
+        array.flush()
+    del coords, segments, churn
+
+    meta = {
+        "source": os.path.basename(path),
+        "signature": file_signature(path),
+        "method": method,
+        "rows": rows,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    if method == 'pca':
+        meta["explained_variance_ratio"] = projection.explained_variance_ratio_.tolist()
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap the finished files in so the app never reads a half-written map
+    for name in ('coords.npy', 'segment.npy', 'churn.npy', 'meta.json'):
+        os.makedirs(out_dir, exist_ok=True)
+        os.replace(os.path.join(tmp_dir, name), os.path.join(out_dir, name))
+    os.rmdir(tmp_dir)
+    return meta
+
+
+class CustomerMap:
+    """
+    Memory-mapped embedding with viewport queries
+    Given rows (positions in the source file), only those customers are kept,
+    copied into memory
+    """
+
+    def __init__(self, directory=EMBEDDING_DIR, rows=None):
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.coords = np.load(os.path.join(directory, 'coords.npy'), mmap_mode='r')
+        self.segments = np.load(os.path.join(directory, 'segment.npy'), mmap_mode='r')
+        self.churn = np.load(os.path.join(directory, 'churn.npy'), mmap_mode='r')
+        if rows is not None:
+            self.coords, self.segments, self.churn = self.coords[rows], self.segments[rows], self.churn[rows]
+        self.x = self.coords[:, 0]
+        self.y = self.coords[:, 1]
+        self.bounds = (float(self.x.min()), float(self.x.max()), float(self.y.min()), float(self.y.max()))
+        self.segment_ids = np.unique(self.segments)
+        self.full_view = None
+
+    def view(self, x0=None, x1=None, y0=None, y1=None):
+        """
+        Customers inside the viewport, as raw points when there are few enough,
+        otherwise as grid cells with their count, mean churn and main segment
+        """
+        if x0 is None and y0 is None:
+            # The zoomed-out view is what every page load asks for, so keep it
+            if self.full_view is None:
+                self.full_view = self.aggregate(*self.bounds)
+            return self.full_view
+        bx0, bx1, by0, by1 = self.bounds
+        x0, x1 = (bx0, bx1) if x0 is None else (x0, x1)
+        y0, y1 = (by0, by1) if y0 is None else (y0, y1)
+        return self.aggregate(x0, x1, y0, y1)
+
+    def aggregate(self, x0, x1, y0, y1):
+        inside = (self.x >= x0) & (self.x <= x1) & (self.y >= y0) & (self.y <= y1)
+        total = int(np.count_nonzero(inside))
+        if total <= MAX_RAW_POINTS:
+            index = np.flatnonzero(inside)
+            return MapView(self.x[index], self.y[index], np.ones(total, dtype=np.int64),
+                           self.churn[index], self.segments[index], total, False)
+
+        index = np.flatnonzero(inside)
+        # Cell of every customer in view; bincount does all the sums in one pass each
+        width = (x1 - x0) or 1.0
+        height = (y1 - y0) or 1.0
+        ix = np.minimum(((self.x[index] - x0) / width * GRID_SIZE).astype(np.int64), GRID_SIZE - 1)
+        iy = np.minimum(((self.y[index] - y0) / height * GRID_SIZE).astype(np.int64), GRID_SIZE - 1)
+        cell = ix * GRID_SIZE + iy
+        n_cells = GRID_SIZE * GRID_SIZE
+        counts = np.bincount(cell, minlength=n_cells)
+        churn_sum = np.bincount(cell, weights=self.churn[index], minlength=n_cells)
+        segment_pos = np.searchsorted(self.segment_ids, self.segments[index])
+        per_segment = np.bincount(cell * len(self.segment_ids) + segment_pos,
+                                  minlength=n_cells * len(self.segment_ids)).reshape(n_cells, -1)
+
+        cells = np.flatnonzero(counts)
+        return MapView(x0 + (cells // GRID_SIZE + 0.5) * width / GRID_SIZE,
+                       y0 + (cells % GRID_SIZE + 0.5) * height / GRID_SIZE,
+                       counts[cells], churn_sum[cells] / counts[cells],
+                       self.segment_ids[per_segment[cells].argmax(axis=1)], total, True)
+
+@lru_cache(maxsize=1)
+def _load_map(directory, signature):
+    return CustomerMap(directory)
+
+
+def load_customer_map(directory=EMBEDDING_DIR):
+    """
+    Returns the stored map, or None when scripts/build_embedding.py has not run
+    Reloaded automatically when the files are rebuilt
+    """
+    meta_path = os.path.join(directory, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    return _load_map(directory, file_signature(meta_path))
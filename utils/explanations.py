@@ -0,0 +1,163 @@
+"""
+Per-customer churn explanations from the XGBoost model
+Feature contributions (SHAP values from the booster's pred_contribs) are
+computed offline in parallel batches and stored as a float16 .npy matrix,
+which the dashboard memory-maps and reads by row offset
+"""
+
+import os
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from utils.data_layer import BANK_DATA_PATH, BASE_DIR, CACHE_DIR, MODEL_PATH, count_rows, file_signature, iter_chunks
+from utils.features import build_feature_matrix, load_model, model_feature_names
+
+EXPLANATION_DIR = os.path.join(CACHE_DIR, 'explanations')
+CONTRIBUTIONS_FILE = 'contributions.npy'
+META_FILE = 'meta.json'
+BIAS_NAME = 'Bias'
+
+DEFAULT_BATCH_SIZE = 50_000
+
+# Models loaded inside worker processes, reused across batches
+_worker_models = {}
+
+
+def _explain_batch(model_path, store_path, offset, features):
+    """
+    Computes one batch of contributions and writes it straight into the shared matrix
+    """
+    # Only the offline build needs xgboost; the app just reads the stored matrix
+    import xgboost as xgb
+    if model_path not in _worker_models:
+        model = load_model(model_path)
+        booster = model.get_booster()
+        # Parallelism comes from the batches, keep each booster single threaded
+        booster.set_param({'nthread': 1})
+        _worker_models[model_path] = booster
+    booster = _worker_models[model_path]
+
+    contributions = booster.predict(xgb.DMatrix(features), pred_contribs=True)
+    store = np.load(store_path, mmap_mode='r+')
+    store[offset:offset + len(contributions)] = contributions.astype(np.float16)
+    store.flush()
+    # mean |contribution| needs the full precision sums, so return them for the meta file
+    return np.abs(contributions).sum(axis=0, dtype=np.float64)
+
+
+def build_explanation_store(data_path=BANK_DATA_PATH, model_path=MODEL_PATH, out_dir=EXPLANATION_DIR,
+                            batch_size=DEFAULT_BATCH_SIZE, n_jobs=-1):
+    """
+    Computes contributions for every customer in data_path and stores them in out_dir
+    Rows in the matrix follow the row order of data_path; the last column is the bias
+    """
+    model = load_model(model_path)
+    feature_names = model_feature_names(model)
+    n_rows = count_rows(data_path, chunksize=batch_size)
+
+    os.makedirs(out_dir, exist_ok=True)
+    store_path = os.path.join(out_dir, CONTRIBUTIONS_FILE + '.tmp.npy')
+    store = np.lib.format.open_memmap(store_path, mode='w+', dtype=np.float16,
+                                      shape=(n_rows, len(feature_names) + 1))
+    del store
+
+    def batches():
+        offset = 0
+        for chunk in iter_chunks(data_path, chunksize=batch_size):
+            yield offset, build_feature_matrix(chunk, feature_names)
+            offset += len(chunk)
+
+    abs_sums = Parallel(n_jobs=n_jobs, pre_dispatch='2*n_jobs')(
+        delayed(_explain_batch)(model_path, store_path, offset, features)
+        for offset, features in batches()
+    )
+    abs_sum = np.sum(abs_sums, axis=0) if abs_sums else np.zeros(len(feature_names) + 1)
+
+    mean_abs = abs_sum[:-1] / max(n_rows, 1)
+    total = mean_abs.sum()
+    meta = {
+        "features": feature_names + [BIAS_NAME],
+        "rows": n_rows,
+        "dtype": "float16",
+        "data_path": stored_path(data_path),
+        "data_signature": file_signature(data_path),
+        "model_path": stored_path(model_path),
+        "model_signature": file_signature(model_path),
+        "global_importance": dict(zip(feature_names, (mean_abs / total if total else mean_abs).tolist())),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+    os.replace(store_path, os.path.join(out_dir, CONTRIBUTIONS_FILE))
+    with open(os.path.join(out_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def stored_path(path):
+    """
+    Path as saved in meta.json: relative to the repository when inside it, so checkouts can move
+    """
+    path = os.path.abspath(path)
+    return os.path.relpath(path, BASE_DIR) if path.startswith(BASE_DIR + os.sep) else path
+
+
+def source_path(meta, key):
+    return os.path.join(BASE_DIR, meta[key])
+
+
+def load_explanation_meta(out_dir=EXPLANATION_DIR, data_path=None, model_path=None):
+    """
+    Returns the store metadata, or None if the store is missing or the data or
+    model file it was built from has changed since
+    data_path / model_path additionally require the store to describe those files
+    (row offsets only line up with the data file the store was built from)
+    """
+    try:
+        with open(os.path.join(out_dir, META_FILE)) as f:
+            meta = json.load(f)
+        for key, expected in (("data_path", data_path), ("model_path", model_path)):
+            source = source_path(meta, key)
+            if file_signature(source) != meta[key.replace('_path', '_signature')]:
+                return None
+            if expected is not None and os.path.abspath(expected) != os.path.abspath(source):
+                return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return meta
+
+
+def load_contributions(out_dir=EXPLANATION_DIR):
+    """
+    Memory-maps the contribution matrix without reading it
+    """
+    return np.load(os.path.join(out_dir, CONTRIBUTIONS_FILE), mmap_mode='r')
+
+
+def explain_customer(row, top_k=8, out_dir=EXPLANATION_DIR, data_path=None):
+    """
+    Returns the top_k feature contributions for the customer at row offset,
+    ordered by absolute size (positive values push towards churn)
+    """
+    meta = load_explanation_meta(out_dir, data_path=data_path)
+    if meta is None or not 0 <= row < meta["rows"]:
+        return None
+    values = np.asarray(load_contributions(out_dir)[row], dtype=np.float32)
+    explanation = pd.DataFrame({"Feature": meta["features"][:-1], "Contribution": values[:-1]})
+    explanation = explanation.reindex(explanation["Contribution"].abs().sort_values(ascending=False).index)
+    return explanation.head(top_k).reset_index(drop=True)
+
+
+def global_importance(out_dir=EXPLANATION_DIR):
+    """
+    Mean absolute contribution per feature, normalised to sum to 1
+    Returns None when no up-to-date store exists
+    """
+    meta = load_explanation_meta(out_dir)
+    if meta is None:
+        return None
+    importance = pd.DataFrame(list(meta["global_importance"].items()), columns=["Feature", "Importance"])
+    return importance.sort_values("Importance", ascending=False).reset_index(drop=True)
@@ -0,0 +1,217 @@
+"""
+Streaming export routes for retention campaigns
+Results are read chunk by chunk from the data layer and written to the
+response as they are produced, so large lists never sit in memory as a file
+"""
+
+import zlib
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import Response, request, stream_with_context, abort
+
+from utils.app_snapshot import load_snapshot
+from utils.data_layer import BANK_DATA_PATH, PAST_DATA_PATH, DEFAULT_CHUNKSIZE, iter_chunks
+from utils.datasets import DATASETS, default_dataset
+from utils.outliers import fit_outlier_file, score_outliers
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Parquet row groups are flushed to the client once they reach this many bytes
+STREAM_FLUSH_BYTES = 1 << 20
+
+
+class StreamSink:
+    """
+    Write-only file object that hands written bytes back to a generator
+    Parquet footers store absolute offsets, so tell() counts every byte written
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffer.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.buffer)
+        self.buffer = []
+        return data
+
+
+def csv_stream(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+def parquet_stream(chunks):
+    sink = StreamSink()
+    writer = None
+    schema = None
+    for chunk in chunks:
+        if writer is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        if sum(len(b) for b in sink.buffer) >= STREAM_FLUSH_BYTES:
+            yield sink.drain()
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+
+def gzip_stream(parts):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for part in parts:
+        data = compressor.compress(part)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def top_churn_risk_chunks(n, segment=None, path=PAST_DATA_PATH, chunksize=DEFAULT_CHUNKSIZE, geography=None):
+    """
+    Yields the n customers with the highest Churn_Probability, optionally in one segment and region
+    The first pass only keeps the columns needed to find the cut-off, the second
+    pass streams the matching rows in file order
+    """
+    def in_segment(chunk):
+        if geography is not None:
+            chunk = chunk[chunk["Geography"] == geography]
+        if segment is None:
+            return chunk
+        return chunk[chunk["GMM_Cluster"].astype(str) == str(segment)]
+
+    usecols = ["Churn_Probability", "GMM_Cluster"] + (["Geography"] if geography is not None else [])
+    scores = [in_segment(chunk)["Churn_Probability"].to_numpy()
+              for chunk in iter_chunks(path, chunksize=chunksize, usecols=usecols)]
+    scores = np.concatenate(scores) if scores else np.array([])
+    if n <= 0 or len(scores) == 0:
+        return
+
+    n = min(n, len(scores))
+    threshold = np.partition(scores, len(scores) - n)[len(scores) - n]
+    # Rows tied with the cut-off are only taken until n is reached
+    ties_left = n - int((scores > threshold).sum())
+
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        chunk = in_segment(chunk)
+        above = chunk["Churn_Probability"] > threshold
+        tied = chunk["Churn_Probability"] == threshold
+        if ties_left > 0:
+            keep_tied = tied & (tied.cumsum() <= ties_left)
+            ties_left -= int(keep_tied.sum())
+        else:
+            keep_tied = False
+        selected = chunk[above | keep_tied]
+        if len(selected):
+            yield selected
+
+
+def outlier_chunks(path=BANK_DATA_PATH, chunksize=DEFAULT_CHUNKSIZE, contamination=0.05, geography=None):
+    """
+    Yields every Isolation Forest outlier with its anomaly score, optionally within one region
+    A region's model is fitted on that region's rows, like its data overview page
+    Scores stored by the current snapshot are reused instead of refitting the model
+    """
+    shared = path == BANK_DATA_PATH and geography is None and contamination == 0.05
+    snapshot = load_snapshot() if shared else None
+    stored = snapshot is not None and snapshot.has('outliers')
+    if stored:
+        scores = snapshot.scores('outlier_score')
+        flags = snapshot.scores('is_outlier')
+    else:
+        iso_forest, numerical_cols, _ = fit_outlier_file(path, chunksize=chunksize, contamination=contamination,
+                                                         geography=geography)
+    start = 0
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        if stored:
+            end = start + len(chunk)
+            chunk['IsOutlier'] = flags[start:end]
+            chunk['OutlierScore'] = scores[start:end]
+            start = end
+        else:
+            if geography is not None:
+                chunk = chunk[chunk["Geography"] == geography]
+                if chunk.empty:
+                    continue
+            chunk = score_outliers(iso_forest, numerical_cols, chunk)
+        selected = chunk[chunk["IsOutlier"] == -1]
+        if len(selected):
+            yield selected
+
+
+def export_response(chunks, name):
+    """
+    Wraps a chunk generator in a streaming download using the format/compress query args
+    """
+    export_format = request.args.get("format", "csv").lower()
+    if export_format not in EXPORT_FORMATS:
+        abort(400, description=f"Unsupported format '{export_format}'")
+    compress = request.args.get("compress", "").lower()
+    if compress not in ("", "gzip"):
+        abort(400, description=f"Unsupported compression '{compress}'")
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    body = csv_stream(chunks) if export_format == "csv" else parquet_stream(chunks)
+    filename = f"{name}.{extension}"
+    if compress == "gzip":
+        body = gzip_stream(body)
+        mimetype = "application/gzip"
+        filename += ".gz"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def request_dataset():
+    """
+    Dataset named by the dataset query arg (the default dataset when absent)
+    """
+    name = request.args.get("dataset") or default_dataset()
+    if name not in DATASETS:
+        abort(400, description=f"Unknown dataset '{name}'")
+    return DATASETS[name]
+
+
+def register_export_routes(server):
+    """
+    Adds the /export routes to the Flask server behind the Dash app
+    """
+
+    @server.route("/export/churn-risk")
+    def export_churn_risk():
+        dataset = request_dataset()
+        n = request.args.get("n", 1000, type=int)
+        segment = request.args.get("segment")
+        name = f"churn-risk-{dataset.name}-top{n}" + (f"-segment{segment}" if segment is not None else "")
+        chunks = top_churn_risk_chunks(n, segment=segment, path=dataset.segments, geography=dataset.geography)
+        return export_response(chunks, name)
+
+    @server.route("/export/outliers")
+    def export_outliers():
+        dataset = request_dataset()
+        chunks = outlier_chunks(path=dataset.customers, geography=dataset.geography)
+        return export_response(chunks, f"outliers-{dataset.name}")
@@ -0,0 +1,56 @@
+"""
+Feature preparation for the XGBoost churn model
+Builds the same one-hot feature matrix the model was trained on
+"""
+
+import pickle
+
+import pandas as pd
+
+from utils.data_layer import MODEL_PATH
+
+# Features used by xgb_model_v2.pkl, in training order
+FEATURE_NAMES = [
+    'CreditScore', 'Age', 'Tenure', 'Balance', 'HasCrCard', 'IsActiveMember',
+    'EstimatedSalary', 'Geography_Germany', 'Geography_Spain', 'Gender_Male',
+    'NumOfProducts_2', 'NumOfProducts_3', 'NumOfProducts_4',
+]
+
+# Categorical columns that are one-hot encoded (first category dropped)
+ONE_HOT_COLUMNS = ['Geography', 'Gender', 'NumOfProducts']
+
+
+def load_model(path=MODEL_PATH):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def model_feature_names(model):
+    names = model.get_booster().feature_names
+    return list(names) if names else list(FEATURE_NAMES)
+
+
+def category_text(series):
+    # NumOfProducts may come back as 2.0 from CSV files with missing values
+    return series.astype(str).str.replace(r'\.0$', '', regex=True)
+
+
+def build_feature_matrix(dataframe, feature_names=FEATURE_NAMES):
+    """
+    Returns the model feature matrix for a DataFrame of customers
+    One-hot columns are built explicitly so every chunk gets the same columns,
+    even when a category is missing from that chunk
+    """
+    features = {}
+    categories = {}
+    for name in feature_names:
+        if name in dataframe.columns:
+            features[name] = pd.to_numeric(dataframe[name], errors='coerce')
+            continue
+        column, _, value = name.rpartition('_')
+        if column not in ONE_HOT_COLUMNS:
+            raise KeyError(f"Column '{name}' needed by the model is missing")
+        if column not in categories:
+            categories[column] = category_text(dataframe[column])
+        features[name] = (categories[column] == value).astype(float)
+    return pd.DataFrame(features, index=dataframe.index)
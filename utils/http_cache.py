@@ -0,0 +1,139 @@
+"""
+Response compression and HTTP cache validators for the Flask server
+Layouts and other GET payloads get an ETag tied to the data version, so
+repeat visits are answered with 304 Not Modified, and every text payload
+is sent gzip (or brotli, when installed) compressed
+"""
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import request
+
+from utils.assets import DIST_MAX_AGE, DIST_URL_PREFIX
+from utils.data_layer import data_last_modified, data_version
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/x-javascript",
+    "image/svg+xml",
+)
+
+# Small bodies are not worth the CPU or the extra headers
+MIN_COMPRESS_BYTES = 500
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Dash's JS bundles and the fingerprinted stylesheet bundle never change while
+# the server runs, so their compressed bodies are kept instead of being
+# recompressed per request
+STATIC_PREFIXES = ("/_dash-component-suites/", DIST_URL_PREFIX)
+STATIC_CACHE_SIZE = 64
+
+# GET endpoints whose body only depends on the code and the data version
+VALIDATED_PREFIXES = ("/_dash-layout", "/_dash-dependencies")
+
+
+def choose_encoding(accept_encoding):
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def is_compressible(response):
+    if request.path.startswith(DIST_URL_PREFIX) and response.status_code == 200:
+        # Flask serves static files as a passthrough file wrapper; read it so it can be compressed
+        response.direct_passthrough = False
+        response.set_data(response.get_data())
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    return (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)
+
+
+def is_validated_request(response):
+    if request.method not in ("GET", "HEAD") or response.status_code != 200:
+        return False
+    if request.path.startswith(VALIDATED_PREFIXES):
+        return True
+    # Page loads (/, /segmentation, ...) return the Dash index HTML
+    return response.mimetype == "text/html"
+
+
+def init_http_caching(server):
+    """
+    Registers the compression and cache-validation hooks on the Flask server
+    """
+    static_cache = OrderedDict()
+
+    # Flask runs after_request hooks in reverse order, so validators are
+    # computed on the uncompressed body before compression kicks in
+    @server.after_request
+    def compress_response(response):
+        if not is_compressible(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        body = response.get_data()
+        if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+            return response
+
+        if request.path.startswith(STATIC_PREFIXES):
+            key = (request.full_path, encoding)
+            compressed = static_cache.get(key)
+            if compressed is None:
+                compressed = compress(body, encoding)
+                static_cache[key] = compressed
+                if len(static_cache) > STATIC_CACHE_SIZE:
+                    static_cache.popitem(last=False)
+            else:
+                static_cache.move_to_end(key)
+        else:
+            compressed = compress(body, encoding)
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    @server.after_request
+    def cache_fingerprinted_assets(response):
+        if request.path.startswith(DIST_URL_PREFIX) and response.status_code in (200, 304):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = DIST_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    @server.after_request
+    def add_validators(response):
+        if not is_validated_request(response):
+            return response
+        body = response.get_data()
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        response.set_etag(f"{data_version()}-{digest}", weak=True)
+        last_modified = data_last_modified()
+        if last_modified:
+            response.last_modified = datetime.fromtimestamp(last_modified, tz=timezone.utc)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
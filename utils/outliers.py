@@ -0,0 +1,126 @@
+"""
+Isolation Forest outlier detection shared by the data overview page
+and the offline snapshot jobs
+"""
+
+import traceback
+import numpy as np
+import pandas as pd
+
+from utils.data_layer import DEFAULT_CHUNKSIZE, count_rows, iter_chunks
+
+# Row identifiers grow with the file, so a model fitted on part of it would
+# flag the rows outside that part as anomalous if they were used as features
+ID_COLUMNS = ['id', 'CustomerId', 'RowNumber']
+SCORE_COLUMNS = ['IsOutlier', 'OutlierScore']
+
+# The model is fitted on the same seeded sample of rows whether the data is a
+# whole frame (live pages) or streamed in chunks (snapshot, exports, ingest),
+# so both give the same scores; files up to this size are fitted on every row
+FIT_SAMPLE_ROWS = 100_000
+FIT_SEED = 42
+
+
+# Perform Outlier Detection using Isolation Forest
+def detect_outliers(dataframe, contamination=0.05):
+    """
+    Detect outliers using Isolation Forest algorithm
+    contamination: expected proportion of outliers (0.05 = 5%)
+    """
+    try:
+        # Same sample, model and columns as the snapshot and export jobs
+        sample = dataframe.iloc[fit_positions(len(dataframe))]
+        iso_forest, numerical_cols = fit_outlier_model(sample, contamination=contamination)
+        return score_outliers(iso_forest, numerical_cols, dataframe)
+    except Exception as e:
+        print(f"Error in detect_outliers: {str(e)}")
+        traceback.print_exc()
+        # Return without scores if there's an error
+        dataframe['IsOutlier'] = 1  # Mark all as normal if error
+        dataframe['OutlierScore'] = 0.0
+        return dataframe
+
+
+def fit_outlier_model(sample, contamination=0.05):
+    """
+    Fits an Isolation Forest on a sample so larger files can be scored chunk by chunk
+    Returns the fitted model and the numerical columns it was trained on
+    """
+    # Imported here so the dashboard can start from a prebuilt snapshot without loading sklearn
+    from sklearn.ensemble import IsolationForest
+    # A column with no values in the sample is read as float but may hold text in later chunks
+    numerical_cols = [col for col in sample.select_dtypes(include=[np.number]).columns
+                      if col not in ID_COLUMNS + SCORE_COLUMNS and sample[col].notna().any()]
+    iso_forest = IsolationForest(contamination=contamination, random_state=42, n_jobs=-1)
+    iso_forest.fit(sample[numerical_cols])
+    return iso_forest, numerical_cols
+
+
+def fit_positions(n_rows, size=FIT_SAMPLE_ROWS, seed=FIT_SEED):
+    """
+    Sorted positions of the rows the model is fitted on
+    """
+    if n_rows <= size:
+        return np.arange(n_rows)
+    return np.sort(np.random.default_rng(seed).choice(n_rows, size, replace=False))
+
+
+def fit_sample(chunks, n_rows, size=FIT_SAMPLE_ROWS, seed=FIT_SEED):
+    """
+    Collects the rows at fit_positions from a stream of chunks
+    """
+    positions = fit_positions(n_rows, size, seed)
+    parts = []
+    start = 0
+    for chunk in chunks:
+        end = start + len(chunk)
+        first, last = np.searchsorted(positions, [start, end])
+        if last > first:
+            parts.append(chunk.iloc[positions[first:last] - start])
+        start = end
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def fit_outlier_file(path, chunksize=DEFAULT_CHUNKSIZE, contamination=0.05, drop=(), geography=None):
+    """
+    Fits the model on a file read chunk by chunk, with the same sample detect_outliers uses
+    geography keeps only that region's rows, as a regional dataset's page does
+    Returns (model, numerical columns, row count), or (None, None, 0) when there are no rows
+    """
+    if geography is None:
+        rows = count_rows(path, chunksize=chunksize)
+    else:
+        rows = sum(int((chunk['Geography'] == geography).sum())
+                   for chunk in iter_chunks(path, chunksize=chunksize, usecols=['Geography']))
+    if rows == 0:
+        return None, None, 0
+
+    def chunks():
+        for chunk in iter_chunks(path, chunksize=chunksize):
+            if geography is not None:
+                chunk = chunk[chunk['Geography'] == geography]
+            yield chunk.drop(columns=list(drop), errors='ignore')
+
+    iso_forest, numerical_cols = fit_outlier_model(fit_sample(chunks(), rows), contamination=contamination)
+    return iso_forest, numerical_cols, rows
+
+
+def score_outliers(iso_forest, numerical_cols, chunk):
+    """
+    Adds IsOutlier and OutlierScore to a chunk using an already fitted model
+    """
+    numerical_data = chunk[numerical_cols]
+    chunk['IsOutlier'] = iso_forest.predict(numerical_data)
+    chunk['OutlierScore'] = iso_forest.offset_ - iso_forest.score_samples(numerical_data)
+    return chunk
+
+
+def anomaly_histogram(scores, bins=50):
+    """
+    Counts and bin edges for the anomaly score distribution chart
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if len(scores) == 0:
+        return {"counts": [], "edges": []}
+    counts, edges = np.histogram(scores, bins=bins)
+    return {"counts": counts.tolist(), "edges": edges.tolist()}
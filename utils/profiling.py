@@ -0,0 +1,173 @@
+"""
+Column profiling for the data quality panel
+One streaming pass builds mergeable sketches per column (missing counts,
+HyperLogLog distinct counts, KLL quantiles, running moments, frequent
+values); results are stored per data version and rendered without
+touching raw rows again
+"""
+
+import os
+import pickle
+import hashlib
+
+import pandas as pd
+from joblib import Parallel, delayed
+
+from utils.data_layer import BANK_DATA_PATH, CACHE_DIR, DEFAULT_CHUNKSIZE, data_version, file_signature, iter_chunks
+from utils.sketches import FrequentItems, HyperLogLog, KLLSketch, Moments
+
+PROFILE_DIR = os.path.join(CACHE_DIR, 'profiles')
+QUANTILES = [0.01, 0.25, 0.5, 0.75, 0.99]
+
+
+class ColumnProfile:
+    """
+    All sketches kept for one column
+    """
+
+    def __init__(self, name, numeric):
+        self.name = name
+        self.numeric = numeric
+        self.rows = 0
+        self.missing = 0
+        self.distinct = HyperLogLog()
+        self.moments = Moments() if numeric else None
+        self.quantiles = KLLSketch() if numeric else None
+        self.frequent = None if numeric else FrequentItems()
+
+    def update(self, series):
+        self.rows += len(series)
+        self.missing += int(series.isna().sum())
+        self.distinct.update(series)
+        if self.numeric:
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+            self.moments.update(values)
+            self.quantiles.update(values)
+        else:
+            self.frequent.update(series)
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.missing += other.missing
+        self.distinct.merge(other.distinct)
+        if self.numeric:
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+        else:
+            self.frequent.merge(other.frequent)
+        return self
+
+
+def profile_chunk(chunk):
+    """
+    Builds sketches for a single chunk (runs inside worker processes)
+    """
+    profiles = {}
+    for name in chunk.columns:
+        numeric = pd.api.types.is_numeric_dtype(chunk[name]) or pd.api.types.is_bool_dtype(chunk[name])
+        profiles[name] = ColumnProfile(name, numeric).update(chunk[name])
+    return profiles
+
+
+def merge_profiles(total, part):
+    for name, profile in part.items():
+        if name not in total:
+            total[name] = profile
+        elif total[name].numeric != profile.numeric:
+            # A column that was all-missing in one chunk can come back with another dtype;
+            # keep the numeric profile when the other side has no values
+            if profile.rows == profile.missing:
+                total[name].rows += profile.rows
+                total[name].missing += profile.missing
+            elif total[name].rows == total[name].missing:
+                profile.rows += total[name].rows
+                profile.missing += total[name].missing
+                total[name] = profile
+            else:
+                raise ValueError(f"Column '{name}' mixes numeric and text values across chunks")
+        else:
+            total[name].merge(profile)
+    return total
+
+
+def profile_frame(frame, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Profiles a DataFrame that is already in memory, one slice at a time
+    """
+    profile = {}
+    for start in range(0, len(frame), chunksize):
+        merge_profiles(profile, profile_chunk(frame.iloc[start:start + chunksize]))
+    return profile
+
+
+def build_profile(path=BANK_DATA_PATH, chunksize=DEFAULT_CHUNKSIZE, n_jobs=-1):
+    """
+    Profiles every column of path in one pass, chunks are sketched in parallel
+    """
+    parts = Parallel(n_jobs=n_jobs, return_as='generator', pre_dispatch='2*n_jobs')(
+        delayed(profile_chunk)(chunk) for chunk in iter_chunks(path, chunksize=chunksize)
+    )
+    profile = {}
+    for part in parts:
+        merge_profiles(profile, part)
+    return profile
+
+
+def profile_version(path=BANK_DATA_PATH):
+    """
+    Key a profile of path is stored under: the data version for the live customer
+    file, otherwise the file's own signature so it is never shown as the live data
+    """
+    if os.path.abspath(path) == BANK_DATA_PATH:
+        return data_version()
+    return hashlib.sha1(f"{os.path.abspath(path)}:{file_signature(path)}".encode()).hexdigest()[:12]
+
+
+def profile_path(version=None):
+    return os.path.join(PROFILE_DIR, f"profile-{version or data_version()}.pkl")
+
+
+def save_profile(profile, version=None):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = profile_path(version)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(profile, f)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def load_profile(version=None):
+    """
+    Returns the stored profile for the current data version, or None
+    """
+    try:
+        with open(profile_path(version), 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def profile_summary(profile):
+    """
+    One row per column for the data quality table
+    """
+    rows = []
+    for name, column in profile.items():
+        row = {
+            "Column": name,
+            "Type": "numeric" if column.numeric else "text",
+            "Missing %": 100 * column.missing / column.rows if column.rows else 0.0,
+            "Distinct (approx.)": int(round(column.distinct.estimate())),
+        }
+        if column.numeric and column.moments.count:
+            p01, p25, p50, p75, p99 = column.quantiles.quantiles(QUANTILES)
+            row.update({
+                "Mean": column.moments.mean, "Std": column.moments.std,
+                "Min": column.moments.min, "P25": p25, "Median": p50, "P75": p75, "Max": column.moments.max,
+            })
+        else:
+            top = column.frequent.top(1) if column.frequent else []
+            row["Most Common"] = top[0][0] if top else ""
+        rows.append(row)
+    return pd.DataFrame(rows)
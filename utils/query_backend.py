@@ -0,0 +1,284 @@
+"""
+Pluggable query backend for the dashboard aggregations
+Each aggregation is declared once in QUERIES and can run on in-memory pandas
+or be pushed down to an embedded SQL engine (SQLite file or DuckDB over
+Parquet), so the customer data no longer has to fit in RAM.
+
+The engine is chosen with the DASHBOARD_QUERY_ENGINE environment variable
+(pandas, sqlite, duckdb or snapshot). Without it, the precomputed results of
+a current snapshot (scripts/build_snapshot.py) are served when one exists,
+otherwise pandas.
+"""
+
+import os
+import hashlib
+import sqlite3
+from collections import namedtuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from utils.app_snapshot import load_snapshot
+from utils.data_layer import (AGE_BINS, AGE_LABELS, BANK_DATA_PATH, CACHE_DIR, DEFAULT_CHUNKSIZE,
+                              PAST_DATA_PATH, ParquetChunkWriter, add_age_group, file_signature, iter_chunks)
+
+ENGINE_ENV = 'DASHBOARD_QUERY_ENGINE'
+DEFAULT_ENGINE = 'pandas'
+QUERY_CACHE_DIR = os.path.join(CACHE_DIR, 'query')
+
+# Logical tables and the files behind them
+TABLE_PATHS = {
+    "customers": BANK_DATA_PATH,
+    "segments": PAST_DATA_PATH,
+}
+
+# A grouped aggregation: aggregates maps output column -> (function, source column)
+# Supported functions: mean, sum, count (count ignores the source column)
+GroupAggregate = namedtuple('GroupAggregate', ['table', 'by', 'aggregates'])
+
+QUERIES = {
+    "customer_kpis": GroupAggregate("customers", None, {
+        "total_customers": ("count", None),
+        "churned_customers": ("sum", "Exited"),
+        "active_customers": ("sum", "IsActiveMember"),
+    }),
+    "churn_by_geography": GroupAggregate("customers", "Geography", {"Exited": ("mean", "Exited")}),
+    "churn_by_age_group": GroupAggregate("customers", "AgeGroup", {"Exited": ("mean", "Exited")}),
+    "churn_by_gender": GroupAggregate("customers", "Gender", {"Exited": ("mean", "Exited")}),
+    "churn_by_activity": GroupAggregate("customers", "IsActiveMember", {"Exited": ("mean", "Exited")}),
+    "churn_by_products": GroupAggregate("customers", "NumOfProducts", {"Exited": ("mean", "Exited")}),
+    "segment_counts": GroupAggregate("segments", "GMM_Cluster", {"Count": ("count", None)}),
+    "segment_churn": GroupAggregate("segments", "GMM_Cluster", {"Churn_Rate": ("mean", "Churn_Probability")}),
+    "segment_summary": GroupAggregate("segments", "GMM_Cluster", {
+        "Avg_Age": ("mean", "Age"),
+        "Churn_Prob": ("mean", "Churn_Probability"),
+        "Avg_Tenure": ("mean", "Tenure"),
+    }),
+}
+
+
+class PandasBackend:
+    """
+    Loads each table into memory on first use and aggregates with groupby
+    """
+
+    name = 'pandas'
+
+    def __init__(self, paths=None, tables=None):
+        self.paths = dict(TABLE_PATHS, **(paths or {}))
+        # Tables already in memory (e.g. a regional dataset) are used as they are
+        self.tables = dict(tables or {})
+
+    def table(self, name):
+        if name not in self.tables:
+            frame = pd.read_csv(self.paths[name])
+            if 'Age' in frame:
+                add_age_group(frame)
+            self.tables[name] = frame
+        return self.tables[name]
+
+    def run(self, query_name):
+        query = QUERIES[query_name]
+        frame = self.table(query.table)
+        if query.by is None:
+            row = {output: len(frame) if function == 'count' else getattr(frame[column], function)()
+                   for output, (function, column) in query.aggregates.items()}
+            return pd.DataFrame([row])
+        named = {output: (frame.columns[0], 'size') if function == 'count' else (column, function)
+                 for output, (function, column) in query.aggregates.items()}
+        return frame.groupby(query.by, as_index=False, observed=True).agg(**named)
+
+
+def age_group_sql(column='Age'):
+    """
+    SQL CASE expression matching pd.cut(Age, AGE_BINS, right=False)
+    """
+    cases = " ".join(f"WHEN {column} >= {low} AND {column} < {high} THEN '{label}'"
+                     for low, high, label in zip(AGE_BINS[:-1], AGE_BINS[1:], AGE_LABELS))
+    return f"CASE {cases} ELSE NULL END"
+
+
+def aggregate_sql(query, source):
+    """
+    Renders a GroupAggregate as SQL against source (a table name or table function)
+    """
+    selects = []
+    for output, (function, column) in query.aggregates.items():
+        if function == 'count':
+            selects.append(f'COUNT(*) AS "{output}"')
+        elif function == 'mean':
+            selects.append(f'AVG("{column}") AS "{output}"')
+        else:
+            selects.append(f'{function.upper()}("{column}") AS "{output}"')
+    if query.by is None:
+        return f"SELECT {', '.join(selects)} FROM {source}"
+    key = f'"{query.by}"'
+    return (f"SELECT {key}, {', '.join(selects)} FROM {source} "
+            f"WHERE {key} IS NOT NULL GROUP BY {key} ORDER BY {key}")
+
+
+def cache_key(paths):
+    signatures = "|".join(f"{name}:{path}:{file_signature(path) if os.path.exists(path) else 'missing'}"
+                          for name, path in sorted(paths.items()))
+    return hashlib.sha1(signatures.encode()).hexdigest()[:12]
+
+
+class SQLiteBackend:
+    """
+    Copies each table into an on-disk SQLite file once (per data version),
+    then runs every aggregation as SQL inside SQLite
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, paths=None, cache_dir=QUERY_CACHE_DIR, chunksize=DEFAULT_CHUNKSIZE):
+        self.paths = dict(TABLE_PATHS, **(paths or {}))
+        self.cache_dir = cache_dir
+        self.chunksize = chunksize
+        self.db_path = os.path.join(cache_dir, f"dashboard-{cache_key(self.paths)}.sqlite")
+        if not os.path.exists(self.db_path):
+            self.build()
+
+    def connect(self):
+        # Connections are cheap; one per query keeps the backend safe across server threads
+        return sqlite3.connect(self.db_path)
+
+    def build(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.db_path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        connection = sqlite3.connect(tmp_path)
+        try:
+            for name, path in self.paths.items():
+                if not os.path.exists(path):
+                    continue
+                for chunk in iter_chunks(path, chunksize=self.chunksize):
+                    chunk.to_sql(f"{name}_raw", connection, if_exists='append', index=False)
+                columns = pd.read_sql(f'SELECT * FROM "{name}_raw" LIMIT 0', connection).columns
+                age_group = f", {age_group_sql()} AS AgeGroup" if 'Age' in columns else ""
+                connection.execute(f'CREATE VIEW "{name}" AS SELECT *{age_group} FROM "{name}_raw"')
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_path, self.db_path)
+
+    def run(self, query_name):
+        query = QUERIES[query_name]
+        connection = self.connect()
+        try:
+            return pd.read_sql(aggregate_sql(query, f'"{query.table}"'), connection)
+        finally:
+            connection.close()
+
+
+class DuckDBBackend:
+    """
+    Converts each table to Parquet once (per data version) and lets DuckDB
+    scan only the columns a query needs
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, paths=None, cache_dir=QUERY_CACHE_DIR, chunksize=DEFAULT_CHUNKSIZE):
+        import duckdb
+        self.duckdb = duckdb
+        self.paths = dict(TABLE_PATHS, **(paths or {}))
+        self.cache_dir = cache_dir
+        self.chunksize = chunksize
+        self.parquet_paths = {}
+        for name, path in self.paths.items():
+            if os.path.exists(path):
+                self.parquet_paths[name] = self.to_parquet(name, path)
+        self.sources = {name: self.source(name) for name in self.parquet_paths}
+        self.connection = duckdb.connect()
+
+    def to_parquet(self, name, path):
+        if path.endswith('.parquet'):
+            return path
+        target = os.path.join(self.cache_dir, f"{name}-{cache_key({name: path})}.parquet")
+        if os.path.exists(target):
+            return target
+        os.makedirs(self.cache_dir, exist_ok=True)
+        writer = ParquetChunkWriter(target + '.tmp')
+        try:
+            for chunk in iter_chunks(path, chunksize=self.chunksize):
+                writer.write(chunk)
+        finally:
+            writer.close()
+        os.replace(target + '.tmp', target)
+        return target
+
+    def source(self, name):
+        parquet_path = self.parquet_paths[name].replace("'", "''")
+        columns = pq.read_schema(self.parquet_paths[name]).names
+        age_group = f", {age_group_sql()} AS AgeGroup" if 'Age' in columns else ""
+        return f"(SELECT *{age_group} FROM read_parquet('{parquet_path}'))"
+
+    def run(self, query_name):
+        query = QUERIES[query_name]
+        # DuckDB cursors are cheap and each one is safe to use from its own server thread
+        cursor = self.connection.cursor()
+        try:
+            return cursor.execute(aggregate_sql(query, self.sources[query.table])).df()
+        finally:
+            cursor.close()
+
+
+class SnapshotBackend:
+    """
+    Serves the query results stored in the current snapshot, no data is scanned
+    """
+
+    name = 'snapshot'
+
+    def __init__(self, paths=None):
+        self.snapshot = load_snapshot()
+        if self.snapshot is None or not self.snapshot.has('aggregates'):
+            raise ValueError("No current snapshot with query results - run python -m scripts.build_snapshot")
+
+    def run(self, query_name):
+        return self.snapshot.aggregate(query_name)
+
+
+BACKENDS = {
+    PandasBackend.name: PandasBackend,
+    SQLiteBackend.name: SQLiteBackend,
+    DuckDBBackend.name: DuckDBBackend,
+    SnapshotBackend.name: SnapshotBackend,
+}
+
+_backend = None
+
+
+def configured_engine():
+    """
+    Engine named by DASHBOARD_QUERY_ENGINE, else snapshot when a current one exists, else pandas
+    """
+    engine = os.environ.get(ENGINE_ENV, '').lower()
+    if not engine:
+        snapshot = load_snapshot()
+        engine = SnapshotBackend.name if snapshot is not None and snapshot.has('aggregates') else DEFAULT_ENGINE
+    if engine not in BACKENDS:
+        raise ValueError(f"Unknown query engine '{engine}', expected one of: {', '.join(BACKENDS)}")
+    return engine
+
+
+def get_backend():
+    """
+    Returns the configured backend, created on first use
+    """
+    global _backend
+    if _backend is None:
+        engine = configured_engine()
+        try:
+            _backend = BACKENDS[engine]()
+        except ImportError as e:
+            # duckdb is an optional extra, so a missing install falls back instead of breaking every page
+            print(f"Query engine '{engine}' unavailable ({str(e)}), using {DEFAULT_ENGINE}")
+            _backend = BACKENDS[DEFAULT_ENGINE]()
+    return _backend
+
+
+def run_query(query_name):
+    return get_backend().run(query_name)
@@ -0,0 +1,268 @@
+"""
+Mergeable streaming sketches for column profiling
+Every sketch can be updated one chunk at a time and merged with a sketch
+built on other chunks (or in another process) without revisiting rows
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def hash_values(series):
+    """
+    64-bit hashes that do not depend on the chunk's dtype (1 and 1.0 hash the same)
+    """
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        series = series.astype(np.float64)
+    else:
+        series = series.astype(str)
+    return pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=np.uint64)
+
+
+class HyperLogLog:
+    """
+    Approximate distinct count (standard error about 1.04 / sqrt(2 ** precision))
+    """
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, series):
+        hashes = hash_values(series.dropna())
+        if len(hashes) == 0:
+            return self
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remaining = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # rank = position of the first set bit in the remaining bits
+        bit_length = np.frexp(remaining.astype(np.float64))[1]
+        rank = (64 - self.precision - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * np.log(m / zeros)
+        return raw
+
+
+class KLLSketch:
+    """
+    Quantile sketch (Karnin, Lang, Liberty) with rank error of roughly 1.7 / k
+    Level h holds items that each stand for 2 ** h original values
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.n += len(values)
+            self.compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.compress()
+        return self
+
+    def compress(self):
+        # Compact the lowest over-full level until the sketch fits its total budget
+        while sum(len(items) for items in self.levels) > sum(self.capacity(h) for h in range(len(self.levels))):
+            level = next(h for h, items in enumerate(self.levels) if len(items) > self.capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # An odd item stays behind so total weight is preserved
+            keep = items[:1] if len(items) % 2 else items[:0]
+            promoted = items[len(keep):][self.rng.integers(2)::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2.0 ** level) for level, values in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantiles(self, qs):
+        items, weights = self.weighted_items()
+        if len(items) == 0:
+            return [np.nan for _ in qs]
+        cumulative = np.cumsum(weights) / weights.sum()
+        positions = np.searchsorted(cumulative, qs, side='left')
+        return [float(items[min(pos, len(items) - 1)]) for pos in positions]
+
+    def histogram(self, bins=30):
+        """
+        Approximate histogram (counts scaled to the number of values seen)
+        """
+        items, weights = self.weighted_items()
+        if len(items) == 0:
+            return np.array([]), np.array([])
+        counts, edges = np.histogram(items, bins=bins, weights=weights)
+        return counts * (self.n / weights.sum()), edges
+
+
+class Moments:
+    """
+    Count, mean, variance, min and max merged with Chan's parallel formula
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        other = Moments()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        return self.merge(other)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+
+class FrequentItems:
+    """
+    Misra-Gries frequent-item counts for categorical columns
+    Exact while there are at most `capacity` distinct values
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+
+    def update(self, series):
+        for value, count in series.dropna().astype(str).value_counts().items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        self.trim()
+        return self
+
+    def merge(self, other):
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self.trim()
+        return self
+
+    def trim(self):
+        if len(self.counts) <= self.capacity:
+            return
+        cutoff = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {value: count - cutoff for value, count in self.counts.items() if count > cutoff}
+
+    def top(self, n=10):
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class CovarianceAccumulator:
+    """
+    Count, column means and co-moment matrix of several numeric columns,
+    merged with the multivariate form of Chan's formula
+    Only complete rows are counted (a row with any missing value is skipped)
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    def update(self, frame):
+        values = frame[self.columns].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values).any(axis=1)]
+        if len(values) == 0:
+            return self
+        other = CovarianceAccumulator(self.columns)
+        other.count = len(values)
+        other.mean = values.mean(axis=0)
+        centered = values - other.mean
+        other.comoment = centered.T @ centered
+        return self.merge(other)
+
+    def merge(self, other):
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge accumulators over different columns")
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.count * other.count / total
+        self.mean = self.mean + delta * other.count / total
+        self.count = total
+        return self
+
+    def covariance(self):
+        return self.comoment / (self.count - 1) if self.count > 1 else np.full_like(self.comoment, np.nan)
+
+    def correlation(self):
+        """
+        Pearson correlation matrix; NaN for constant columns
+        """
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = self.comoment / np.outer(std, std)
+        return np.clip(correlation, -1.0, 1.0)
+
+    def to_dict(self):
+        return {"columns": self.columns, "count": self.count, "mean": self.mean.tolist(),
+                "comoment": self.comoment.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        accumulator = cls(data["columns"])
+        accumulator.count = data["count"]
+        accumulator.mean = np.asarray(data["mean"], dtype=np.float64)
+        accumulator.comoment = np.asarray(data["comoment"], dtype=np.float64)
+        return accumulator
@@ -0,0 +1,170 @@
+"""
+Monthly snapshot ingestion for the trends page
+Each extract is stored as a month=YYYY-MM Parquet partition and its
+aggregates are computed once, so trend charts never rescan raw rows
+"""
+
+import os
+import re
+import json
+import shutil
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from utils.data_layer import SNAPSHOT_DIR, DEFAULT_CHUNKSIZE, ParquetChunkWriter, iter_chunks
+from utils.outliers import fit_outlier_file, score_outliers
+
+PARTITION_DIR = os.path.join(SNAPSHOT_DIR, 'partitions')
+AGGREGATE_DIR = os.path.join(SNAPSHOT_DIR, 'aggregates')
+# Partitions are written here first, outside PARTITION_DIR so a partition scan never sees a half-written month
+STAGING_DIR = os.path.join(SNAPSHOT_DIR, 'staging')
+
+MONTH_PATTERN = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+def validate_month(month):
+    """
+    Checks that month is in YYYY-MM format
+    """
+    if not MONTH_PATTERN.match(month):
+        raise ValueError(f"Invalid month '{month}', expected YYYY-MM")
+    return month
+
+
+def partition_path(month):
+    return os.path.join(PARTITION_DIR, f"month={validate_month(month)}")
+
+
+def aggregate_path(month):
+    return os.path.join(AGGREGATE_DIR, f"{validate_month(month)}.json")
+
+
+class MonthlyAggregator:
+    """
+    Accumulates the per-month trend figures one chunk at a time
+    """
+
+    def __init__(self):
+        self.total_customers = 0
+        self.churned_customers = 0
+        self.active_customers = 0
+        self.outlier_count = 0
+        self.churn_probability_sum = 0.0
+        self.has_exited = False
+        self.has_churn_probability = False
+        self.segment_sizes = {}
+
+    def update(self, chunk):
+        self.total_customers += len(chunk)
+        if 'Exited' in chunk:
+            self.has_exited = True
+            self.churned_customers += int((chunk['Exited'] == 1).sum())
+        if 'Churn_Probability' in chunk:
+            self.has_churn_probability = True
+            self.churn_probability_sum += float(chunk['Churn_Probability'].sum())
+        if 'IsActiveMember' in chunk:
+            self.active_customers += int((chunk['IsActiveMember'] == 1).sum())
+        if 'IsOutlier' in chunk:
+            self.outlier_count += int((chunk['IsOutlier'] == -1).sum())
+        if 'GMM_Cluster' in chunk:
+            for segment, count in chunk['GMM_Cluster'].value_counts().items():
+                key = str(segment)
+                self.segment_sizes[key] = self.segment_sizes.get(key, 0) + int(count)
+
+    def to_record(self, month):
+        total = self.total_customers
+        avg_probability = self.churn_probability_sum / total if total and self.has_churn_probability else None
+        if self.has_exited:
+            churn_rate = self.churned_customers / total if total else 0.0
+        else:
+            # past-data style extracts only carry model scores
+            churn_rate = avg_probability
+        return {
+            "month": month,
+            "total_customers": total,
+            "churned_customers": self.churned_customers if self.has_exited else None,
+            "churn_rate": churn_rate,
+            "avg_churn_probability": avg_probability,
+            "active_customers": self.active_customers,
+            "outlier_count": self.outlier_count,
+            "segment_sizes": dict(sorted(self.segment_sizes.items())),
+        }
+
+
+def ingest_snapshot(source_path, month, chunksize=DEFAULT_CHUNKSIZE, contamination=0.05):
+    """
+    Streams an extract into its month partition and stores the month's aggregates
+    Re-ingesting a month replaces both the partition and its aggregate record
+    """
+    target_dir = partition_path(month)
+    tmp_dir = os.path.join(STAGING_DIR, os.path.basename(target_dir))
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    aggregator = MonthlyAggregator()
+    writer = ParquetChunkWriter(os.path.join(tmp_dir, 'part-0.parquet'))
+    try:
+        iso_forest, numerical_cols, _ = fit_outlier_file(source_path, chunksize=chunksize,
+                                                         contamination=contamination, drop=['month'])
+        for chunk in iter_chunks(source_path, chunksize=chunksize):
+            if 'month' in chunk:
+                # the partition key is stored in the directory name
+                chunk = chunk.drop(columns=['month'])
+            chunk = score_outliers(iso_forest, numerical_cols, chunk)
+            aggregator.update(chunk)
+            writer.write(chunk)
+    except BaseException:
+        writer.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    writer.close()
+
+    if writer.rows == 0:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise ValueError(f"No rows found in {source_path}")
+
+    shutil.rmtree(target_dir, ignore_errors=True)
+    os.makedirs(PARTITION_DIR, exist_ok=True)
+    os.replace(tmp_dir, target_dir)
+
+    record = aggregator.to_record(month)
+    record["source"] = os.path.basename(source_path)
+    record["ingested_at"] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    os.makedirs(AGGREGATE_DIR, exist_ok=True)
+    tmp_path = aggregate_path(month) + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, aggregate_path(month))
+    return record
+
+
+def list_months():
+    """
+    Returns the months that have stored aggregates, oldest first
+    """
+    if not os.path.isdir(AGGREGATE_DIR):
+        return []
+    months = [name[:-5] for name in os.listdir(AGGREGATE_DIR) if name.endswith('.json')]
+    return sorted(month for month in months if MONTH_PATTERN.match(month))
+
+
+def load_monthly_aggregates(last_n=None):
+    """
+    Loads the stored monthly aggregate records as a DataFrame
+    Only the small JSON records are read, never the partitions
+    """
+    months = list_months()
+    if last_n:
+        months = months[-last_n:]
+    records = []
+    for month in months:
+        with open(aggregate_path(month)) as f:
+            records.append(json.load(f))
+    if not records:
+        return pd.DataFrame(columns=["month", "total_customers", "churn_rate", "outlier_count"])
+
+    trends = pd.DataFrame(records)
+    segments = pd.DataFrame(list(trends.pop("segment_sizes"))).fillna(0).astype(int)
+    segments.columns = [f"Segment {col}" for col in segments.columns]
+    return pd.concat([trends, segments], axis=1)
@@ -0,0 +1,273 @@
+"""
+Hyperparameter search and retraining for the XGBoost churn model
+Optuna trials run in parallel worker processes that share one SQLite study,
+so an interrupted search picks up where it stopped. The best trial is
+refitted and written as the next versioned model next to the current one.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from joblib import Parallel, delayed
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier, export_text
+
+from utils.data_layer import BANK_DATA_PATH, DEFAULT_CHUNKSIZE, MODEL_DIR, file_signature, iter_chunks
+from utils.features import FEATURE_NAMES, build_feature_matrix
+
+STUDY_DIR = os.path.join(MODEL_DIR, 'optuna')
+TARGET = 'Exited'
+
+MAX_BOOST_ROUNDS = 2000
+EARLY_STOPPING_ROUNDS = 50
+# Intermediate AUC is written to the study every REPORT_EVERY rounds,
+# reporting every round would make the SQLite file the bottleneck
+REPORT_EVERY = 10
+# Depth of the surrogate tree written to decision_rules.txt
+RULES_DEPTH = 10
+
+
+def load_training_data(path=BANK_DATA_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Returns (features, labels) as float32 / int8 arrays, built chunk by chunk
+    """
+    features, labels = [], []
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        chunk = chunk.dropna(subset=[TARGET])
+        features.append(build_feature_matrix(chunk).to_numpy(dtype=np.float32))
+        labels.append(chunk[TARGET].to_numpy(dtype=np.int8))
+    return np.concatenate(features), np.concatenate(labels)
+
+
+def split_data(features, labels, test_size=0.15, valid_size=0.15, seed=42):
+    """
+    Stratified train / validation / test split
+    Trials are scored on validation, the final model on the untouched test rows
+    """
+    X_rest, X_test, y_rest, y_test = train_test_split(
+        features, labels, test_size=test_size, stratify=labels, random_state=seed)
+    X_train, X_valid, y_train, y_valid = train_test_split(
+        X_rest, y_rest, test_size=valid_size / (1 - test_size), stratify=y_rest, random_state=seed)
+    return X_train, X_valid, X_test, y_train, y_valid, y_test
+
+
+def default_study_name(path=BANK_DATA_PATH):
+    """
+    One study per version of the training file: a rerun on the same data resumes,
+    next month's data starts a fresh search
+    """
+    return "churn-xgb-" + hashlib.sha1(file_signature(path).encode()).hexdigest()[:12]
+
+
+def study_storage(study_dir=STUDY_DIR, study_name=None):
+    import optuna
+    os.makedirs(study_dir, exist_ok=True)
+    url = f"sqlite:///{os.path.join(study_dir, study_name + '.db')}"
+    # Several processes write to the same file, so wait for locks instead of failing;
+    # the heartbeat marks trials of a killed run as failed when the study is resumed
+    return optuna.storages.RDBStorage(url, engine_kwargs={"connect_args": {"timeout": 60}},
+                                      heartbeat_interval=60, grace_period=180)
+
+
+def suggest_params(trial, allow_smote=False):
+    params = {
+        'max_depth': trial.suggest_int('max_depth', 3, 10),
+        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
+        'subsample': trial.suggest_float('subsample', 0.5, 1.0),
+        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.5, 1.0),
+        'min_child_weight': trial.suggest_float('min_child_weight', 1.0, 50.0, log=True),
+        'gamma': trial.suggest_float('gamma', 1e-8, 5.0, log=True),
+        'reg_lambda': trial.suggest_float('reg_lambda', 1e-3, 10.0, log=True),
+        'reg_alpha': trial.suggest_float('reg_alpha', 1e-8, 10.0, log=True),
+        'scale_pos_weight': trial.suggest_float('scale_pos_weight', 1.0, 5.0),
+    }
+    params['resampling'] = trial.suggest_categorical('resampling', ['none', 'smote']) if allow_smote else 'none'
+    return params
+
+
+def booster_params(params, nthread, seed=42):
+    """
+    Search parameters translated for xgb.train
+    """
+    booster = {key: value for key, value in params.items() if key != 'resampling'}
+    booster.update({
+        'objective': 'binary:logistic',
+        'eval_metric': 'auc',
+        'tree_method': 'hist',
+        'nthread': nthread,
+        'seed': seed,
+    })
+    return booster
+
+
+def smote_resample(X, y, seed=42):
+    from imblearn.over_sampling import SMOTE
+    X_res, y_res = SMOTE(random_state=seed).fit_resample(X, y)
+    return X_res.astype(np.float32), y_res.astype(np.int8)
+
+
+class PruningCallback(xgb.callback.TrainingCallback):
+    """
+    Reports validation AUC to the trial and stops boosting when Optuna prunes it
+    """
+
+    def __init__(self, trial, every=REPORT_EVERY):
+        super().__init__()
+        self.trial = trial
+        self.every = every
+
+    def after_iteration(self, model, epoch, evals_log):
+        if (epoch + 1) % self.every:
+            return False
+        import optuna
+        self.trial.report(evals_log['valid']['auc'][-1], epoch + 1)
+        if self.trial.should_prune():
+            raise optuna.TrialPruned(f"Pruned at round {epoch + 1}")
+        return False
+
+
+def make_objective(X_train, y_train, X_valid, y_valid, nthread=1, allow_smote=False, seed=42):
+    dvalid = xgb.DMatrix(X_valid, label=y_valid, feature_names=FEATURE_NAMES)
+    train_sets = {}
+
+    def train_set(resampling):
+        # Each worker resamples (and builds the DMatrix) once, not once per trial
+        if resampling not in train_sets:
+            X, y = smote_resample(X_train, y_train, seed) if resampling == 'smote' else (X_train, y_train)
+            train_sets[resampling] = xgb.DMatrix(X, label=y, feature_names=FEATURE_NAMES)
+        return train_sets[resampling]
+
+    def objective(trial):
+        params = suggest_params(trial, allow_smote)
+        booster = xgb.train(booster_params(params, nthread, seed), train_set(params['resampling']),
+                            num_boost_round=MAX_BOOST_ROUNDS, evals=[(dvalid, 'valid')],
+                            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                            callbacks=[PruningCallback(trial)], verbose_eval=False)
+        trial.set_user_attr('n_estimators', booster.best_iteration + 1)
+        return booster.best_score
+
+    return objective
+
+
+def run_worker(worker, study_dir, study_name, X_train, y_train, X_valid, y_valid,
+               n_trials, timeout, nthread, allow_smote, seed):
+    """
+    Runs trials in one process until the study holds n_trials finished trials
+    or the time budget runs out
+    """
+    import optuna
+    from optuna.study import MaxTrialsCallback
+    from optuna.trial import TrialState
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=study_storage(study_dir, study_name),
+        # constant_liar keeps parallel workers from sampling the same point
+        sampler=optuna.samplers.TPESampler(seed=seed + worker, constant_liar=True),
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=5 * REPORT_EVERY),
+    )
+    objective = make_objective(X_train, y_train, X_valid, y_valid, nthread, allow_smote, seed)
+    study.optimize(objective, timeout=timeout, catch=(xgb.core.XGBoostError,),
+                   callbacks=[MaxTrialsCallback(n_trials, states=(TrialState.COMPLETE, TrialState.PRUNED))])
+
+
+def finished_trials(study):
+    from optuna.trial import TrialState
+    return [trial for trial in study.trials if trial.state in (TrialState.COMPLETE, TrialState.PRUNED)]
+
+
+def search(X_train, y_train, X_valid, y_valid, study_name, study_dir=STUDY_DIR, n_trials=200,
+           timeout=45 * 60, n_jobs=-1, allow_smote=False, seed=42):
+    """
+    Runs (or resumes) the study with n_jobs worker processes and returns it
+    """
+    import optuna
+    study = optuna.create_study(study_name=study_name, storage=study_storage(study_dir, study_name),
+                                direction='maximize', load_if_exists=True)
+    remaining = n_trials - len(finished_trials(study))
+    if remaining > 0 and timeout > 0:
+        workers = os.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+        workers = min(workers, remaining)
+        nthread = max(1, (os.cpu_count() or 1) // workers)
+        # joblib memory-maps the arrays, so workers share one copy of the data
+        Parallel(n_jobs=workers)(
+            delayed(run_worker)(worker, study_dir, study_name, X_train, y_train, X_valid, y_valid,
+                                n_trials, timeout, nthread, allow_smote, seed)
+            for worker in range(workers)
+        )
+    return optuna.load_study(study_name=study_name, storage=study_storage(study_dir, study_name))
+
+
+def fit_final_model(best_trial, X, y, seed=42):
+    """
+    Refits the best trial on train + validation rows as an XGBClassifier,
+    the same estimator type as the current pickled model
+    """
+    params = dict(best_trial.params)
+    resampling = params.pop('resampling', 'none')
+    if resampling == 'smote':
+        X, y = smote_resample(X, y, seed)
+    model = xgb.XGBClassifier(n_estimators=best_trial.user_attrs['n_estimators'], objective='binary:logistic',
+                              eval_metric='auc', tree_method='hist', n_jobs=-1, random_state=seed, **params)
+    model.fit(pd.DataFrame(X, columns=FEATURE_NAMES), y)
+    return model
+
+
+def feature_importance_frame(model):
+    importance = pd.DataFrame({"Feature": FEATURE_NAMES, "Importance": model.feature_importances_})
+    return importance.sort_values("Importance", ascending=False).reset_index(drop=True)
+
+
+def decision_rules(model, X, seed=42):
+    """
+    Text rules of a shallow decision tree fitted to the model's own predictions,
+    so the rules describe what the new model does
+    """
+    frame = pd.DataFrame(X, columns=FEATURE_NAMES)
+    tree = DecisionTreeClassifier(max_depth=RULES_DEPTH, random_state=seed)
+    tree.fit(frame, model.predict(frame))
+    return export_text(tree, feature_names=FEATURE_NAMES)
+
+
+def next_model_path(model_dir=MODEL_DIR):
+    """
+    Path of the next versioned model, e.g. xgb_model_v3.pkl after xgb_model_v2.pkl
+    """
+    versions = [int(match.group(1)) for name in os.listdir(model_dir)
+                if (match := re.fullmatch(r'xgb_model_v(\d+)\.pkl', name))] if os.path.isdir(model_dir) else []
+    return os.path.join(model_dir, f"xgb_model_v{max(versions, default=0) + 1}.pkl")
+
+
+def test_auc(model, X_test, y_test):
+    probabilities = model.predict_proba(pd.DataFrame(X_test, columns=FEATURE_NAMES))[:, 1]
+    return float(roc_auc_score(y_test, probabilities))
+
+
+def write_metadata(path, study, model_auc, baseline_auc, data_path, started):
+    best = study.best_trial
+    meta = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "training_seconds": round(time.time() - started, 1),
+        "data": os.path.basename(data_path),
+        "data_signature": file_signature(data_path),
+        "study": study.study_name,
+        "trials": len(finished_trials(study)),
+        "best_trial": best.number,
+        "params": best.params,
+        "n_estimators": best.user_attrs['n_estimators'],
+        "valid_auc": best.value,
+        "test_auc": model_auc,
+        "baseline_test_auc": baseline_auc,
+        "features": FEATURE_NAMES,
+    }
+    with open(path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta